@@ -0,0 +1,72 @@
+"""
+Compare the /listen audio encodings on a synthetic utterance.
+
+Reports bytes on the wire, encode and decode cost per 512 sample frame, and
+the reconstruction error against the original 16-bit samples.
+
+Run from ceres-voice-module:
+    python benchmarks/bench_audio_codec.py --seconds 5
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.speech.audio_codec import ENCODERS, create_decoder, create_encoder
+
+
+SAMPLE_RATE = 16000
+FRAME = 512
+
+
+def synthetic_speech(seconds: float) -> np.ndarray:
+    """Voiced harmonics under a syllable-rate envelope, with pauses and room noise"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = 140 + 20 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = np.clip(np.sin(2 * np.pi * 3 * t), 0, None) * (np.sin(2 * np.pi * 0.4 * t) > -0.3)
+    signal = 6000 * voiced * envelope + rng.normal(0, 60, len(t))
+    return np.clip(signal, -32768, 32767).astype(np.int16)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    audio = synthetic_speech(args.seconds)
+    frames = [audio[i:i + FRAME] for i in range(0, len(audio), FRAME)]
+    reference = audio.astype(np.float32) / 32768.0
+    raw_bytes = audio.nbytes
+
+    for encoding in ENCODERS:
+        encoder = create_encoder(encoding)
+        started = time.perf_counter()
+        payloads = [encoder.encode(frame) for frame in frames]
+        encode_us = (time.perf_counter() - started) / len(frames) * 1e6
+
+        decoder = create_decoder(encoding)
+        out = np.empty(len(audio), dtype=np.float32)
+        position = 0
+        started = time.perf_counter()
+        for payload in payloads:
+            samples = decoder.samples(payload)
+            decoder.write(samples, out[position:position + len(samples)])
+            position += len(samples)
+        decode_us = (time.perf_counter() - started) / len(frames) * 1e6
+
+        sent = sum(len(payload) for payload in payloads)
+        error = np.abs(out[:position] - reference[:position]).max()
+        print(
+            f"{encoding:<7} {sent:>8} bytes ({sent / raw_bytes * 100:5.1f}% of pcm16)  "
+            f"encode {encode_us:6.1f} us/frame  decode {decode_us:6.1f} us/frame  max error {error:.5f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
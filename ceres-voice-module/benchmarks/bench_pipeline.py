@@ -0,0 +1,310 @@
+"""
+Time each stage of the command pipeline on its own, offline.
+
+Gemini is replaced by a replay of the recorded responses in
+data/gemini_responses.jsonl, so no network or API key is needed. Stages:
+
+    prompt_user      PromptGenerator.get_user_prompt, what the agent sends
+    prompt_enhanced  PromptGenerator.get_enhanced_prompt
+    generate         the replayed Gemini call, --llm-latency-ms adds a fixed delay
+    clean            ResponseCleaner.sanitize_response
+    detect           CommandDetector.detect_command_type
+    validate         SecurityValidator.validate_command on a command it has not seen
+    validate_cached  the same, answered from the verdict cache
+    hot_path         prompt, generate, clean, detect and validate together, as AIAgent runs
+                     them for a request it has not seen
+    execute          ShellExecutor._run_command on a fixed set of harmless commands
+    transcribe       Whisper on the command clips, synthetic stand-ins when none were recorded
+
+Results are written as JSON. Passing an earlier result with --compare prints
+the change per stage and exits with status 1 when a stage's median got
+slower by more than --tolerance.
+
+Run from ceres-voice-module:
+    python benchmarks/bench_pipeline.py --output results.json
+    python benchmarks/bench_pipeline.py --compare results.json --tolerance 0.25
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import argparse
+import platform
+import subprocess
+import numpy as np
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.configs.configs import Config
+from src.exceptions.exceptions import SecurityError
+from src.utils.prompt_generator import PromptGenerator
+from src.utils.response_cleaner import ResponseCleaner
+from src.utils.security import SecurityValidator
+from src.command_executor.command_detector import CommandDetector
+from src.command_executor.command_executor import ShellExecutor
+
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS = os.path.join(BENCH_DIR, 'data', 'gemini_responses.jsonl')
+CLIPS_DIR = os.path.join(BENCH_DIR, 'data', 'command_clips')
+
+EXECUTE_COMMANDS = [
+    'echo hello',
+    'true',
+    'pwd',
+    'date',
+    'ls -la | wc -l',
+]
+
+
+class ReplayAIService:
+    """Stands in for AIService, answers each prompt with the recorded Gemini response"""
+
+    model_name = 'replay'
+
+    def __init__(self, corpus: List[Dict], latency_ms: float = 0.0):
+        self._responses = {PromptGenerator.get_user_prompt(row['request']): row['response'] for row in corpus}
+        self.latency = latency_ms / 1000.0
+
+    def generate_content(self, prompt: str) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._responses[prompt]
+
+
+def summarize(samples: List[float]) -> Dict:
+    """Per-call statistics in microseconds"""
+    values = np.array(samples) * 1e6
+    return {
+        "calls": len(values),
+        "mean_us": round(float(values.mean()), 3),
+        "p50_us": round(float(np.percentile(values, 50)), 3),
+        "p95_us": round(float(np.percentile(values, 95)), 3),
+        "p99_us": round(float(np.percentile(values, 99)), 3),
+    }
+
+
+def time_stage(function: Callable, inputs: List, runs: int, before: Optional[Callable] = None) -> Dict:
+    """
+    Call function on every input, runs times over, after one untimed warm-up pass
+
+    Args:
+        function: Stage to time, called with one input
+        inputs: Inputs for one pass
+        runs: Timed passes
+        before: Called untimed before every timed call, e.g. to drop a cache
+    """
+    for item in inputs:
+        function(item)
+
+    samples = []
+    for _ in range(runs):
+        for item in inputs:
+            if before is not None:
+                before()
+            started = time.perf_counter()
+            function(item)
+            samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def validate(command: str) -> None:
+    try:
+        SECURITY.validate_command(command)
+    except SecurityError:
+        pass
+
+
+SECURITY = SecurityValidator()
+
+
+def synthesize_clip(text: str, sample_rate: int = 16000) -> np.ndarray:
+    """
+    Deterministic speech-like audio for a transcript, used when no recorded clips exist
+
+    Each word becomes a voiced burst: harmonics of a falling pitch shaped by
+    three vowel formants picked from the word, with a short pause after it.
+    Whisper will not read the words back, the clip only has the length and
+    spectral shape of a spoken command so the decode path can be timed.
+
+    Args:
+        text: Transcript the clip stands in for
+        sample_rate: Samples per second
+
+    Returns:
+        Mono float32 samples in [-1, 1]
+    """
+    vowels = [(730, 1090, 2440), (270, 2290, 3010), (300, 870, 2240), (530, 1840, 2480), (570, 840, 2410)]
+    rng = np.random.default_rng(zlib.crc32(text.encode('utf-8')))
+    silence = np.zeros(int(0.25 * sample_rate), dtype=np.float32)
+    parts = [silence]
+
+    for word in text.split():
+        duration = 0.12 + 0.06 * len(word)
+        t = np.arange(int(duration * sample_rate)) / sample_rate
+        pitch = 140.0 - 30.0 * t / duration
+        phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+        formants = vowels[zlib.crc32(word.encode('utf-8')) % len(vowels)]
+
+        burst = np.zeros(len(t))
+        for harmonic in range(1, 4000 // 140):
+            frequency = harmonic * pitch.mean()
+            gain = sum(np.exp(-((frequency - formant) / 120.0) ** 2) for formant in formants)
+            burst += gain * np.sin(harmonic * phase)
+        burst *= np.sin(np.pi * t / duration) ** 0.5
+        parts.append(burst.astype(np.float32))
+        parts.append(np.zeros(int(0.08 * sample_rate), dtype=np.float32))
+
+    parts.append(silence)
+    audio = np.concatenate(parts)
+    audio = 0.3 * audio / (np.abs(audio).max() or 1.0)
+    audio += rng.normal(0, 0.002, len(audio)).astype(np.float32)
+    return audio.astype(np.float32)
+
+
+def bench_transcribe(model_name: Optional[str]) -> Dict:
+    """Whisper latency per clip through the server's batched decode path"""
+    manifest = os.path.join(CLIPS_DIR, 'manifest.jsonl')
+    with open(manifest) as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+
+    import whisper
+    from src.speech.model_registry import load_whisper_model
+    from src.speech.transcription_scheduler import TranscriptionScheduler
+
+    # Recorded or make_command_clips.py clips when present, otherwise synthetic ones so the stage always runs
+    recorded = all(os.path.exists(os.path.join(CLIPS_DIR, entry['file'])) for entry in entries)
+    if recorded:
+        clips = [whisper.load_audio(os.path.join(CLIPS_DIR, entry['file'])) for entry in entries]
+    else:
+        clips = [synthesize_clip(entry['text'], whisper.audio.SAMPLE_RATE) for entry in entries]
+
+    scheduler = TranscriptionScheduler(load_whisper_model(model_name))
+    result = time_stage(lambda clip: scheduler._transcribe_batch([clip]), clips, 1)
+    result["model"] = model_name or Config.WHISPER_MODEL
+    result["profile"] = scheduler.profile["name"]
+    result["clips"] = "recorded" if recorded else "synthetic"
+    return result
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> Dict:
+    with open(CORPUS) as f:
+        corpus = [json.loads(line) for line in f if line.strip()]
+
+    requests = [row['request'] for row in corpus]
+    responses = [row['response'] for row in corpus]
+    ai_service = ReplayAIService(corpus, args.llm_latency_ms)
+    prompts = [PromptGenerator.get_user_prompt(request) for request in requests]
+    cleaned = [ResponseCleaner.sanitize_response(response) for response in responses]
+    pairs = list(zip(cleaned, requests))
+
+    def hot_path(request: str) -> None:
+        command = ResponseCleaner.sanitize_response(ai_service.generate_content(PromptGenerator.get_user_prompt(request)))
+        if CommandDetector.detect_command_type(command, request) == 'shell':
+            validate(command)
+
+    stages = {
+        "prompt_user": time_stage(PromptGenerator.get_user_prompt, requests, args.runs),
+        "prompt_enhanced": time_stage(PromptGenerator.get_enhanced_prompt, requests, args.runs),
+        "generate": time_stage(ai_service.generate_content, prompts, args.runs if not args.llm_latency_ms else 1),
+        "clean": time_stage(ResponseCleaner.sanitize_response, responses, args.runs),
+        "detect": time_stage(lambda pair: CommandDetector.detect_command_type(*pair), pairs, args.runs),
+        # The corpus repeats every pass, without dropping the verdict cache only the first pass would miss it
+        "validate": time_stage(validate, cleaned, args.runs, before=SECURITY.policy.clear),
+        "validate_cached": time_stage(validate, cleaned, args.runs),
+        "hot_path": time_stage(hot_path, requests, args.runs if not args.llm_latency_ms else 1,
+                               before=SECURITY.policy.clear),
+    }
+
+    if not args.skip_execute:
+        executor = ShellExecutor()
+        stages["execute"] = time_stage(executor._run_command, EXECUTE_COMMANDS, args.execute_runs)
+        if executor.shell_pool is not None:
+            executor.shell_pool.close()
+
+    if not args.skip_whisper:
+        stages["transcribe"] = bench_transcribe(args.whisper_model)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "shell_pool": Config.SHELL_POOL_ENABLED,
+            "llm_latency_ms": args.llm_latency_ms,
+        },
+        "stages": stages,
+    }
+
+
+def compare(result: Dict, baseline: Dict, tolerance: float) -> bool:
+    """Print the median change per stage, True if none regressed beyond tolerance"""
+    ok = True
+    print(f"\ncompared with {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')})")
+    for stage, current in result["stages"].items():
+        previous = baseline["stages"].get(stage)
+        if not previous or "p50_us" not in previous or "p50_us" not in current:
+            continue
+        if previous.get("clips") != current.get("clips"):
+            # Recorded and synthetic clips do not time the same decode
+            print(f"{stage:<16} not compared, {previous.get('clips')} clips before and {current.get('clips')} now")
+            continue
+        change = current["p50_us"] / previous["p50_us"] - 1 if previous["p50_us"] else 0.0
+        regressed = change > tolerance
+        ok = ok and not regressed
+        print(f"{stage:<16} {previous['p50_us']:>11.1f} -> {current['p50_us']:>11.1f} us  {change * 100:+7.1f}%"
+              f"{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=200, help="Passes over the corpus per in-process stage")
+    parser.add_argument('--execute-runs', type=int, default=20, help="Passes over the shell commands")
+    parser.add_argument('--llm-latency-ms', type=float, default=0.0, help="Delay added to each replayed Gemini call")
+    parser.add_argument('--whisper-model', help="Whisper model for the transcribe stage, defaults to the configured one")
+    parser.add_argument('--skip-execute', action='store_true')
+    parser.add_argument('--skip-whisper', action='store_true')
+    parser.add_argument('--output', help="Write the JSON result to this file")
+    parser.add_argument('--compare', help="Earlier JSON result to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed median slowdown per stage, 0.2 is 20%%")
+    args = parser.parse_args()
+
+    result = run(args)
+
+    for stage, stats in result["stages"].items():
+        if "skipped" in stats:
+            print(f"{stage:<16} skipped: {stats['skipped']}")
+            continue
+        print(f"{stage:<16} p50 {stats['p50_us']:>11.1f} us  p95 {stats['p95_us']:>11.1f} us  "
+              f"p99 {stats['p99_us']:>11.1f} us  ({stats['calls']} calls)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"\nwrote {args.output}")
+    else:
+        print(json.dumps(result))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(result, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark ResponseCleaner on a corpus of Gemini responses.
+
+Checks that the streaming cleaner, fed whole or in chunks, returns exactly
+what the previous cleaner did, compares their cost, and replays each response in small chunks to show
+how much of it has to arrive before the command can be handed off.
+
+Run from ceres-voice-module:
+    python benchmarks/bench_response_cleaner.py --runs 2000
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.response_cleaner import ResponseCleaner, StreamingCleaner
+
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'gemini_responses.jsonl')
+
+
+def legacy_sanitize(response_text: str) -> str:
+    """The cleaner used before StreamingCleaner, kept for comparison"""
+    text = response_text.strip()
+    if not text:
+        return ""
+
+    if '```' in text:
+        match = re.search(r'```(?:[\w]*\n)?(.*?)```', text, re.DOTALL)
+        if match:
+            text = match.group(1).strip()
+
+    osascript_match = re.match(r"^\s*osascript\s+-e\s+['\"](.+)['\"]\s*$", text)
+    if osascript_match:
+        text = osascript_match.group(1).strip()
+
+    first_line = text.split('\n', 1)[0].lower().strip()
+    if first_line in ['bash', 'sh', 'zsh', 'applescript', 'python', 'shell', 'javascript', 'js']:
+        lines = text.split('\n', 1)
+        if len(lines) > 1:
+            text = lines[1]
+
+    cleaned_lines = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if stripped.startswith('#') and 'applescript' not in stripped.lower():
+            continue
+        if stripped.startswith('--'):
+            if not any(keyword in stripped.lower() for keyword in ['tell', 'end', 'set', 'on', 'try', 'error']):
+                continue
+        cleaned_lines.append(line)
+    return '\n'.join(cleaned_lines).strip()
+
+
+def load_corpus(path: str):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line)['response'] for line in f if line.strip()]
+
+
+def per_call_us(clean, responses, runs: int) -> float:
+    started = time.perf_counter()
+    for i in range(runs):
+        clean(responses[i % len(responses)])
+    return (time.perf_counter() - started) / runs * 1e6
+
+
+def replay(response: str, chunk_size: int) -> str:
+    """Clean a response fed in chunks, as it arrives from a stream"""
+    cleaner = StreamingCleaner()
+    for start in range(0, len(response), chunk_size):
+        cleaner.feed(response[start:start + chunk_size])
+    return cleaner.finish()
+
+
+def handoff_fraction(response: str, chunk_size: int) -> float:
+    """Share of the response received before the command was available"""
+    cleaner = StreamingCleaner()
+    for start in range(0, len(response), chunk_size):
+        if cleaner.feed(response[start:start + chunk_size]) is not None:
+            return min(start + chunk_size, len(response)) / len(response)
+    cleaner.finish()
+    return 1.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=2000)
+    parser.add_argument('--chunk-size', type=int, default=16, help='Characters per simulated stream chunk')
+    parser.add_argument('--corpus', default=CORPUS)
+    args = parser.parse_args()
+
+    responses = load_corpus(args.corpus)
+
+    mismatches = [
+        r for r in responses
+        if not legacy_sanitize(r) == ResponseCleaner.sanitize_response(r) == replay(r, args.chunk_size)
+    ]
+    print(f"corpus: {len(responses)} responses, {len(mismatches)} differ from the previous cleaner")
+
+    print(f"legacy     {per_call_us(legacy_sanitize, responses, args.runs):8.2f} us/response")
+    print(f"streaming  {per_call_us(ResponseCleaner.sanitize_response, responses, args.runs):8.2f} us/response")
+
+    fractions = [handoff_fraction(r, args.chunk_size) for r in responses]
+    early = sum(1 for fraction in fractions if fraction < 1.0)
+    print(
+        f"hand-off: {early}/{len(responses)} responses before the stream ended, "
+        f"mean {statistics.mean(fractions) * 100:.1f}% of the text received"
+    )
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
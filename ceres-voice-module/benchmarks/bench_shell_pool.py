@@ -0,0 +1,86 @@
+"""
+Compare one subprocess per command with the persistent shell worker pool.
+
+Fails first if a background job's output or a variable leaks between pool commands.
+
+Run from ceres-voice-module:
+    python benchmarks/bench_shell_pool.py --runs 500
+"""
+import os
+import sys
+import time
+import shlex
+import argparse
+import statistics
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.command_executor.shell_pool import ShellWorkerPool
+
+
+COMMANDS = [
+    'echo hello',
+    'date',
+    'ls -la',
+    'uname -a',
+    'ps aux | head -5',
+    'df -h | tail -n +2 | wc -l',
+]
+
+
+def run_subprocess(command: str, cwd: str) -> subprocess.CompletedProcess:
+    """Same spawning logic ShellExecutor uses without the pool"""
+    if any(char in command for char in ['|', '&&', '||', ';', '>', '<', '`', '$(']):
+        return subprocess.run(command, shell=True, capture_output=True, text=True, timeout=30, cwd=cwd)
+    return subprocess.run(shlex.split(command), capture_output=True, text=True, timeout=30, cwd=cwd)
+
+
+def measure(label: str, runner, commands, runs: int) -> None:
+    timings = []
+    for i in range(runs):
+        command = commands[i % len(commands)]
+        started = time.perf_counter()
+        runner(command)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    timings.sort()
+    print(
+        f"{label:<40} runs={runs} mean={statistics.mean(timings):.2f}ms "
+        f"p50={timings[len(timings) // 2]:.2f}ms p95={timings[int(len(timings) * 0.95) - 1]:.2f}ms"
+    )
+
+
+def check_isolation(pool: ShellWorkerPool) -> None:
+    """A background job's late output must not end up in a later command's result"""
+    pool.run('(sleep 0.2; echo LEAKED; echo LEAKED >&2) &')
+    time.sleep(0.4)
+    result = pool.run('echo clean')
+    if 'LEAKED' in result.stdout + result.stderr:
+        raise SystemExit(f"background job output leaked into the next command: {result!r}")
+    pool.run('FOO=leaked')
+    if pool.run('echo ${FOO:-clean}').stdout.strip() != 'clean':
+        raise SystemExit("a variable assignment leaked into the next command")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=300)
+    args = parser.parse_args()
+
+    cwd = os.path.expanduser('~')
+    pool = ShellWorkerPool(size=1, cwd=cwd)
+    pool.prewarm()
+    try:
+        check_isolation(pool)
+        for command in COMMANDS + [COMMANDS]:
+            commands = command if isinstance(command, list) else [command]
+            name = 'mixed' if len(commands) > 1 else command
+            measure(f"subprocess {name}", lambda c: run_subprocess(c, cwd), commands, args.runs)
+            measure(f"shell pool {name}", lambda c: pool.run(c), commands, args.runs)
+        print(f"pool stats: {pool.stats()}")
+    finally:
+        pool.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Measure server import time, memory and time to live/ready.
+
+Each mode runs in fresh interpreters: one imports src.main and reports the
+import time, peak RSS and whether torch was imported, another starts uvicorn
+and polls /health/live and /health/ready.
+
+Run from ceres-voice-module:
+    python benchmarks/bench_startup.py --modes text speech --timeout 120
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+import urllib.error
+import urllib.request
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    'text': {'CERES_SPEECH': 'false'},
+    'speech': {'CERES_SPEECH': 'true', 'CERES_SPEECH_PRELOAD': 'true'},
+    'speech-lazy': {'CERES_SPEECH': 'true', 'CERES_SPEECH_PRELOAD': 'false'},
+}
+
+IMPORT_PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import src.main
+elapsed = time.perf_counter() - started
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    "import_s": elapsed,
+    "rss_mb": rss / (1024 * 1024 if sys.platform == "darwin" else 1024),
+    "torch": "torch" in sys.modules,
+}))
+"""
+
+
+def environment(mode: str) -> dict:
+    env = {**os.environ, **MODES[mode]}
+    # Agent startup only needs a key to be present, the benchmark never calls Gemini
+    env.setdefault('GEMINI_API_KEY', 'benchmark')
+    return env
+
+
+def measure_import(mode: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, '-c', IMPORT_PROBE], cwd=ROOT, env=environment(mode),
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def poll(url: str, deadline: float) -> bool:
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return True
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.05)
+    return False
+
+
+def measure_serve(mode: str, timeout: float) -> dict:
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.monotonic()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'src.main:app', '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning'],
+        cwd=ROOT, env=environment(mode), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = started + timeout
+        live = time.monotonic() - started if poll(f"{base}/health/live", deadline) else None
+        ready = time.monotonic() - started if poll(f"{base}/health/ready", deadline) else None
+
+        try:
+            with urllib.request.urlopen(f"{base}/health/ready", timeout=1) as response:
+                state = json.load(response)
+        except urllib.error.HTTPError as e:
+            state = json.load(e)
+        except Exception:
+            state = {}
+
+        return {"live_s": live, "ready_s": ready, "agent": state.get("agent"), "speech": state.get("speech", {}).get("state")}
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def seconds(value) -> str:
+    return f"{value:6.2f}s" if value is not None else "  never"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=list(MODES))
+    parser.add_argument('--timeout', type=float, default=120.0, help="Seconds to wait for readiness")
+    parser.add_argument('--skip-serve', action='store_true', help="Only measure the import")
+    args = parser.parse_args()
+
+    for mode in args.modes:
+        imported = measure_import(mode)
+        line = (
+            f"{mode:<12} import {imported['import_s']:5.2f}s  rss {imported['rss_mb']:6.1f} MB  "
+            f"torch {'yes' if imported['torch'] else 'no '}"
+        )
+        if not args.skip_serve:
+            served = measure_serve(mode, args.timeout)
+            line += (
+                f"  live {seconds(served['live_s'])}  ready {seconds(served['ready_s'])}"
+                f"  (agent {served['agent']}, speech {served['speech']})"
+            )
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Compare voice client VAD engines on the command clips.
+
+Each clip is surrounded by room noise, as an always-listening client hears
+it, and fed through every engine in 512 sample frames. Reports CPU time as a
+share of one core in real time, per-frame latency, how many frames the
+energy gate kept away from the model, and agreement with the first engine.
+
+Run from ceres-voice-module (needs ffmpeg to read the clips):
+    python benchmarks/bench_vad.py --engines silero-torch silero-onnx energy --idle-seconds 5
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.configs.configs import Config
+from src.exceptions.exceptions import ConfigurationError
+from src.speech.vad import VAD_ENGINES, EnergyGate, create_vad
+
+
+CLIPS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'command_clips')
+SAMPLE_RATE = Config.AUDIO_SAMPLE_RATE
+FRAME = Config.VAD_FRAME_SAMPLES
+
+
+def read_clip(path: str) -> np.ndarray:
+    """Decode any audio file to 16 kHz mono int16 with ffmpeg"""
+    output = subprocess.run(
+        ['ffmpeg', '-nostdin', '-loglevel', 'error', '-i', path, '-f', 's16le', '-ac', '1', '-ar', str(SAMPLE_RATE), '-'],
+        capture_output=True, check=True,
+    ).stdout
+    return np.frombuffer(output, dtype=np.int16)
+
+
+def listening_session(idle_seconds: float) -> np.ndarray:
+    """All clips back to back, each preceded by idle room noise"""
+    with open(os.path.join(CLIPS_DIR, 'manifest.jsonl')) as f:
+        files = [json.loads(line)['file'] for line in f if line.strip()]
+
+    missing = [name for name in files if not os.path.exists(os.path.join(CLIPS_DIR, name))]
+    if missing:
+        sys.exit(f"{len(missing)} clips missing from {CLIPS_DIR}, run benchmarks/make_command_clips.py first")
+
+    rng = np.random.default_rng(0)
+    parts = []
+    for name in files:
+        parts.append(rng.normal(0, 30, int(idle_seconds * SAMPLE_RATE)).astype(np.int16))
+        parts.append(read_clip(os.path.join(CLIPS_DIR, name)))
+    audio = np.concatenate(parts)
+    return audio[:len(audio) - len(audio) % FRAME]
+
+
+def measure(label: str, detector, frames: np.ndarray, seconds: float, reference=None):
+    detector.reset()
+    decisions = np.empty(len(frames), dtype=bool)
+    latencies = np.empty(len(frames))
+
+    cpu_started = time.process_time()
+    for i, frame in enumerate(frames):
+        started = time.perf_counter()
+        decisions[i] = detector.is_speech(frame)
+        latencies[i] = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+
+    line = (
+        f"{label:<20} cpu {cpu / seconds * 100:6.2f}% of a core  "
+        f"p50 {np.percentile(latencies, 50) * 1e6:7.1f} us  p99 {np.percentile(latencies, 99) * 1e6:7.1f} us  "
+        f"speech {decisions.mean() * 100:5.1f}%"
+    )
+    if isinstance(detector, EnergyGate):
+        line += f"  gated {detector.gated / len(frames) * 100:5.1f}%"
+    if reference is not None:
+        line += f"  agrees {np.mean(decisions == reference) * 100:5.1f}%"
+    print(line)
+    return decisions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--engines', nargs='+', default=list(VAD_ENGINES), choices=list(VAD_ENGINES))
+    parser.add_argument('--idle-seconds', type=float, default=5.0, help="Room noise before each clip")
+    args = parser.parse_args()
+
+    audio = listening_session(args.idle_seconds)
+    frames = audio.reshape(-1, FRAME)
+    seconds = len(audio) / SAMPLE_RATE
+    print(f"{seconds:.1f}s of audio, {len(frames)} frames")
+
+    reference = None
+    for engine in args.engines:
+        gates = [False] if engine == 'energy' else [False, True]
+        for gate in gates:
+            try:
+                detector = create_vad(engine, gate=gate)
+            except ConfigurationError as e:
+                print(f"{engine:<20} skipped: {e}")
+                break
+            label = f"{engine}{' +gate' if gate else ''}"
+            decisions = measure(label, detector, frames, seconds, reference)
+            if reference is None:
+                reference = decisions
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Compare Whisper models, int8 quantization and decoding profiles on the bundled command clips.
+
+Reports load time, per-clip latency through the server's batched decode path
+and word error rate against the manifest transcripts. Create the clips first
+with make_command_clips.py, or record your own under the same names.
+
+Run from ceres-voice-module:
+    python benchmarks/bench_whisper_models.py --models tiny.en base.en --quantize both --threads 4
+    python benchmarks/bench_whisper_models.py --models base.en --quantize off --profiles command-fast long-form
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import statistics
+
+import whisper
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.speech.model_registry import WHISPER_MODELS, load_whisper_model
+from src.speech.decoding_profiles import DECODING_PROFILES
+from src.speech.transcription_scheduler import TranscriptionScheduler
+
+
+CLIPS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'command_clips')
+
+
+def words(text: str):
+    return re.sub(r"[^a-z0-9' ]", ' ', text.lower()).split()
+
+
+def word_errors(reference, hypothesis) -> int:
+    """Word level edit distance"""
+    row = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        previous, row[0] = row[0], i
+        for j, hyp_word in enumerate(hypothesis, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (ref_word != hyp_word))
+    return row[-1]
+
+
+def load_clips():
+    manifest = os.path.join(CLIPS_DIR, 'manifest.jsonl')
+    with open(manifest) as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+
+    missing = [e['file'] for e in entries if not os.path.exists(os.path.join(CLIPS_DIR, e['file']))]
+    if missing:
+        sys.exit(f"{len(missing)} clips missing from {CLIPS_DIR}, run benchmarks/make_command_clips.py first")
+
+    return [(e['text'], whisper.load_audio(os.path.join(CLIPS_DIR, e['file']))) for e in entries]
+
+
+def measure(model, label: str, profile: str, clips) -> None:
+    scheduler = TranscriptionScheduler(model, profile=profile)
+    scheduler._transcribe_batch([clips[0][1]])
+
+    timings, errors, total_words = [], 0, 0
+    for text, audio in clips:
+        started = time.perf_counter()
+        hypothesis = scheduler._transcribe_batch([audio])[0]
+        timings.append((time.perf_counter() - started) * 1000)
+
+        reference = words(text)
+        errors += word_errors(reference, words(hypothesis))
+        total_words += len(reference)
+
+    timings.sort()
+    print(
+        f"{label:<14} {profile:<17} "
+        f"median {statistics.median(timings):7.1f} ms  "
+        f"p95 {timings[int(len(timings) * 0.95) - 1]:7.1f} ms  "
+        f"WER {errors / total_words * 100:5.1f}%"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--models', nargs='+', default=list(WHISPER_MODELS), choices=list(WHISPER_MODELS))
+    parser.add_argument('--quantize', choices=['off', 'on', 'both'], default='both')
+    parser.add_argument('--threads', type=int, default=0, help="Torch threads, 0 keeps torch's default")
+    parser.add_argument('--profiles', nargs='+', default=['command-fast'], choices=list(DECODING_PROFILES))
+    args = parser.parse_args()
+
+    clips = load_clips()
+    variants = {'off': [False], 'on': [True], 'both': [False, True]}[args.quantize]
+    print(f"{len(clips)} clips")
+
+    for name in args.models:
+        for quantize in variants:
+            started = time.perf_counter()
+            model = load_whisper_model(name, quantize=quantize, threads=args.threads)
+            label = f"{name}{' int8' if quantize else ''}"
+            print(f"{label} loaded in {time.perf_counter() - started:.2f}s")
+
+            for profile in args.profiles:
+                measure(model, label, profile, clips)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Synthesize the command clips used by bench_whisper_models.py.
+
+Speaks every transcript in data/command_clips/manifest.jsonl with the system
+voice through pyttsx3. Recorded clips can be dropped in with the same file
+names instead, they give a more realistic accuracy figure.
+
+Run from ceres-voice-module:
+    python benchmarks/make_command_clips.py --rate 180
+"""
+import os
+import json
+import argparse
+
+import pyttsx3
+
+
+CLIPS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'command_clips')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rate', type=int, default=180, help="Speaking rate in words per minute")
+    parser.add_argument('--voice', help="pyttsx3 voice id, defaults to the system voice")
+    parser.add_argument('--force', action='store_true', help="Overwrite clips that already exist")
+    args = parser.parse_args()
+
+    engine = pyttsx3.init()
+    engine.setProperty('rate', args.rate)
+    if args.voice:
+        engine.setProperty('voice', args.voice)
+
+    with open(os.path.join(CLIPS_DIR, 'manifest.jsonl')) as f:
+        clips = [json.loads(line) for line in f if line.strip()]
+
+    queued = 0
+    for clip in clips:
+        path = os.path.join(CLIPS_DIR, clip['file'])
+        if os.path.exists(path) and not args.force:
+            continue
+        engine.save_to_file(clip['text'], path)
+        queued += 1
+
+    engine.runAndWait()
+    print(f"Wrote {queued} clips to {CLIPS_DIR}")
+
+
+if __name__ == '__main__':
+    main()
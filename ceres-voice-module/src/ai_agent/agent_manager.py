@@ -0,0 +1,216 @@
+"""
+Agent lifecycle management module.
+
+Builds the AIAgent once, warms it up and shares it across all connections
+instead of constructing a fresh agent for every request.
+"""
+import asyncio
+import threading
+import time
+import logging
+from typing import Dict, Optional
+
+from src.configs.configs import Config
+from src.ai_agent.ai_agent import AIAgent
+from src.exceptions.exceptions import ConfigurationError
+
+
+logger = logging.getLogger(__name__)
+
+
+class AgentManager:
+    """Owns the shared AIAgent instance and tracks its health"""
+
+    STARTING = "starting"
+    WARMING = "warming"
+    READY = "ready"
+    FAILED = "failed"
+    CLOSED = "closed"
+
+    def __init__(self, api_key: Optional[str] = None):
+        """
+        Create the manager without building the agent yet
+
+        Args:
+            api_key: Optional API key forwarded to the AIAgent
+        """
+        self._api_key = api_key
+        self._agent: Optional[AIAgent] = None
+        self._lock = threading.Lock()
+        self._state = self.STARTING
+        self._error: Optional[str] = None
+        self._last_build = 0.0
+        self._build_seconds = 0.0
+        self._warmup_seconds = 0.0
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def start(self) -> None:
+        """
+        Build and warm up the agent. Safe to call more than once.
+        """
+        with self._lock:
+            if self._state not in (self.READY, self.CLOSED):
+                self._build_locked()
+
+    def close(self) -> None:
+        """
+        Release the agent's shell workers and cache database, no agent is built afterwards
+
+        Waits for a build in progress so its agent is released too
+        """
+        with self._lock:
+            agent, self._agent = self._agent, None
+            self._state = self.CLOSED
+        if agent is not None:
+            agent.close()
+
+    async def aget_agent(self) -> AIAgent:
+        """
+        Return the shared agent without blocking the event loop
+
+        Fails fast while a build is running instead of waiting for it. A
+        rebuild after a failed build runs on a worker thread.
+
+        Returns:
+            The shared AIAgent instance
+
+        Raises:
+            ConfigurationError: If the agent is not available
+        """
+        agent = self._agent
+        if agent is not None and self._state == self.READY:
+            return agent
+
+        if not self._lock.locked() and self._rebuild_due():
+            await asyncio.to_thread(self._rebuild_if_due)
+
+        agent = self._agent
+        if agent is None or self._state != self.READY:
+            raise ConfigurationError(f"AI agent unavailable: {self._error or self._state}")
+        return agent
+
+    def get_agent(self) -> AIAgent:
+        """
+        Return the shared agent, rebuilding it if a previous build failed
+
+        Blocks while a build is running, async code uses aget_agent()
+
+        Returns:
+            The shared AIAgent instance
+
+        Raises:
+            ConfigurationError: If the agent is not available
+        """
+        agent = self._agent
+        if agent is not None and self._state == self.READY:
+            return agent
+
+        with self._lock:
+            if self._rebuild_due():
+                self._build_locked()
+
+            if self._agent is None or self._state != self.READY:
+                raise ConfigurationError(f"AI agent unavailable: {self._error or self._state}")
+
+            return self._agent
+
+    def health(self) -> Dict:
+        """
+        Get the lifecycle state of the shared agent
+
+        Returns:
+            Dictionary with state, last error, build/warm-up timings, token usage, cache and shell pool counters
+        """
+        health = {
+            "state": self._state,
+            "error": self._error,
+            "build_seconds": round(self._build_seconds, 4),
+            "warmup_seconds": round(self._warmup_seconds, 4),
+        }
+
+        agent = self._agent
+        if agent is not None:
+            health["ai_usage"] = agent.ai_service.get_usage_report()
+        if agent is not None and agent.command_cache is not None:
+            health["command_cache"] = agent.command_cache.stats()
+        if agent is not None and agent.semantic_cache is not None:
+            health["semantic_cache"] = agent.semantic_cache.stats()
+        if agent is not None and agent.executor.shell_executor.shell_pool is not None:
+            health["shell_pool"] = agent.executor.shell_executor.shell_pool.stats()
+
+        return health
+
+    def _rebuild_due(self) -> bool:
+        if self._state in (self.READY, self.CLOSED):
+            return False
+        return time.monotonic() - self._last_build >= Config.AGENT_REBUILD_INTERVAL
+
+    def _rebuild_if_due(self) -> None:
+        """Rebuild unless another build holds the lock, its result is used instead"""
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if self._rebuild_due():
+                self._build_locked()
+        finally:
+            self._lock.release()
+
+    def _build_locked(self) -> None:
+        """Build and warm up the agent, caller must hold the lock"""
+        self._last_build = time.monotonic()
+        self._state = self.STARTING
+        self._error = None
+
+        started = time.perf_counter()
+        agent = AIAgent(self._api_key)
+        self._build_seconds = time.perf_counter() - started
+
+        if agent.init_error is not None:
+            agent.close()
+            self._agent = None
+            self._state = self.FAILED
+            self._error = str(agent.init_error)
+            logger.error(f"AI agent initialization failed: {self._error}")
+            return
+
+        self._state = self.WARMING
+        started = time.perf_counter()
+        try:
+            self._warm_up(agent)
+        except Exception as e:
+            agent.close()
+            self._agent = None
+            self._state = self.FAILED
+            self._error = f"Warm-up failed: {e}"
+            logger.error(self._error)
+            return
+        self._warmup_seconds = time.perf_counter() - started
+
+        self._agent = agent
+        self._state = self.READY
+        logger.info(
+            f"AI agent ready (build {self._build_seconds:.3f}s, warm-up {self._warmup_seconds:.3f}s)"
+        )
+
+    @staticmethod
+    def _warm_up(agent: AIAgent) -> None:
+        """
+        Exercise the local hot path once so the first real request does not pay for it
+
+        Args:
+            agent: Freshly built agent
+        """
+        sample_request = "list files in my home directory"
+        agent.prompt_generator.get_user_prompt(sample_request)
+        command = agent.response_cleaner.sanitize_response("```bash\nls ~\n```")
+        agent.command_detector.detect_command_type(command, sample_request)
+        agent.executor.shell_executor.security_validator.validate_command(command)
+
+        if agent.executor.shell_executor.shell_pool is not None:
+            agent.executor.shell_executor.shell_pool.prewarm()
+
+        if Config.AGENT_WARMUP_PING and not agent.ai_service.test_connection():
+            raise ConfigurationError("AI service connection test failed")
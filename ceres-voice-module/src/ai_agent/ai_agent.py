@@ -5,19 +5,25 @@ This is Main Agent that orchestrates all components
 """
 Import Builtin libraries
 """
-from typing import Dict,Optional,Tuple
+import asyncio
+from typing import Awaitable,Callable,Dict,Optional,Tuple
 
 
 """
 Import the Derived Libraries
 """
-from src.exceptions.exceptions import AIServiceError
+from src.exceptions.exceptions import AIServiceError, CommandExecutionError
 from src.utils.ApiResponse import ApiResponse
 from src.ai_services.ai_service import AIService
 from src.command_executor.command_detector import CommandDetector
-from src.utils.response_cleaner import ResponseCleaner
+from src.utils.response_cleaner import ResponseCleaner, StreamingCleaner
 from src.command_executor.command_executor import CommandExecutor
 from src.utils.prompt_generator import PromptGenerator
+from src.cache.command_cache import CommandCache
+from src.cache.semantic_cache import SemanticCommandCache
+from src.ai_agent.intent_router import IntentRouter
+from src.configs.configs import Config
+from src.utils import metrics
 
 
 class AIAgent:
@@ -35,8 +41,10 @@ class AIAgent:
         Raises:
             ConfigurationError: If initialization fails
         """
+        self.init_error: Optional[Exception] = None
+
         try:
-            self.ai_service = AIService(api_key)
+            self.ai_service = AIService(api_key, system_instruction=PromptGenerator.get_system_instruction())
             print("Passed ai_service")
             self.command_detector = CommandDetector()
             print("Passed command_detector")
@@ -47,11 +55,37 @@ class AIAgent:
             print("Passed executor")
             self.prompt_generator = PromptGenerator()
             print("Passed prompt_generator")
+
+            self.intent_router = IntentRouter() if Config.INTENT_ROUTER_ENABLED else None
+            print("Passed intent_router")
+
+            self.command_cache = CommandCache() if Config.COMMAND_CACHE_ENABLED else None
+            print("Passed command_cache")
+
+            self.semantic_cache = SemanticCommandCache() if Config.SEMANTIC_CACHE_ENABLED else None
+            if self.semantic_cache is not None and self.command_cache is not None:
+                self.semantic_cache.load(self.command_cache)
+            print("Passed semantic_cache")
             
             print("App Initiated")
         except Exception as e:
+            self.init_error = e
             print("Failed Initiation")
 
+    def close(self) -> None:
+        """
+        Release the persistent shell workers and the command cache database
+
+        Safe on a partly initialized agent and when called more than once
+        """
+        executor = getattr(self, 'executor', None)
+        if executor is not None and executor.shell_executor.shell_pool is not None:
+            executor.shell_executor.shell_pool.close()
+
+        command_cache = getattr(self, 'command_cache', None)
+        if command_cache is not None:
+            command_cache.close()
+
     
 
     def execute_command(self,user_request:str)->Dict:
@@ -71,40 +105,224 @@ class AIAgent:
             # gets the use Prompt
             if not user_request.strip():
                 return  ApiResponse.error("Command Empty !")
-            
 
-            # Get the inhance Prompt
-            prompt = self.prompt_generator.get_enhanced_prompt(user_request)
 
+            # Router and caches first, the AI service only on a miss
+            with metrics.stage('lookup'):
+                resolved = self._resolve_locally(user_request)
 
-            # Generate the conent wiht Ai
-            try:
-                response_text = self.ai_service.generate_content(prompt)
-            except AIServiceError as e:
-                return ApiResponse.error("AI service error")
-            
-            # IF no response is generated
-            if not response_text:
-                return ApiResponse.error("No Command Generated from AI")
-            
-            #Clean Command and chekc for safety
-            clean_command = self.response_cleaner.sanitize_response(response_text)
-            
-            if not clean_command:
-                return ApiResponse.error("Invalid command generated")
-            
+            if resolved is None:
 
-            # Check for apple script or shell command
-            command_type = self.command_detector.detect_command_type(clean_command, user_request)
+                # Static instructions live on the model, only the request is sent
+                with metrics.stage('prompt'):
+                    prompt = self.prompt_generator.get_user_prompt(user_request)
+
+
+                # Generate the conent wiht Ai
+                try:
+                    with metrics.stage('llm'):
+                        response_text = self.ai_service.generate_content(prompt)
+                except AIServiceError as e:
+                    metrics.record_error('llm')
+                    return ApiResponse.error("AI service error")
 
-            if command_type == 'applescript':
-                clean_command = self.response_cleaner.enhance_applescript_command(clean_command, user_request)
+                resolved = self._prepare_generated(user_request, response_text)
 
             # Final Execution
+            clean_command, command_type = resolved
+            metrics.label(command_type=command_type)
             return self.executor.execute(clean_command, command_type)
+
+        except CommandExecutionError as e:
+            metrics.record_error('command')
+            return ApiResponse.error(str(e))
         
         except Exception as e:
+            metrics.record_error('unexpected')
             return ApiResponse.error("Unexpected Error while Executing")
+
+
+    async def aexecute_command(self, user_request: str,
+                               run_blocking: Optional[Callable[..., Awaitable]] = None,
+                               timeout: Optional[float] = None,
+                               on_progress: Optional[Callable[[str], Awaitable]] = None,
+                               on_output: Optional[Callable[[str, str], Awaitable]] = None) -> Dict:
+        """
+        Async variant of execute_command for use inside the event loop
+
+        The AI call is awaited on the async client. The cache lookups and
+        writes and the command execution run on a worker, so SQLite and the
+        semantic index never block the event loop. Cancelling the task
+        cancels the AI request.
+
+        Args:
+            user_request: Natural language request from user
+            run_blocking: Coroutine function running a blocking callable, defaults to asyncio.to_thread
+            timeout: Deadline for the AI call in seconds, defaults to Config.LLM_TIMEOUT
+            on_progress: Called with each generated chunk when Config.LLM_STREAMING is on
+            on_output: Called with each output line of shell commands when Config.SHELL_STREAMING is on
+
+        Returns:
+            Dictionary with execution results and messages
+        """
+        run_blocking = run_blocking or asyncio.to_thread
+
+        try:
+
+            if not user_request.strip():
+                return ApiResponse.error("Command Empty !")
+
+            with metrics.stage('lookup'):
+                resolved = await run_blocking(self._resolve_locally, user_request)
+
+            if resolved is None:
+                with metrics.stage('prompt'):
+                    prompt = self.prompt_generator.get_user_prompt(user_request)
+
+                try:
+                    with metrics.stage('llm'):
+                        if Config.LLM_STREAMING and on_progress is not None:
+                            response_text = await self._stream_response(prompt, timeout, on_progress)
+                        else:
+                            response_text = await self.ai_service.agenerate_content(prompt, timeout=timeout)
+                except AIServiceError as e:
+                    metrics.record_error('llm')
+                    return ApiResponse.error("AI service error")
+
+                resolved = await run_blocking(self._prepare_generated, user_request, response_text)
+
+            clean_command, command_type = resolved
+            metrics.label(command_type=command_type)
+
+            # Streamed shell commands run as asyncio subprocesses, not on a worker
+            if Config.SHELL_STREAMING and on_output is not None and command_type == 'shell':
+                return await self.executor.shell_executor.aexecute_streaming(clean_command, on_output)
+
+            return await run_blocking(self.executor.execute, clean_command, command_type)
+
+        except CommandExecutionError as e:
+            metrics.record_error('command')
+            return ApiResponse.error(str(e))
+
+        except Exception as e:
+            metrics.record_error('unexpected')
+            return ApiResponse.error("Unexpected Error while Executing")
+
+
+    async def _stream_response(self, prompt: str, timeout: Optional[float],
+                               on_progress: Callable[[str], Awaitable]) -> str:
+        """
+        Stream the AI response to on_progress, stopping as soon as the command is complete
+
+        Args:
+            prompt: Prompt for the AI service
+            timeout: Deadline for the whole stream
+            on_progress: Called with each chunk as it arrives
+
+        Returns:
+            Generated text received so far
+        """
+        parts = []
+        cleaner = StreamingCleaner()
+        stream = self.ai_service.astream_content(prompt, timeout=timeout)
+        try:
+            async for chunk in stream:
+                parts.append(chunk)
+                await on_progress(chunk)
+
+                # A closed code block is a complete command, no need to wait for the rest
+                if cleaner.feed(chunk) is not None:
+                    break
+        finally:
+            await stream.aclose()
+
+        return ''.join(parts).strip()
+
+
+    def _cache_key(self, user_request: str) -> str:
+        return CommandCache.make_key(user_request, PromptGenerator.PROMPT_VERSION, self.ai_service.model_name)
+
+
+    def _resolve_locally(self, user_request: str) -> Optional[Tuple[str, str]]:
+        """
+        Resolve a request without the AI service
+
+        Args:
+            user_request: Natural language request from user
+
+        Returns:
+            (command, command_type) from the intent router or caches, None on a miss
+        """
+
+        # Common requests are resolved locally without the AI service
+        if self.intent_router is not None:
+            route = self.intent_router.route(user_request)
+            if route is not None:
+                metrics.label(cache='router')
+                return route["command"], route["command_type"]
+
+
+        # Repeated requests skip the AI service entirely
+        if self.command_cache is not None:
+            cached = self.command_cache.get(self._cache_key(user_request))
+            if cached is not None:
+                metrics.label(cache='exact')
+                return cached
+
+        # Paraphrases of earlier requests reuse their command too
+        if self.semantic_cache is not None:
+            similar = self.semantic_cache.lookup(user_request)
+            if similar is not None:
+                clean_command, command_type, _ = similar
+                if self.command_cache is not None:
+                    self.command_cache.put(self._cache_key(user_request), user_request, clean_command, command_type)
+                metrics.label(cache='semantic')
+                return clean_command, command_type
+
+        metrics.label(cache='miss')
+        return None
+
+
+    def _prepare_generated(self, user_request: str, response_text: str) -> Tuple[str, str]:
+        """
+        Turn raw AI output into an executable command and cache it
+
+        Args:
+            user_request: Natural language request from user
+            response_text: Raw response from the AI service
+
+        Returns:
+            (command, command_type)
+
+        Raises:
+            CommandExecutionError: If no usable command was generated
+        """
+
+        # IF no response is generated
+        if not response_text:
+            raise CommandExecutionError("No Command Generated from AI")
+
+        #Clean Command and chekc for safety
+        with metrics.stage('clean'):
+            clean_command = self.response_cleaner.sanitize_response(response_text)
+
+        if not clean_command:
+            raise CommandExecutionError("Invalid command generated")
+
+
+        # Check for apple script or shell command
+        with metrics.stage('detect'):
+            command_type = self.command_detector.detect_command_type(clean_command, user_request)
+
+        if command_type == 'applescript':
+            clean_command = self.response_cleaner.enhance_applescript_command(clean_command, user_request)
+
+        if self.command_cache is not None:
+            self.command_cache.put(self._cache_key(user_request), user_request, clean_command, command_type)
+        if self.semantic_cache is not None:
+            self.semantic_cache.add(user_request, clean_command, command_type)
+
+        return clean_command, command_type
         
 
     
@@ -0,0 +1,258 @@
+"""
+Bounded worker pool for running agent commands off the event loop.
+"""
+import asyncio
+import threading
+import contextvars
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Awaitable, Callable, Dict, Optional
+
+from src.configs.configs import Config
+from src.ai_agent.ai_agent import AIAgent
+from src.ai_agent.agent_manager import AgentManager
+from src.exceptions.exceptions import ConfigurationError, ServerBusyError
+
+
+"""
+Process worker state, only used when the pool runs in 'process' mode
+"""
+_worker_agent: Optional[AIAgent] = None
+
+
+def _init_worker(api_key: Optional[str]) -> None:
+    """Build one agent per worker process"""
+    global _worker_agent
+    _worker_agent = AIAgent(api_key)
+
+
+def _execute_in_worker(user_request: str) -> Dict:
+    """Run a command with the agent owned by this worker process"""
+    if _worker_agent is None or _worker_agent.init_error is not None:
+        raise ConfigurationError("AI agent unavailable in worker process")
+    return _worker_agent.execute_command(user_request)
+
+
+class _AdmissionSlot:
+    """One admitted request, released once the request and all of its worker jobs have finished"""
+
+    def __init__(self, release: Callable[[], None]):
+        self._release = release
+        self._lock = threading.Lock()
+        self._jobs = 0
+        self._finished = False
+
+    def hold(self, future: Future) -> None:
+        """Keep the slot until this worker job is done, even if the request is cancelled first"""
+        with self._lock:
+            self._jobs += 1
+        future.add_done_callback(self._job_done)
+
+    def finish(self) -> None:
+        with self._lock:
+            self._finished = True
+            release = self._jobs == 0
+        if release:
+            self._release()
+
+    def _job_done(self, _: Future) -> None:
+        with self._lock:
+            self._jobs -= 1
+            release = self._finished and self._jobs == 0
+        if release:
+            self._release()
+
+
+class ExecutionPool:
+    """Runs blocking agent work on a thread or process pool with a bounded queue"""
+
+    def __init__(self, agent_manager: AgentManager,
+                 max_workers: Optional[int] = None,
+                 max_queue: Optional[int] = None,
+                 kind: Optional[str] = None,
+                 api_key: Optional[str] = None):
+        """
+        Configure the pool, workers are created by start()
+
+        Args:
+            agent_manager: Manager providing the shared agent in thread mode
+            max_workers: Number of workers, defaults to Config.EXECUTION_WORKERS
+            max_queue: Requests allowed to wait for a worker, defaults to Config.EXECUTION_QUEUE_SIZE
+            kind: 'thread' or 'process', defaults to Config.EXECUTION_POOL_KIND
+            api_key: Optional API key for agents built in worker processes
+
+        Raises:
+            ConfigurationError: If the pool kind is unknown
+        """
+        self.agent_manager = agent_manager
+        self.max_workers = max_workers or Config.EXECUTION_WORKERS
+        self.max_queue = Config.EXECUTION_QUEUE_SIZE if max_queue is None else max_queue
+        self.kind = (kind or Config.EXECUTION_POOL_KIND).lower()
+        self._api_key = api_key
+
+        if self.kind not in ('thread', 'process'):
+            raise ConfigurationError(f"Unknown execution pool kind: {self.kind}")
+
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of requests running or waiting at once"""
+        return self.max_workers + self.max_queue
+
+    def start(self) -> None:
+        """Create the underlying executor"""
+        if self._executor is not None:
+            return
+
+        if self.kind == 'process':
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(self._api_key,)
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="ceres-exec"
+            )
+
+    def shutdown(self) -> None:
+        """Stop accepting work and release the workers"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def execute_command(self, user_request: str, timeout: Optional[float] = None,
+                              on_progress: Optional[Callable[[str], Awaitable]] = None,
+                              on_output: Optional[Callable[[str, str], Awaitable]] = None) -> Dict:
+        """
+        Run an agent command without blocking the event loop
+
+        In thread mode the AI call is awaited on the shared agent's async
+        client and only the command execution occupies a worker. In process
+        mode the whole command runs in a worker process.
+
+        Args:
+            user_request: Natural language request from user
+            timeout: Deadline for the AI call in seconds, defaults to Config.LLM_TIMEOUT
+            on_progress: Receives generated chunks in streaming mode (thread mode only)
+            on_output: Receives shell output lines in streaming mode (thread mode only)
+
+        Returns:
+            Dictionary with execution results and messages
+
+        Raises:
+            ServerBusyError: If the queue is full
+        """
+        if self.kind == 'process':
+            return await self._submit(_execute_in_worker, user_request)
+
+        self._admit()
+        slot = _AdmissionSlot(self._release)
+
+        async def run_blocking(fn: Callable, *args):
+            return await self._run_admitted(slot, fn, *args)
+
+        try:
+            agent = await self.agent_manager.aget_agent()
+            return await agent.aexecute_command(
+                user_request, run_blocking=run_blocking, timeout=timeout,
+                on_progress=on_progress, on_output=on_output
+            )
+        finally:
+            # A cancelled request keeps its slot while a worker still runs its command
+            slot.finish()
+
+    async def run(self, fn: Callable, *args):
+        """
+        Run any blocking callable on a worker under the same admission control
+
+        Args:
+            fn: Callable to run, must be picklable in process mode
+            *args: Arguments for the callable
+
+        Returns:
+            Whatever the callable returns
+
+        Raises:
+            ServerBusyError: If the queue is full
+        """
+        return await self._submit(fn, *args)
+
+    def stats(self) -> Dict:
+        """
+        Get current load of the pool
+
+        Returns:
+            Dictionary with pool kind, size, pending and rejected counts
+        """
+        return {
+            "kind": self.kind,
+            "workers": self.max_workers,
+            "queue_size": self.max_queue,
+            "pending": self._pending,
+            "rejected": self._rejected,
+        }
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._pending >= self.capacity:
+                self._rejected += 1
+                raise ServerBusyError(f"Execution queue is full ({self.capacity} requests in flight)")
+            self._pending += 1
+
+    async def _run_admitted(self, slot: _AdmissionSlot, fn: Callable, *args):
+        """Run a callable for a request that already holds a slot"""
+        if self._executor is None:
+            self.start()
+        # Carries the request's context over, stage timings recorded on the worker land in its timer
+        context = contextvars.copy_context()
+        future = self._executor.submit(context.run, fn, *args)
+        slot.hold(future)
+        return await asyncio.wrap_future(future)
+
+    async def _submit(self, fn: Callable, *args):
+        if self._executor is None:
+            self.start()
+
+        self._admit()
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+
+        # The slot is held until the worker finishes, even if the caller is cancelled
+        future.add_done_callback(lambda _: self._release())
+        return await asyncio.wrap_future(future)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+
+class ConnectionLimiter:
+    """Caps how many commands a single connection may have in flight"""
+
+    def __init__(self, limit: Optional[int] = None):
+        self.limit = limit or Config.EXECUTION_PER_CONNECTION_LIMIT
+        self.in_flight = 0
+
+    def try_acquire(self) -> bool:
+        """
+        Reserve a slot for a new command
+
+        Returns:
+            True if a slot was reserved, False if the connection is at its limit
+        """
+        if self.in_flight >= self.limit:
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self) -> None:
+        """Free a slot reserved by try_acquire"""
+        self.in_flight = max(0, self.in_flight - 1)
@@ -0,0 +1,177 @@
+"""
+Deterministic intent router for common requests.
+
+Matches the request against a compiled pattern table, extracts slots and
+emits the command directly, so opening apps, checking CPU/memory and
+killing processes or ports do not need a round trip to the AI service.
+"""
+import os
+import re
+import sys
+import shlex
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.configs.configs import Config
+from src.cache.command_cache import CommandCache
+
+
+# Politeness and wake words around the actual request
+FILLER_PREFIX = re.compile(r'^(?:(?:hey\s+)?ceres[,\s]+)?(?:(?:can|could|would)\s+you\s+)?(?:please\s+)?')
+FILLER_SUFFIX = re.compile(r'(?:\s+(?:please|for me|now))+$')
+
+APP = r'(?:the\s+)?(?P<app>[a-z][a-z .]*?)(?:\s+(?:app|application|browser))?'
+
+# Process names the server itself runs under, killing them would take Ceres down
+SERVER_PROCESS_NAMES = {'python', 'uvicorn', 'gunicorn', 'ceres', os.path.basename(sys.executable).lower()}
+
+
+class IntentRouter:
+    """Resolves high-confidence requests to commands without the AI service"""
+
+    def __init__(self):
+        """Compile the intent table"""
+        # (intent, pattern, confidence, builder)
+        self.rules: List[Tuple[str, re.Pattern, float, Callable[[Dict[str, str]], Optional[Tuple[str, str]]]]] = [
+            ('open_app', re.compile(rf'^(?:open|launch|start|run|fire up|activate)\s+{APP}$'), 0.95, self._open_app),
+            ('quit_app', re.compile(rf'^(?:close|quit|exit)\s+{APP}$'), 0.95, self._quit_app),
+            ('check_cpu', re.compile(
+                r"^(?:check|show|get|display|what(?:'s| is))\s+(?:me\s+)?(?:the\s+)?(?:current\s+)?"
+                r"(?:cpu|processor)(?:\s+(?:usage|load|utili[sz]ation))?$"
+            ), 0.95, self._check_cpu),
+            ('check_memory', re.compile(
+                r"^(?:check|show|get|display|what(?:'s| is))\s+(?:me\s+)?(?:the\s+)?(?:current\s+)?"
+                r"(?:memory|ram)(?:\s+(?:usage|load|utili[sz]ation))?$"
+            ), 0.95, self._check_memory),
+            ('kill_port', re.compile(
+                r'^(?:kill|free|stop|terminate)\s+(?:the\s+)?(?:process(?:es)?\s+(?:on|using|at)\s+)?port\s+(?P<port>\d{1,5})$'
+            ), 0.95, self._kill_port),
+            ('kill_process', re.compile(
+                r'^(?:kill|terminate|force quit)\s+(?:the\s+)?(?:process\s+)?(?P<name>[a-z0-9][\w.-]*)$'
+            ), 0.9, self._kill_process),
+        ]
+
+    def route(self, user_request: str) -> Optional[Dict]:
+        """
+        Try to resolve a request locally
+
+        Args:
+            user_request: Natural language request from user
+
+        Returns:
+            Dictionary with intent, command, command_type and confidence,
+            or None when the request should go to the AI service
+        """
+        text = self.normalize(user_request)
+        if not text:
+            return None
+
+        for intent, pattern, confidence, builder in self.rules:
+            match = pattern.match(text)
+            if match is None:
+                continue
+
+            built = builder(match.groupdict())
+            if built is None:
+                continue
+
+            if confidence < Config.INTENT_ROUTER_MIN_CONFIDENCE:
+                return None
+
+            command, command_type = built
+            return {
+                "intent": intent,
+                "command": command,
+                "command_type": command_type,
+                "confidence": confidence,
+            }
+
+        return None
+
+    @staticmethod
+    def normalize(user_request: str) -> str:
+        """Lowercase the request and strip wake words and politeness"""
+        text = CommandCache.normalize(user_request).rstrip(',')
+        text = FILLER_PREFIX.sub('', text)
+        return FILLER_SUFFIX.sub('', text).strip()
+
+    @staticmethod
+    def resolve_app(name: str) -> Optional[str]:
+        """
+        Find the bundle ID for a spoken app name
+
+        Args:
+            name: App name as said by the user
+
+        Returns:
+            Bundle ID from Config.APP_BUNDLE_IDS or None if unknown
+        """
+        name = name.strip().rstrip('.')
+        name = Config.APP_ALIASES.get(name, name)
+        return Config.APP_BUNDLE_IDS.get(name)
+
+    @staticmethod
+    def _tell_app(bundle_id: str, action: str) -> str:
+        return f'tell application id "{bundle_id}"\n    {action}\nend tell'
+
+    def _open_app(self, slots: Dict[str, str]) -> Optional[Tuple[str, str]]:
+        bundle_id = self.resolve_app(slots['app'])
+        if bundle_id is None:
+            return None
+        return self._tell_app(bundle_id, 'activate'), 'applescript'
+
+    def _quit_app(self, slots: Dict[str, str]) -> Optional[Tuple[str, str]]:
+        bundle_id = self.resolve_app(slots['app'])
+        if bundle_id is None:
+            return None
+        return self._tell_app(bundle_id, 'quit'), 'applescript'
+
+    @staticmethod
+    def _check_cpu(slots: Dict[str, str]) -> Tuple[str, str]:
+        return 'top -l 1 -n 0 | grep "CPU usage"', 'shell'
+
+    @staticmethod
+    def _check_memory(slots: Dict[str, str]) -> Tuple[str, str]:
+        return 'top -l 1 -n 0 | grep PhysMem', 'shell'
+
+    @staticmethod
+    def _kill_port(slots: Dict[str, str]) -> Optional[Tuple[str, str]]:
+        port = int(slots['port'])
+        if not 0 < port <= 65535:
+            return None
+        command = (
+            f'pids=$(lsof -ti tcp:{port}); '
+            f'if [ -n "$pids" ]; then kill -9 $pids && echo "Killed process on port {port}"; '
+            f'else echo "No process is using port {port}"; fi'
+        )
+        return command, 'shell'
+
+    def _kill_process(self, slots: Dict[str, str]) -> Optional[Tuple[str, str]]:
+        name = slots['name']
+
+        # Known apps are asked to quit instead of being killed
+        bundle_id = self.resolve_app(name)
+        if bundle_id is not None:
+            return self._tell_app(bundle_id, 'quit'), 'applescript'
+
+        if name in ('all', 'everything', 'it', 'that', 'this', 'port', 'process'):
+            return None
+
+        # "kill 1234" means a PID, pkill -x would look for a process named 1234
+        if name.isdigit():
+            pid = int(name)
+            if pid <= 1:
+                return self._refuse_kill(name, "it is the system's init process")
+            if pid in (os.getpid(), os.getppid()):
+                return self._refuse_kill(name, "Ceres itself runs as that process")
+            return f'kill {pid} && echo "Stopped process {pid}" || echo "No process with PID {pid}"', 'shell'
+
+        if name in SERVER_PROCESS_NAMES or name.startswith('python'):
+            return self._refuse_kill(name, "Ceres itself runs as that process")
+
+        quoted = shlex.quote(name)
+        return f'pkill -x {quoted} && echo "Stopped {name}" || echo "No process named {name}"', 'shell'
+
+    @staticmethod
+    def _refuse_kill(target: str, reason: str) -> Tuple[str, str]:
+        # Answered locally, the AI service would happily generate the same kill
+        return f'echo "Not stopping {target}, {reason}"', 'shell'
@@ -1,30 +1,47 @@
 """
 AI service integration module for Google Gemini API.
 """
-from typing import Optional
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, Optional
 from ..configs.configs import Config
-import google.generativeai as genai
 from src.exceptions.exceptions import AIServiceError, ConfigurationError 
+from src.utils import metrics
+
+
+logger = logging.getLogger(__name__)
+
+# Rough size of a Gemini token, for streams stopped before any usage was reported
+CHARS_PER_TOKEN = 4
 
 
 class AIService:
     """Handles AI service integration and content generation"""
 
-    def __init__(self, api_key:Optional[str]=None):
+    def __init__(self, api_key:Optional[str]=None, system_instruction:Optional[str]=None):
         """
         Initialize AI service with API configuration
         
         Args:
             api_key: Optional API key, will use environment variable if not provided
+            system_instruction: Static instructions registered once on the model
             
         Raises:
             ConfigurationError: If API key is not available or configuration fails
         """
 
         try:
+            # Imported here, the SDK takes about a second to import and the server builds the agent after binding
+            import google.generativeai as genai
+
             self.api_key = Config.get_api_key(api_key)
+            self.model_name = Config.GEMINI_MODEL
             genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel('gemini-2.0-flash')
+            self.model = genai.GenerativeModel(self.model_name, system_instruction=system_instruction)
+            self._plain_model = self.model if system_instruction is None else None
+
+            self.last_usage: Dict[str, int] = {}
+            self.usage_totals = {"calls": 0, "prompt_tokens": 0, "output_tokens": 0, "cached_tokens": 0}
         
         except ValueError as e:
             raise ConfigurationError(str(e))
@@ -50,6 +67,7 @@ class AIService:
                 raise AIServiceError("Empty prompt provided")
         
             response = self.model.generate_content(prompt)
+            self._record_usage(response)
 
             if not response or not response.text:
                 raise AIServiceError("Empty response from AI service")
@@ -61,6 +79,133 @@ class AIService:
         except Exception as e:
             raise AIServiceError(f"Failed to generate content: {str(e)}")
 
+    async def agenerate_content(self, prompt:str, timeout:Optional[float]=None) -> str:
+        """
+        Generate content without blocking the event loop
+
+        Uses the SDK's async client, which keeps one multiplexed connection
+        per process, so many calls can be in flight at once. Cancelling the
+        awaiting task cancels the request.
+
+        Args:
+            prompt: The prompt to send to the AI
+            timeout: Deadline in seconds, defaults to Config.LLM_TIMEOUT
+
+        Returns:
+            Generated content as string
+
+        Raises:
+            AIServiceError: If content generation fails or the deadline passes
+        """
+        if not prompt.strip():
+            raise AIServiceError("Empty prompt provided")
+
+        deadline = timeout or Config.LLM_TIMEOUT
+        try:
+            response = await asyncio.wait_for(
+                self.model.generate_content_async(prompt, request_options={"timeout": deadline}),
+                timeout=deadline
+            )
+            self._record_usage(response)
+
+            if not response or not response.text:
+                raise AIServiceError("Empty response from AI service")
+
+            return response.text.strip()
+
+        except asyncio.TimeoutError:
+            raise AIServiceError(f"AI service deadline exceeded ({deadline}s)")
+
+        except AIServiceError:
+            raise
+
+        except Exception as e:
+            raise AIServiceError(f"Failed to generate content: {str(e)}")
+
+    async def astream_content(self, prompt:str, timeout:Optional[float]=None) -> AsyncIterator[str]:
+        """
+        Stream generated text chunks as the model produces them
+
+        Closing the iterator early (for example once a complete command has
+        been received) stops the request. Token usage is recorded however the
+        stream ends, from the last chunk received.
+
+        Args:
+            prompt: The prompt to send to the AI
+            timeout: Deadline in seconds for the whole stream, defaults to Config.LLM_TIMEOUT
+
+        Yields:
+            Text chunks in generation order
+
+        Raises:
+            AIServiceError: If content generation fails or the deadline passes
+        """
+        if not prompt.strip():
+            raise AIServiceError("Empty prompt provided")
+
+        deadline = timeout or Config.LLM_TIMEOUT
+        loop = asyncio.get_running_loop()
+        expires = loop.time() + deadline
+
+        response = None
+        chunks = None
+        received = []
+        try:
+            response = await asyncio.wait_for(
+                self.model.generate_content_async(prompt, stream=True, request_options={"timeout": deadline}),
+                timeout=deadline
+            )
+
+            chunks = response.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=max(0.0, expires - loop.time()))
+                except StopAsyncIteration:
+                    break
+
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunks without text parts, e.g. the final finish-reason chunk
+                    text = ""
+
+                if text:
+                    received.append(text)
+                    yield text
+
+        except asyncio.TimeoutError:
+            raise AIServiceError(f"AI service deadline exceeded ({deadline}s)")
+
+        except Exception as e:
+            raise AIServiceError(f"Failed to stream content: {str(e)}")
+
+        finally:
+            # Also reached when the caller closes the stream early or the task is cancelled.
+            # The request is stopped first, the tokens generated up to then are billed all the same
+            await self._close_stream(response, chunks)
+            self._record_usage(response, prompt, ''.join(received))
+
+    @staticmethod
+    async def _close_stream(response, chunks) -> None:
+        """
+        Stop a streamed request, the SDK's chunk iterator does not end the underlying stream by itself
+
+        Args:
+            response: Streamed Gemini response, None if the request never got one
+            chunks: Iterator over the response's chunks, None if iteration never started
+        """
+        # The SDK keeps the transport's stream as _iterator, closing or cancelling it ends the HTTP/gRPC call
+        for iterator in (chunks, getattr(response, "_iterator", None)):
+            if iterator is None:
+                continue
+            try:
+                if hasattr(iterator, "aclose"):
+                    await iterator.aclose()
+                if hasattr(iterator, "cancel"):
+                    iterator.cancel()
+            except Exception as e:
+                logger.debug(f"Closing the Gemini stream failed: {e}")
+
     def test_connection(self) -> bool:
         """
         Test AI service connection
@@ -69,14 +214,65 @@ class AIService:
             True if connection is working, False otherwise
         """
         try:
+            # The command model would turn the test prompt into a command, use a plain one
+            if self._plain_model is None:
+                import google.generativeai as genai
+                self._plain_model = genai.GenerativeModel(self.model_name)
+
             test_prompt = "Respond with 'Connection successful' if you receive this message."
-            response = self.generate_content(test_prompt)
-            return "successful" in response.lower()
+            response = self._plain_model.generate_content(test_prompt)
+            return "successful" in response.text.lower()
             
         except Exception as e:
             #logger.error(f"AI service connection test failed: {e}")
             return False
     
+    def get_usage_report(self) -> Dict:
+        """
+        Get token usage of the last call and totals since startup
+
+        Returns:
+            Dictionary with last call and cumulative token counts
+        """
+        return {"last": dict(self.last_usage), "totals": dict(self.usage_totals)}
+
+    def _record_usage(self, response, prompt: Optional[str] = None, received: str = "") -> None:
+        """
+        Record the token counts Gemini reports for a response
+
+        Args:
+            response: Gemini response, a streamed one holds the usage of its last chunk, None if none arrived
+            prompt: Prompt sent, when given the counts are estimated if Gemini reported none yet
+            received: Text received so far, for the estimate
+        """
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None and prompt is None:
+            return
+        reported = usage is not None and (prompt is None or bool(getattr(usage, "prompt_token_count", 0)))
+
+        if reported:
+            self.last_usage = {
+                "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+                "output_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+                "cached_tokens": getattr(usage, "cached_content_token_count", 0) or 0,
+            }
+        else:
+            # Stopped before the first usage report, the system instruction is not counted
+            self.last_usage = {
+                "prompt_tokens": -(-len(prompt) // CHARS_PER_TOKEN),
+                "output_tokens": -(-len(received) // CHARS_PER_TOKEN),
+                "cached_tokens": 0,
+            }
+        self.usage_totals["calls"] += 1
+        for name, count in self.last_usage.items():
+            self.usage_totals[name] += count
+            metrics.LLM_TOKENS.inc(count, kind=name[:-len('_tokens')])
+
+        logger.info(
+            f"Gemini tokens{'' if reported else ' (estimated)'}: prompt={self.last_usage['prompt_tokens']} "
+            f"output={self.last_usage['output_tokens']} cached={self.last_usage['cached_tokens']}"
+        )
+    
     def get_model_info(self) -> dict:
         """
         Get information about the current AI model
@@ -85,7 +281,7 @@ class AIService:
             Dictionary with model information
         """
         return {
-            "model_name": "gemini-2.0-flash",
+            "model_name": self.model_name,
             "provider": "Google Generative AI",
             "api_key_configured": bool(self.api_key),
             "connection_status": self.test_connection()
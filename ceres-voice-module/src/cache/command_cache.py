@@ -0,0 +1,238 @@
+"""
+Two-tier cache mapping natural language requests to generated commands.
+
+An in-memory LRU sits in front of an SQLite table so repeated requests skip
+the AI service, and the cache survives server restarts.
+"""
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional, Tuple
+
+from src.configs.configs import Config
+
+
+class CommandCache:
+    """Caches cleaned commands and their detected type per normalized request"""
+
+    def __init__(self, path: Optional[str] = None,
+                 memory_size: Optional[int] = None,
+                 disk_size: Optional[int] = None,
+                 ttl: Optional[float] = None):
+        """
+        Open the cache, creating the SQLite file if needed
+
+        Args:
+            path: SQLite file path, defaults to Config.COMMAND_CACHE_PATH. Empty disables the disk tier
+            memory_size: Entries kept in memory, defaults to Config.COMMAND_CACHE_MEMORY_SIZE
+            disk_size: Entries kept on disk, defaults to Config.COMMAND_CACHE_DISK_SIZE
+            ttl: Seconds an entry stays valid, defaults to Config.COMMAND_CACHE_TTL
+        """
+        self.path = Config.COMMAND_CACHE_PATH if path is None else path
+        self.memory_size = memory_size or Config.COMMAND_CACHE_MEMORY_SIZE
+        self.disk_size = disk_size or Config.COMMAND_CACHE_DISK_SIZE
+        self.ttl = Config.COMMAND_CACHE_TTL if ttl is None else ttl
+
+        self._memory: "OrderedDict[str, Tuple[str, str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        if self.path:
+            try:
+                self._open_db()
+            except (OSError, sqlite3.Error) as e:
+                # Keep working with the memory tier only
+                print(f"Command cache disk tier disabled: {e}")
+                self._db = None
+
+    @staticmethod
+    def normalize(user_request: str) -> str:
+        """
+        Normalize a request so trivial differences share a cache entry
+
+        Args:
+            user_request: Natural language request from user
+
+        Returns:
+            Lowercased request with collapsed whitespace and no trailing punctuation
+        """
+        text = unicodedata.normalize('NFKC', user_request).lower()
+        text = re.sub(r'\s+', ' ', text).strip()
+        return text.rstrip('.!?').strip()
+
+    @classmethod
+    def make_key(cls, user_request: str, prompt_version: str, model_name: str) -> str:
+        """
+        Build the cache key for a request
+
+        Args:
+            user_request: Natural language request from user
+            prompt_version: Version of the prompt used to generate commands
+            model_name: Name of the AI model
+
+        Returns:
+            Hex digest identifying the request, prompt and model
+        """
+        raw = f"{prompt_version}\x00{model_name}\x00{cls.normalize(user_request)}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[str, str]]:
+        """
+        Look up a cached command
+
+        Args:
+            key: Key from make_key
+
+        Returns:
+            (command, command_type) or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self._is_fresh(entry[2], now):
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return entry[0], entry[1]
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT command, command_type, created_at FROM commands WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if self._is_fresh(row[2], now):
+                        self._db.execute("UPDATE commands SET last_used = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._remember(key, (row[0], row[1], row[2]))
+                        self._stats["disk_hits"] += 1
+                        return row[0], row[1]
+                    self._db.execute("DELETE FROM commands WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key: str, user_request: str, command: str, command_type: str) -> None:
+        """
+        Store a generated command
+
+        Args:
+            key: Key from make_key
+            user_request: Original request, kept for inspection and similarity lookups
+            command: Cleaned command ready for execution
+            command_type: 'applescript' or 'shell'
+        """
+        now = time.time()
+        with self._lock:
+            self._remember(key, (command, command_type, now))
+            self._stats["stores"] += 1
+
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO commands (key, request, command, command_type, created_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, self.normalize(user_request), command, command_type, now, now)
+                )
+                self._prune_disk_locked(now)
+                self._db.commit()
+
+    def invalidate(self, key: str) -> None:
+        """Remove one entry from both tiers"""
+        with self._lock:
+            self._memory.pop(key, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM commands WHERE key = ?", (key,))
+                self._db.commit()
+
+    def clear(self) -> None:
+        """Remove every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM commands")
+                self._db.commit()
+
+    def entries(self) -> Iterator[Tuple[str, str, str]]:
+        """
+        Iterate over fresh disk entries
+
+        Returns:
+            Iterator of (normalized request, command, command_type)
+        """
+        if self._db is None:
+            return iter(())
+
+        cutoff = time.time() - self.ttl if self.ttl else 0
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT request, command, command_type FROM commands WHERE created_at >= ? ORDER BY last_used",
+                (cutoff,)
+            ).fetchall()
+        return iter(rows)
+
+    def stats(self) -> Dict:
+        """
+        Get hit/miss counters
+
+        Returns:
+            Dictionary with counters, hit rate and tier sizes
+        """
+        with self._lock:
+            lookups = self._stats["memory_hits"] + self._stats["disk_hits"] + self._stats["misses"]
+            hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+            return {
+                **self._stats,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_enabled": self._db is not None,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _open_db(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._db = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS commands ("
+            "key TEXT PRIMARY KEY, request TEXT NOT NULL, command TEXT NOT NULL, "
+            "command_type TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS commands_last_used ON commands (last_used)")
+        self._db.commit()
+
+    def _is_fresh(self, created_at: float, now: float) -> bool:
+        return not self.ttl or now - created_at < self.ttl
+
+    def _remember(self, key: str, entry: Tuple[str, str, float]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _prune_disk_locked(self, now: float) -> None:
+        if self.ttl:
+            self._db.execute("DELETE FROM commands WHERE created_at < ?", (now - self.ttl,))
+
+        count = self._db.execute("SELECT COUNT(*) FROM commands").fetchone()[0]
+        if count > self.disk_size:
+            excess = count - self.disk_size
+            self._db.execute(
+                "DELETE FROM commands WHERE key IN (SELECT key FROM commands ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+            self._stats["evictions"] += excess
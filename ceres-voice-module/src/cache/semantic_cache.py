@@ -0,0 +1,299 @@
+"""
+Near-duplicate request cache using local vector similarity.
+
+Requests are canonicalized (verb synonyms, filler words, app aliases),
+embedded as hashed character n-gram vectors and searched with NumPy, either
+brute force or through an IVF index once the cache grows large. A match is
+only accepted when both requests reduce to the same canonical words in the
+same order: paraphrases are caught by the canonicalization, the vectors only
+find the candidates. Near spellings are never accepted, "project2" must not
+reuse the command for "project1" nor "feature-b" the one for "feature-a".
+"""
+import re
+import zlib
+import threading
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from src.configs.configs import Config
+from src.cache.command_cache import CommandCache
+
+
+# Words that do not change what a request means
+STOPWORDS = {
+    'a', 'an', 'the', 'please', 'my', 'me', 'for', 'can', 'could', 'would', 'you',
+    'i', 'want', 'to', 'up', 'now', 'just', 'quickly', 'hey', 'ceres', 'app',
+    'application', 'browser', 'program', 'usage', 'current', 'of', 'is', 'what',
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9@._/:~+-]+")
+
+
+class SemanticCommandCache:
+    """Finds a previously generated command for a paraphrased request"""
+
+    NGRAM_SIZES = (3, 4)
+    TOP_K = 5
+
+    def __init__(self, threshold: Optional[float] = None,
+                 dim: Optional[int] = None,
+                 max_entries: Optional[int] = None):
+        """
+        Create an empty index
+
+        Args:
+            threshold: Minimum cosine similarity for a hit, defaults to Config.SEMANTIC_CACHE_THRESHOLD
+            dim: Vector size, defaults to Config.SEMANTIC_CACHE_DIM
+            max_entries: Size limit before old entries are dropped, defaults to Config.SEMANTIC_CACHE_MAX_ENTRIES
+        """
+        self.threshold = threshold or Config.SEMANTIC_CACHE_THRESHOLD
+        self.dim = dim or Config.SEMANTIC_CACHE_DIM
+        self.max_entries = max_entries or Config.SEMANTIC_CACHE_MAX_ENTRIES
+
+        self._verb_lookup = {
+            phrase: verb for verb, phrases in Config.COMMAND_VERBS.items() for phrase in phrases
+        }
+        self._verb_pattern = re.compile(
+            r'\b(' + '|'.join(re.escape(p) for p in sorted(self._verb_lookup, key=len, reverse=True)) + r')\b'
+        )
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((1024, self.dim), dtype=np.float32)
+        self._entries: List[Tuple[str, str, str]] = []
+        self._count = 0
+
+        # IVF index over the first `covered` entries: (centroids, vectors, ids, offsets, covered)
+        self._index: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, int]] = None
+        self._rebuilding = False
+        self._generation = 0
+        self._stats = {"hits": 0, "misses": 0, "rejected": 0}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def canonicalize(self, user_request: str) -> str:
+        """
+        Reduce a request to its canonical wording
+
+        Args:
+            user_request: Natural language request from user
+
+        Returns:
+            Request with aliases and verb synonyms replaced and filler words removed
+        """
+        text = CommandCache.normalize(user_request)
+        for alias, name in Config.APP_ALIASES.items():
+            text = text.replace(alias, name)
+        text = self._verb_pattern.sub(lambda match: self._verb_lookup[match.group(1)], text)
+
+        tokens = [token.strip('.,!?') for token in TOKEN_PATTERN.findall(text)]
+        return ' '.join(token for token in tokens if token and token not in STOPWORDS)
+
+    def lookup(self, user_request: str) -> Optional[Tuple[str, str, float]]:
+        """
+        Find a cached command for a similar request
+
+        Args:
+            user_request: Natural language request from user
+
+        Returns:
+            (command, command_type, similarity) or None when nothing is close enough
+        """
+        canonical = self.canonicalize(user_request)
+        if not canonical or self._count == 0:
+            self._stats["misses"] += 1
+            return None
+
+        query = self._embed(canonical)
+        ids, scores = self._search(query)
+
+        for idx, score in zip(ids, scores):
+            if score < self.threshold:
+                break
+            cached_request, command, command_type = self._entries[idx]
+            if self._same_meaning(canonical, cached_request):
+                self._stats["hits"] += 1
+                return command, command_type, float(score)
+            self._stats["rejected"] += 1
+
+        self._stats["misses"] += 1
+        return None
+
+    def add(self, user_request: str, command: str, command_type: str) -> None:
+        """
+        Index a request and the command generated for it
+
+        Args:
+            user_request: Natural language request from user
+            command: Cleaned command ready for execution
+            command_type: 'applescript' or 'shell'
+        """
+        canonical = self.canonicalize(user_request)
+        if not canonical:
+            return
+
+        vector = self._embed(canonical)
+        with self._lock:
+            if self._count >= self.max_entries:
+                self._compact_locked()
+
+            if self._count == len(self._vectors):
+                grown = np.zeros((len(self._vectors) * 2, self.dim), dtype=np.float32)
+                grown[:self._count] = self._vectors[:self._count]
+                self._vectors = grown
+
+            self._vectors[self._count] = vector
+            self._entries.append((canonical, command, command_type))
+            self._count += 1
+
+        self._maybe_rebuild_index()
+
+    def load(self, cache: CommandCache) -> int:
+        """
+        Seed the index from the persistent exact-match cache
+
+        Args:
+            cache: Command cache whose disk entries are indexed
+
+        Returns:
+            Number of entries loaded
+        """
+        loaded = 0
+        self._rebuilding = True
+        try:
+            for request, command, command_type in cache.entries():
+                self.add(request, command, command_type)
+                loaded += 1
+        finally:
+            self._rebuilding = False
+
+        # Build the index once up front instead of repeatedly while loading
+        if self._count >= Config.SEMANTIC_CACHE_IVF_MIN_ENTRIES:
+            self._rebuilding = True
+            self._rebuild_index()
+        return loaded
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            "entries": self._count,
+            "ivf": self._index is not None,
+        }
+
+    def _embed(self, canonical: str) -> np.ndarray:
+        """Hashed character n-gram vector with sublinear term frequency, L2 normalized"""
+        counts: Dict[int, int] = {}
+        padded = f" {canonical} "
+        for n in self.NGRAM_SIZES:
+            for i in range(len(padded) - n + 1):
+                bucket = zlib.crc32(padded[i:i + n].encode('utf-8')) % self.dim
+                counts[bucket] = counts.get(bucket, 0) + 1
+        for word in canonical.split():
+            bucket = zlib.crc32(word.encode('utf-8')) % self.dim
+            counts[bucket] = counts.get(bucket, 0) + 2
+
+        vector = np.zeros(self.dim, dtype=np.float32)
+        buckets = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        vector[buckets] = 1.0 + np.log(values)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def _search(self, query: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the TOP_K best ids and scores, best first"""
+        count = self._count
+        vectors = self._vectors
+        index = self._index
+
+        id_parts = []
+        score_parts = []
+        covered = 0
+
+        if index is not None:
+            centroids, ivf_vectors, ivf_ids, offsets, covered = index
+            nprobe = min(Config.SEMANTIC_CACHE_NPROBE, len(centroids))
+            probes = np.argpartition(-(centroids @ query), nprobe - 1)[:nprobe]
+            for probe in probes:
+                start, end = offsets[probe], offsets[probe + 1]
+                if end > start:
+                    id_parts.append(ivf_ids[start:end])
+                    score_parts.append(ivf_vectors[start:end] @ query)
+
+        # Entries added since the index was built are searched brute force
+        if count > covered:
+            id_parts.append(np.arange(covered, count))
+            score_parts.append(vectors[covered:count] @ query)
+
+        if not id_parts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        ids = np.concatenate(id_parts)
+        scores = np.concatenate(score_parts)
+        k = min(self.TOP_K, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return ids[top], scores[top]
+
+    def _same_meaning(self, query: str, cached: str) -> bool:
+        """
+        Accept a match only when the canonical requests are word for word the same
+
+        A hit is run without the AI service, so a differing target, even one
+        letter or digit apart ("project1"/"project2", "report"/"reports"), or
+        swapped operands ("copy a to b"/"copy b to a") must be a miss.
+        """
+        return query.split() == cached.split()
+
+    def _maybe_rebuild_index(self) -> None:
+        """Rebuild the IVF index in the background once enough entries are not covered by it"""
+        if self._count < Config.SEMANTIC_CACHE_IVF_MIN_ENTRIES or self._rebuilding:
+            return
+        covered = self._index[4] if self._index is not None else 0
+        if self._count - covered < Config.SEMANTIC_CACHE_IVF_MIN_ENTRIES // 4:
+            return
+
+        self._rebuilding = True
+        threading.Thread(target=self._rebuild_index, name="ceres-semantic-ivf", daemon=True).start()
+
+    def _rebuild_index(self) -> None:
+        try:
+            with self._lock:
+                count = self._count
+                generation = self._generation
+                vectors = self._vectors[:count].copy()
+
+            nlist = max(1, int(np.sqrt(count)))
+            rng = np.random.default_rng(0)
+            sample = vectors[rng.choice(count, size=min(count, nlist * 32), replace=False)]
+            centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+
+            # Spherical k-means on a sample, then assign every vector
+            for _ in range(6):
+                assignment = np.argmax(sample @ centroids.T, axis=1)
+                for cluster in range(nlist):
+                    members = sample[assignment == cluster]
+                    if len(members):
+                        centroid = members.sum(axis=0)
+                        centroids[cluster] = centroid / (np.linalg.norm(centroid) or 1.0)
+
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+            order = np.argsort(assignment, kind='stable')
+            offsets = np.searchsorted(assignment[order], np.arange(nlist + 1))
+
+            with self._lock:
+                # A compaction while building shifted the ids, drop this index
+                if self._generation == generation:
+                    self._index = (centroids, vectors[order], order, offsets, count)
+        finally:
+            self._rebuilding = False
+
+    def _compact_locked(self) -> None:
+        """Drop the oldest quarter of entries, caller must hold the lock"""
+        keep = self.max_entries - self.max_entries // 4
+        drop = self._count - keep
+        self._vectors[:keep] = self._vectors[drop:self._count]
+        self._entries = self._entries[drop:]
+        self._count = keep
+        self._index = None
+        self._generation += 1
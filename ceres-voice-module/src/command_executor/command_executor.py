@@ -4,12 +4,18 @@ Command execution module for AppleScript and shell commands.
 import subprocess
 import tempfile
 import os
+import time
 import shlex
-from typing import Dict
+import signal
+import asyncio
+import codecs
+from typing import Awaitable, Callable, Dict, List
 from src.configs.configs import Config
 from src.utils.security import SecurityValidator
 from src.utils.response_cleaner import ResponseCleaner
+from src.utils import metrics
 from src.exceptions.exceptions import SecurityError
+from src.command_executor.shell_pool import ShellWorkerPool
 
 
 
@@ -44,12 +50,14 @@ class AppleScriptExecutor:
             
             try:
                 # Execute via osascript with timeout
-                result = subprocess.run(
-                    ['osascript', temp_path],
-                    capture_output=True,
-                    text=True,
-                    timeout=Config.COMMAND_TIMEOUT
-                )
+                metrics.SUBPROCESS_SPAWNS.inc(kind='osascript')
+                with metrics.stage('execute'):
+                    result = subprocess.run(
+                        ['osascript', temp_path],
+                        capture_output=True,
+                        text=True,
+                        timeout=Config.COMMAND_TIMEOUT
+                    )
                 
                 if result.returncode == 0:
                     output = result.stdout.strip() or "AppleScript executed successfully"
@@ -66,6 +74,7 @@ class AppleScriptExecutor:
                     pass
                     
         except subprocess.TimeoutExpired:
+            metrics.record_error('timeout')
             return {"messages": [{"text": f"AppleScript timed out ({Config.COMMAND_TIMEOUT}s limit)", "type": "bot"}]}
         except Exception as e:
             # logger.error(f"AppleScript execution error: {e}")
@@ -82,12 +91,34 @@ class AppleScriptExecutor:
         else:
             return {"messages": [{"text": f"Script failed: {error_msg}", "type": "bot"}]}
 
+class _OutputTail:
+    """Keeps the most recent output lines per stream within a byte budget"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lines: Dict[str, List[str]] = {'stdout': [], 'stderr': []}
+        self._size = 0
+
+    def add(self, name: str, line: str) -> None:
+        self._lines[name].append(line)
+        self._size += len(line) + 1
+        while self._size > self.max_bytes:
+            longest = max(self._lines.values(), key=len)
+            self._size -= len(longest.pop(0)) + 1
+
+    def text(self, name: str) -> str:
+        return '\n'.join(self._lines[name]).strip()
+
+
 class ShellExecutor:
     """Handles shell command execution"""
+
+    STREAM_READ_SIZE = 4096
     
     def __init__(self):
         print("Reached Security Validator ")
         self.security_validator = SecurityValidator()
+        self.shell_pool = ShellWorkerPool() if Config.SHELL_POOL_ENABLED else None
         
     
     def execute(self, command: str) -> Dict:
@@ -102,10 +133,12 @@ class ShellExecutor:
         """
         try:
             # Security validation
-            self.security_validator.validate_command(command)
+            with metrics.stage('validate'):
+                self.security_validator.validate_command(command)
             
             # Execute command based on complexity
-            result = self._run_command(command)
+            with metrics.stage('execute'):
+                result = self._run_command(command)
             
             if result.returncode == 0:
                 output = result.stdout.strip() or "Command executed successfully"
@@ -115,9 +148,10 @@ class ShellExecutor:
                 return {"messages": [{"text": f"Command failed (exit {result.returncode}): {error_output}", "type": "bot"}]}
                 
         except SecurityError as e:
-
+            metrics.record_error('security')
             return {"messages": [{"text": f"🛡️ Security: {str(e)}", "type": "bot"}]}
         except subprocess.TimeoutExpired:
+            metrics.record_error('timeout')
             return {"messages": [{"text": f" Command timed out ({Config.COMMAND_TIMEOUT}s limit)", "type": "bot"}]}
         except FileNotFoundError as e:
             return {"messages": [{"text": f"Command not found: {str(e)}", "type": "bot"}]}
@@ -125,6 +159,118 @@ class ShellExecutor:
 
             return {"messages": [{"text": f"Execution failed: {str(e)}", "type": "bot"}]}
     
+    async def aexecute_streaming(self, command: str, on_output: Callable[[str, str], Awaitable]) -> Dict:
+        """
+        Execute a shell command as an asyncio subprocess, streaming its output
+
+        Lines are passed to on_output as they appear instead of being buffered
+        until exit. Only the last Config.SHELL_STREAM_MAX_BYTES of output are
+        kept for the returned message. If the caller is cancelled, e.g. the
+        client disconnected, the whole process group is killed.
+
+        Args:
+            command: Shell command to execute
+            on_output: Called with (line, 'stdout' or 'stderr') for every output line
+
+        Returns:
+            Dictionary with execution results
+        """
+        try:
+            with metrics.stage('validate'):
+                self.security_validator.validate_command(command)
+        except SecurityError as e:
+            metrics.record_error('security')
+            return {"messages": [{"text": f"🛡️ Security: {str(e)}", "type": "bot"}]}
+
+        command = os.path.expandvars(os.path.expanduser(command))
+        started = time.perf_counter()
+        metrics.SUBPROCESS_SPAWNS.inc(kind='shell_streaming')
+        try:
+            if any(char in command for char in ['|', '&&', '||', ';', '>', '<', '`', '$(']):
+                process = await asyncio.create_subprocess_shell(
+                    command,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=Config.get_home_directory(),
+                    start_new_session=True
+                )
+            else:
+                process = await asyncio.create_subprocess_exec(
+                    *shlex.split(command),
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=Config.get_home_directory(),
+                    start_new_session=True
+                )
+        except FileNotFoundError as e:
+            return {"messages": [{"text": f"Command not found: {str(e)}", "type": "bot"}]}
+        except Exception as e:
+            return {"messages": [{"text": f"Execution failed: {str(e)}", "type": "bot"}]}
+
+        tail = _OutputTail(Config.SHELL_STREAM_MAX_BYTES)
+        running = asyncio.gather(
+            self._pump(process.stdout, 'stdout', on_output, tail),
+            self._pump(process.stderr, 'stderr', on_output, tail),
+            process.wait()
+        )
+        # Retrieve the result even when we stop waiting early, so it is never reported as lost
+        running.add_done_callback(lambda future: future.cancelled() or future.exception())
+
+        try:
+            await asyncio.wait_for(running, timeout=Config.COMMAND_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._kill_group(process)
+            metrics.record_error('timeout')
+            return {"messages": [{"text": f" Command timed out ({Config.COMMAND_TIMEOUT}s limit)", "type": "bot"}]}
+        except BaseException:
+            # Cancelled or the client went away, do not leave the command running
+            self._kill_group(process)
+            raise
+        finally:
+            timer = metrics.current_timer()
+            if timer is not None:
+                timer.add('execute', time.perf_counter() - started)
+
+        if process.returncode == 0:
+            return {"messages": [{"text": "Command executed successfully", "type": "bot"}]}
+        return {"messages": [{"text": f"Command failed (exit {process.returncode}): {tail.text('stderr')}", "type": "bot"}]}
+
+    @staticmethod
+    async def _pump(stream: asyncio.StreamReader, name: str,
+                    on_output: Callable[[str, str], Awaitable], tail: "_OutputTail") -> None:
+        """Forward complete lines from one pipe, reading in fixed chunks so long lines cannot overrun the reader"""
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        pending = ''
+        while True:
+            chunk = await stream.read(ShellExecutor.STREAM_READ_SIZE)
+            pending += decoder.decode(chunk, final=not chunk)
+
+            *lines, pending = pending.split('\n')
+            if len(pending) >= ShellExecutor.STREAM_READ_SIZE:
+                lines.append(pending)
+                pending = ''
+            if not chunk and pending:
+                lines.append(pending)
+                pending = ''
+
+            for line in lines:
+                tail.add(name, line)
+                await on_output(line, name)
+
+            if not chunk:
+                return
+
+    @staticmethod
+    def _kill_group(process: asyncio.subprocess.Process) -> None:
+        if process.returncode is not None:
+            return
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
     def _run_command(self, command: str) -> subprocess.CompletedProcess:
         """
         Run shell command with appropriate method based on complexity
@@ -137,8 +283,19 @@ class ShellExecutor:
         """
         # Expand ~ and environment variables like $HOME
         command = os.path.expandvars(os.path.expanduser(command))
+        is_complex = any(char in command for char in ['|', '&&', '||', ';', '>', '<', '`', '$('])
+
+        if self.shell_pool is not None:
+            # Simple commands are quoted word by word to keep their shell=False meaning
+            return self.shell_pool.run(
+                command if is_complex else shlex.join(shlex.split(command)),
+                timeout=Config.COMMAND_TIMEOUT
+            )
+
+        metrics.SUBPROCESS_SPAWNS.inc(kind='shell')
+
         # For complex commands with pipes, redirections, etc., use shell=True
-        if any(char in command for char in ['|', '&&', '||', ';', '>', '<', '`', '$(']):
+        if is_complex:
             return subprocess.run(
                 command,
                 shell=True,
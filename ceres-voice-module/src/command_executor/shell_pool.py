@@ -0,0 +1,305 @@
+"""
+Pool of long-lived shell processes for running shell commands.
+
+Each worker is a shell started once, commands are written to its stdin and
+run by that shell itself, so a builtin needs no new process and a program
+needs one fork from a small shell instead of one from the server. Output
+goes to fresh files per command, a background job that outlives its command
+keeps writing to the old, unlinked files and never shows up in a later
+result. The shell reports the exit status on its stdout.
+
+Commands that could change the shell's state (assignments, set, trap, exec,
+function definitions and the like) run in a subshell instead, and the
+working directory is reset before every command. A worker that times out,
+dies or has served enough commands is replaced.
+"""
+import os
+import re
+import time
+import queue
+import shlex
+import signal
+import shutil
+import secrets
+import selectors
+import tempfile
+import threading
+import subprocess
+from typing import Dict, List, Optional
+
+from src.configs.configs import Config
+from src.utils import metrics
+
+
+# Words that leave state behind in the shell that runs them
+STATEFUL = re.compile(
+    r'(?:^|[\s;&|(`{])'
+    r'(?:[A-Za-z_][A-Za-z0-9_]*\+?=|[A-Za-z_][A-Za-z0-9_]*\s*\(\s*\)'
+    r'|(?:alias|unalias|export|unset|set|readonly|local|declare|typeset|trap|umask|ulimit|exec|exit'
+    r'|return|shift|source|\.|hash|read|getopts|wait|eval|shopt|function|pushd|popd)(?=[\s;&|)]|$))'
+)
+
+
+class ShellWorker:
+    """One persistent shell process"""
+
+    READ_SIZE = 4096
+
+    def __init__(self, shell: str, cwd: str):
+        """
+        Start the shell
+
+        Args:
+            shell: Path of the shell binary
+            cwd: Working directory commands start in
+        """
+        self.cwd = cwd
+        self.commands_run = 0
+        self._token = f"__CERES_DONE_{secrets.token_hex(8)}__".encode('utf-8')
+        self._directory = tempfile.mkdtemp(prefix='ceres-shell-')
+        self._stdout_path = os.path.join(self._directory, 'stdout')
+        self._stderr_path = os.path.join(self._directory, 'stderr')
+        self._process = subprocess.Popen(
+            [shell],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=cwd,
+            start_new_session=True
+        )
+
+    @property
+    def alive(self) -> bool:
+        return self._process.poll() is None
+
+    def run(self, command: str, timeout: float) -> subprocess.CompletedProcess:
+        """
+        Run one command in this worker's shell
+
+        Args:
+            command: Shell command line
+            timeout: Seconds before the command is abandoned
+
+        Returns:
+            CompletedProcess with decoded stdout and stderr
+
+        Raises:
+            subprocess.TimeoutExpired: If the command did not finish in time
+            OSError: If the worker can no longer be written to
+        """
+        self.commands_run += 1
+
+        # eval keeps a syntax error from ending the worker, `exit` or `exec` still can,
+        # that is caught as the shell exiting and its status is the command's
+        body = f"eval {shlex.quote(command)}"
+        body = f"( {body} )" if STATEFUL.search(command) else f"{{ {body}; }}"
+        script = (
+            f"cd {shlex.quote(self.cwd)} 2>/dev/null; "
+            f"{body} >{shlex.quote(self._stdout_path)} 2>{shlex.quote(self._stderr_path)} </dev/null; "
+            f"echo {self._token.decode('utf-8')} $?\n"
+        )
+        self._process.stdin.write(script.encode('utf-8'))
+        self._process.stdin.flush()
+
+        returncode = self._read_status(command, timeout)
+        return subprocess.CompletedProcess(command, returncode, self._take(self._stdout_path), self._take(self._stderr_path))
+
+    def retire(self) -> None:
+        """Let the shell exit at the end of its input, background jobs it started keep running"""
+        try:
+            self._process.stdin.close()
+            self._process.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired):
+            self.kill()
+            return
+        self._cleanup()
+
+    def kill(self) -> None:
+        """Kill the shell and anything it started"""
+        try:
+            os.killpg(self._process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        try:
+            self._process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            pass
+        self._cleanup()
+
+    def _cleanup(self) -> None:
+        for stream in (self._process.stdin, self._process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+    def _take(self, path: str) -> str:
+        """Read and unlink one output file, the next command writes a new one"""
+        try:
+            with open(path, 'rb') as output:
+                data = output.read()
+            os.unlink(path)
+        except FileNotFoundError:
+            return ''
+        return data.decode('utf-8', errors='replace')
+
+    def _read_status(self, command: str, timeout: float) -> int:
+        buffer = bytearray()
+        deadline = time.monotonic() + timeout
+
+        with selectors.DefaultSelector() as selector:
+            selector.register(self._process.stdout, selectors.EVENT_READ)
+
+            while not buffer.endswith(b"\n"):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise subprocess.TimeoutExpired(command, timeout)
+                if not selector.select(remaining):
+                    continue
+
+                chunk = os.read(self._process.stdout.fileno(), self.READ_SIZE)
+                if not chunk:
+                    # The command ended the shell, its exit status is the command's
+                    try:
+                        return self._process.wait(timeout=max(deadline - time.monotonic(), 0))
+                    except subprocess.TimeoutExpired:
+                        raise subprocess.TimeoutExpired(command, timeout)
+                buffer += chunk
+
+        token, _, status = bytes(buffer).strip().rpartition(b" ")
+        if token != self._token:
+            raise OSError("Shell worker wrote outside its protocol")
+        return int(status)
+
+
+class ShellWorkerPool:
+    """Hands out persistent shell workers and recycles misbehaving ones"""
+
+    def __init__(self, size: Optional[int] = None,
+                 shell: Optional[str] = None,
+                 cwd: Optional[str] = None,
+                 max_commands: Optional[int] = None):
+        """
+        Configure the pool, workers are started on first use or by prewarm()
+
+        Args:
+            size: Maximum number of workers, defaults to Config.SHELL_POOL_SIZE
+            shell: Shell binary, defaults to Config.SHELL_POOL_SHELL
+            cwd: Working directory, defaults to the user's home directory
+            max_commands: Commands served before a worker is replaced, defaults to Config.SHELL_POOL_MAX_COMMANDS
+        """
+        self.size = size or Config.SHELL_POOL_SIZE
+        self.shell = shell or Config.SHELL_POOL_SHELL
+        self.cwd = cwd or Config.get_home_directory()
+        self.max_commands = max_commands or Config.SHELL_POOL_MAX_COMMANDS
+
+        self._idle: "queue.LifoQueue[ShellWorker]" = queue.LifoQueue()
+        self._workers: List[ShellWorker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {"commands": 0, "spawned": 0, "recycled": 0, "timeouts": 0}
+
+    def prewarm(self) -> None:
+        """Start every worker up front"""
+        for _ in range(self.size - len(self._workers)):
+            worker = self._spawn()
+            if worker is None:
+                break
+            self._idle.put(worker)
+
+    def run(self, command: str, timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """
+        Run a command on an idle worker
+
+        Args:
+            command: Shell command line
+            timeout: Seconds allowed, defaults to Config.COMMAND_TIMEOUT
+
+        Returns:
+            CompletedProcess with decoded stdout and stderr
+
+        Raises:
+            subprocess.TimeoutExpired: If no worker freed up or the command did not finish in time
+        """
+        timeout = timeout or Config.COMMAND_TIMEOUT
+        started = time.monotonic()
+        worker = self._acquire(command, timeout)
+
+        try:
+            result = worker.run(command, timeout - (time.monotonic() - started))
+        except subprocess.TimeoutExpired:
+            self._stats["timeouts"] += 1
+            self._recycle(worker)
+            raise
+        except (OSError, ValueError):
+            # The worker can no longer be talked to
+            self._recycle(worker)
+            raise
+
+        self._stats["commands"] += 1
+        if not worker.alive or worker.commands_run >= self.max_commands:
+            self._recycle(worker, retire=True)
+        else:
+            self._idle.put(worker)
+        return result
+
+    def close(self) -> None:
+        """Stop every worker, background jobs they started are left running"""
+        with self._lock:
+            self._closed = True
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.retire()
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            "size": self.size,
+            "workers": len(self._workers),
+            "idle": self._idle.qsize(),
+        }
+
+    def _acquire(self, command: str, timeout: float) -> ShellWorker:
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                worker = self._spawn()
+                if worker is None:
+                    try:
+                        worker = self._idle.get(timeout=timeout)
+                    except queue.Empty:
+                        raise subprocess.TimeoutExpired(command, timeout)
+
+            if worker.alive:
+                return worker
+            self._recycle(worker)
+
+    def _spawn(self) -> Optional[ShellWorker]:
+        """Start a worker if the pool is below its size"""
+        with self._lock:
+            if self._closed or len(self._workers) >= self.size:
+                return None
+            worker = ShellWorker(self.shell, self.cwd)
+            self._workers.append(worker)
+            self._stats["spawned"] += 1
+            metrics.SUBPROCESS_SPAWNS.inc(kind='shell_worker')
+            return worker
+
+    def _recycle(self, worker: ShellWorker, retire: bool = False) -> None:
+        """
+        Stop a worker and free its slot, a replacement is spawned on demand
+
+        Args:
+            worker: Worker to stop
+            retire: Let a healthy worker exit on its own instead of killing it and its jobs
+        """
+        if retire:
+            worker.retire()
+        else:
+            worker.kill()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+        self._stats["recycled"] += 1
@@ -28,6 +28,14 @@ class Config:
         r'__import__\s*\(', 
      ]
 
+     # Paths destructive commands may not touch, and the commands that count as destructive
+     PROTECTED_PATHS = ['/System', '/usr/bin', '/usr/sbin', '/bin', '/sbin', '/etc', '/private/etc', '/boot']
+     DESTRUCTIVE_COMMANDS = [
+        'rm', 'rmdir', 'del', 'delete', 'format', 'shred', 'truncate', 'unlink', 'mv', 'chmod', 'chown'
+     ]
+     SECURITY_VERDICT_CACHE_SIZE = 2048
+     SECURITY_MAX_COMMAND_LENGTH = 4096
+
      # macOS application bundle IDs
      APP_BUNDLE_IDS = {
         'chrome': 'com.google.Chrome',
@@ -42,9 +50,132 @@ class Config:
         'music': 'com.apple.Music',
         'photos': 'com.apple.Photos'
     }
+
+     # Other names users say for the apps above
+     APP_ALIASES = {
+        'google chrome': 'chrome',
+        'mozilla firefox': 'firefox',
+        'apple mail': 'mail',
+        'imessage': 'messages',
+        'apple music': 'music',
+        'itunes': 'music',
+        'ical': 'calendar',
+    }
+     # AI model settings
+     GEMINI_MODEL = os.getenv('CERES_GEMINI_MODEL', 'gemini-2.0-flash')
+     PROMPT_VERSION = os.getenv('CERES_PROMPT_VERSION', 'v1-full')
+     LLM_TIMEOUT = float(os.getenv('CERES_LLM_TIMEOUT', '20'))
+     LLM_STREAMING = os.getenv('CERES_LLM_STREAMING', 'false').lower() == 'true'
+
      # Command execution settings
      COMMAND_TIMEOUT = 30
 
+     # Stream shell output to the client while the command runs
+     SHELL_STREAMING = os.getenv('CERES_SHELL_STREAMING', 'false').lower() == 'true'
+     SHELL_STREAM_MAX_BYTES = 64 * 1024
+
+     # Persistent shell workers for shell commands
+     SHELL_POOL_ENABLED = os.getenv('CERES_SHELL_POOL', 'false').lower() == 'true'
+     SHELL_POOL_SIZE = int(os.getenv('CERES_SHELL_POOL_SIZE', '4'))
+     SHELL_POOL_MAX_COMMANDS = 200
+     SHELL_POOL_SHELL = os.getenv('CERES_SHELL_POOL_SHELL', '/bin/sh')
+
+     # Agent lifecycle settings
+     AGENT_REBUILD_INTERVAL = 30
+     AGENT_WARMUP_PING = os.getenv('CERES_AGENT_WARMUP_PING', 'false').lower() == 'true'
+
+     # Execution pool settings ('thread' or 'process')
+     EXECUTION_POOL_KIND = os.getenv('CERES_EXECUTION_POOL', 'thread')
+     EXECUTION_WORKERS = int(os.getenv('CERES_EXECUTION_WORKERS', '4'))
+     EXECUTION_QUEUE_SIZE = int(os.getenv('CERES_EXECUTION_QUEUE_SIZE', '16'))
+     EXECUTION_PER_CONNECTION_LIMIT = int(os.getenv('CERES_EXECUTION_PER_CONNECTION', '2'))
+
+     # /ws/execute protocol, plain text commands are the legacy protocol
+     EXECUTE_LEGACY_TEXT = os.getenv('CERES_EXECUTE_LEGACY_TEXT', 'true').lower() == 'true'
+     EXECUTE_OUTPUT_BATCH_LINES = 64
+     EXECUTE_OUTPUT_BATCH_INTERVAL = 0.05
+
+     # Speech: CERES_SPEECH=false runs a text-only server that never imports torch,
+     # CERES_SPEECH_PRELOAD=false loads Whisper on the first /listen request instead of at startup
+     SPEECH_ENABLED = os.getenv('CERES_SPEECH', 'true').lower() == 'true'
+     SPEECH_PRELOAD = os.getenv('CERES_SPEECH_PRELOAD', 'true').lower() == 'true'
+
+     # Whisper model: 'tiny.en', 'base.en' or 'small.en', see src/speech/model_registry.py
+     WHISPER_MODEL = os.getenv('CERES_WHISPER_MODEL', 'base.en')
+     WHISPER_QUANTIZE = os.getenv('CERES_WHISPER_QUANTIZE', 'false').lower() == 'true'
+     # Torch intra-op threads for inference, 0 keeps torch's default
+     WHISPER_THREADS = int(os.getenv('CERES_WHISPER_THREADS', '0'))
+
+     # Whisper decoding: 'command-fast', 'command-accurate' or 'long-form', see src/speech/decoding_profiles.py
+     WHISPER_DECODING_PROFILE = os.getenv('CERES_WHISPER_PROFILE', 'command-fast')
+     # Prime command profiles with app names and command verbs
+     WHISPER_VOCABULARY_PROMPT = os.getenv('CERES_WHISPER_VOCABULARY', 'true').lower() == 'true'
+     WHISPER_VOCABULARY_MAX_WORDS = 80
+
+     # Whisper transcription batching
+     WHISPER_BATCH_SIZE = int(os.getenv('CERES_WHISPER_BATCH_SIZE', '8'))
+     WHISPER_BATCH_WAIT_MS = int(os.getenv('CERES_WHISPER_BATCH_WAIT_MS', '25'))
+
+     # Streaming transcription on /listen
+     AUDIO_SAMPLE_RATE = 16000
+     # Audio encoding on /listen: 'pcm16', 'mulaw' or 'zdelta'
+     AUDIO_ENCODING = os.getenv('CERES_AUDIO_ENCODING', 'pcm16')
+     STREAM_WINDOW_SECONDS = 15
+     STREAM_PARTIAL_INTERVAL = float(os.getenv('CERES_STREAM_PARTIAL_INTERVAL', '0.5'))
+     STREAM_SILENCE_RMS = 0.01
+
+     # Voice client capture: ring buffer length and audio kept from before the wake word ended
+     CAPTURE_BUFFER_SECONDS = 10
+     CAPTURE_PREROLL_MS = int(os.getenv('CERES_CAPTURE_PREROLL_MS', '150'))
+     # Seconds of silence that end a spoken command
+     CAPTURE_END_SILENCE = 2.0
+
+     # Voice client VAD: 'silero-torch', 'silero-onnx' or 'energy', see src/speech/vad.py
+     VAD_ENGINE = os.getenv('CERES_VAD_ENGINE', 'silero-torch')
+     # Skip the neural engine on frames quieter than this RMS
+     VAD_GATE = os.getenv('CERES_VAD_GATE', 'true').lower() == 'true'
+     VAD_GATE_RMS = float(os.getenv('CERES_VAD_GATE_RMS', '0.003'))
+     VAD_THREADS = int(os.getenv('CERES_VAD_THREADS', '1'))
+     VAD_ONNX_PATH = os.getenv('CERES_VAD_ONNX_PATH', '~/.cache/torch/hub/snakers4_silero-vad_master/src/silero_vad/data/silero_vad.onnx')
+     VAD_FRAME_SAMPLES = 512
+     VAD_SPEECH_PROBABILITY = 0.5
+
+     # Voice client speech: phrases rendered once and cached, including the server's fixed replies
+     TTS_CACHE_DIR = os.getenv('CERES_TTS_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.ceres', 'tts_cache'))
+     TTS_CACHED_PHRASES = [
+        "Yes?",
+        "Sorry, I didn't catch that.",
+        "I'm busy right now, please try again in a moment.",
+        "Sorry, an error occurred.",
+    ]
+
+     # Silence trimming before Whisper
+     SILENCE_TRIM_ENABLED = os.getenv('CERES_SILENCE_TRIM', 'true').lower() == 'true'
+     VAD_ENERGY_THRESHOLD = float(os.getenv('CERES_VAD_ENERGY_THRESHOLD', '0.01'))
+     VAD_ZCR_THRESHOLD = 0.3
+     VAD_FRAME_MS = 20
+     VAD_PADDING_MS = 200
+     VAD_MIN_SPEECH_MS = 100
+
+     # Request to command cache
+     COMMAND_CACHE_ENABLED = os.getenv('CERES_COMMAND_CACHE', 'true').lower() == 'true'
+     COMMAND_CACHE_PATH = os.getenv('CERES_COMMAND_CACHE_PATH', os.path.join(os.path.expanduser('~'), '.ceres', 'command_cache.sqlite3'))
+     COMMAND_CACHE_MEMORY_SIZE = 512
+     COMMAND_CACHE_DISK_SIZE = 10000
+     COMMAND_CACHE_TTL = int(os.getenv('CERES_COMMAND_CACHE_TTL', str(7 * 24 * 3600)))
+
+     # Near-duplicate request cache
+     SEMANTIC_CACHE_ENABLED = os.getenv('CERES_SEMANTIC_CACHE', 'true').lower() == 'true'
+     SEMANTIC_CACHE_THRESHOLD = float(os.getenv('CERES_SEMANTIC_CACHE_THRESHOLD', '0.85'))
+     SEMANTIC_CACHE_DIM = 512
+     SEMANTIC_CACHE_MAX_ENTRIES = 50000
+     SEMANTIC_CACHE_IVF_MIN_ENTRIES = 2048
+     SEMANTIC_CACHE_NPROBE = 8
+
+     # Local intent router in front of the AI service
+     INTENT_ROUTER_ENABLED = os.getenv('CERES_INTENT_ROUTER', 'true').lower() == 'true'
+     INTENT_ROUTER_MIN_CONFIDENCE = 0.9
+
     # AppleScript indicators
      APPLESCRIPT_INDICATORS = [
         'tell application', 'tell app', 'activate application',
@@ -53,6 +184,18 @@ class Config:
         'open location', 'set volume', 'get clipboard'
     ]
     
+    # Command verbs and the synonyms users say for them
+     COMMAND_VERBS = {
+        'open': ['open', 'launch', 'start', 'run', 'fire up'],
+        'close': ['close', 'quit', 'exit'],
+        'kill': ['kill', 'terminate', 'force quit', 'stop'],
+        'check': ['check', 'show', 'display', 'get', 'tell me'],
+        'search': ['search', 'google', 'look up', 'find'],
+        'create': ['create', 'make', 'new'],
+        'delete': ['delete', 'remove', 'trash'],
+        'send': ['send', 'email', 'mail'],
+    }
+
     # Request indicators for AppleScript
      REQUEST_INDICATORS = [
         'open app', 'launch app', 'send email', 'create email',
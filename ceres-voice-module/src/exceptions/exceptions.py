@@ -20,4 +20,9 @@ class CommandExecutionError(Exception):
 
 class ConfigurationError(Exception):
     """Raised when configuration is invalid or missing"""
-    pass
\ No newline at end of file
+    pass
+
+
+class ServerBusyError(Exception):
+    """Raised when the execution queue is full and a request cannot be accepted"""
+    pass
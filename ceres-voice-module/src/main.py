@@ -8,21 +8,30 @@ main.py
 Imports Inbuilt Libraries
 """
 from fastapi import FastAPI,WebSocket,WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse
 import uvicorn
 import logging
 import asyncio
+import json
 import numpy as np 
-import whisper
-import sys
 
 
 
 """
 Import Derived Libraries
 """     
-from src.ai_agent.ai_agent import AIAgent
-from src.exceptions.exceptions import ConfigurationError
+from src.ai_agent.agent_manager import AgentManager
+from src.ai_agent.execution_pool import ExecutionPool, ConnectionLimiter
+from src.speech.speech_service import SpeechService
+from src.speech.streaming_transcriber import StreamingTranscriber
+from src.speech.audio_codec import create_decoder
+from src.speech.silence_trimmer import SilenceTrimmer
+from src.exceptions.exceptions import ConfigurationError, ServerBusyError
 from src.utils.ApiResponse import ApiResponse
+from src.utils import metrics
+from src.utils.metrics import RequestTimer
+from src.utils.ws_protocol import FrameWriter, OutputBatcher, ProtocolError, decode_frame, JSON
+from src.configs.configs import Config
 
 
 
@@ -38,39 +47,70 @@ logger = logging.getLogger(__name__)
 Apps Initilization
 """
 app = FastAPI()
-agent = AIAgent()
+agent_manager = AgentManager()
+execution_pool = ExecutionPool(agent_manager)
 
 
 
 """
 Whisper Model Iniilization
 """
-try:
-    logger.info("Loading Whisper model...")
-    whisper_model = whisper.load_model("base.en")
-    logger.info("Whisper model loaded successfully.")
-    print("Whisper model loaded successfully.")
-except Exception as e:
-    logger.error(f"Fatal: Could not load Whisper model. Error: {e}")
-    print("Failed Model Loading")
-    sys.exit(1)
+# Loaded in the background after startup, torch is never imported when speech is disabled
+speech_service = SpeechService()
+silence_trimmer = SilenceTrimmer() if Config.SILENCE_TRIM_ENABLED else None
+
+
+"""
+Agent Warm-up
+"""
+warm_up_tasks = set()
+
+
+async def build_agent():
+    # Build the shared agent once, off the event loop
+    await asyncio.to_thread(agent_manager.start)
+    logger.info(f"Agent state: {agent_manager.state}")
+
+
+@app.on_event("startup")
+async def warm_up_agent():
+    execution_pool.start()
+
+    # Startup returns right away so the server binds and answers /health/live while these run
+    task = asyncio.create_task(build_agent())
+    warm_up_tasks.add(task)
+    task.add_done_callback(warm_up_tasks.discard)
+
+    if Config.SPEECH_PRELOAD:
+        speech_service.start()
+
+
+@app.on_event("shutdown")
+async def stop_workers():
+    execution_pool.shutdown()
+    speech_service.stop()
+    # Shell workers and the cache's SQLite connection would otherwise outlive the app across reloads
+    await asyncio.to_thread(agent_manager.close)
 
 
 """
 Helper Function For special execution
 """
-def handle_special_commands(command : str):
+async def handle_special_commands(command : str):
 
     command = command.lower().strip()
 
     try:
 
+        # The agent methods block, they run on a thread and the agent is fetched without waiting on its build
         if command in ['test', '--test', 'self-test']:
-            return agent.test_functionality()
+            agent = await agent_manager.aget_agent()
+            return await asyncio.to_thread(agent.test_functionality)
         
 
         elif command in ['info', '--info', 'system-info']:
-            return agent.get_system_info()
+            agent = await agent_manager.aget_agent()
+            return await asyncio.to_thread(agent.get_system_info)
         
 
         elif command in ['help', '--help', '-h']:
@@ -78,11 +118,13 @@ def handle_special_commands(command : str):
         
 
         elif command in ['screenshot', 'take-screenshot', 'capture']:
-            return agent.take_screenshot()
+            agent = await agent_manager.aget_agent()
+            return await asyncio.to_thread(agent.take_screenshot)
         
 
         elif 'screenshot' in command and ('analyze' in command or 'click' in command or 'find' in command):
-            return agent.execute_visual_command(command)
+            agent = await agent_manager.aget_agent()
+            return await asyncio.to_thread(agent.execute_visual_command, command)
         
 
         else:
@@ -101,121 +143,405 @@ def handle_special_commands(command : str):
 """
 Task Exectution Socket
 """
+async def run_command(command:str, on_progress=None, on_output=None):
+    """
+    Runs one command, returns the response and whether it ran
+    """
+    try:
+
+        special_result  = await handle_special_commands(command)
+
+        # Special Commands
+        """
+        If Any Specific command can be Executed in this way
+        """
+        if special_result is not None:
+            return special_result, True
+
+        # Generic Command
+        """
+        AI Agent Will Perfrom the Further task on the worker pool
+        """
+        response = await execution_pool.execute_command(
+            command, on_progress=on_progress, on_output=on_output
+        )
+        return response, True
+
+    except ServerBusyError as e:
+        logger.warning(f"Rejected command, {e}")
+        metrics.record_error('busy')
+        return ApiResponse.error("Server busy, please try again shortly"), False
+
+    except ConfigurationError as e:
+        metrics.record_error('config')
+        return ApiResponse.error(str(e)), False
+
+    except Exception as e:
+        metrics.record_error('execution')
+        return ApiResponse.error("Execution Failed"), False
+
+
+async def process_command(writer:FrameWriter, command:str, timer:RequestTimer):
+    """
+    Legacy text protocol, runs one command and sends its messages as bare text frames
+    """
+    with timer.activate():
+        await writer.send_text("Received...")
+        await writer.send_text("Exectuting... ")
+
+        async def send_output(line:str, stream:str):
+            await writer.send_text(line)
+
+        response, _ = await run_command(command, on_progress=writer.send_text, on_output=send_output)
+
+        # Sending response to Clent
+        with timer.stage('send'):
+            for msg in response.get("messages",[]):
+                text = msg.get("text","")
+
+                if text.strip():
+                    await writer.send_text(text)
+
+            await writer.send_text("Execution Finished !")
+
+
+async def process_frame(writer:FrameWriter, frame:dict, encoding:str, timer:RequestTimer):
+    """
+    Runs one execute frame and answers with status, progress, output and result frames
+    """
+    with timer.activate():
+        request_id = frame.get("id")
+        await writer.send(encoding, request_id, "status", status="received")
+        await writer.send(encoding, request_id, "status", status="executing")
+
+        async def send_progress(chunk:str):
+            await writer.send(encoding, request_id, "progress", text=chunk)
+
+        batcher = OutputBatcher(writer, encoding, request_id)
+        try:
+            response, ok = await run_command(frame["command"], on_progress=send_progress, on_output=batcher.add)
+        except BaseException:
+            batcher.cancel()
+            raise
+
+        # All messages go out in one result frame
+        with timer.stage('send'):
+            await batcher.close()
+            messages = [msg for msg in response.get("messages", []) if msg.get("text", "").strip()]
+            await writer.send(encoding, request_id, "result", ok=ok, messages=messages)
+
+
 @app.websocket('/ws/execute')
 async def websocket_endpoint(websocket:WebSocket):
     
     # await till accept
     await websocket.accept()
 
+    writer = FrameWriter(websocket)
+    limiter = ConnectionLimiter()
+    tasks = set()
+
+    def on_done(task:asyncio.Task):
+        tasks.discard(task)
+        limiter.release()
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Command task failed: {task.exception()}")
+
     try:
         while True:
             
-            #extract the commands
-            command = await websocket.receive_text()
+            #extract the commands, JSON/msgpack frames or legacy plain text
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            # Timed from here, the wait for the next message is not part of any request
+            timer = RequestTimer()
+            try:
+                with timer.stage('receive'):
+                    frame, encoding = decode_frame(message)
+            except ProtocolError as e:
+                metrics.record_error('receive')
+                await writer.send(JSON, None, "error", error=str(e))
+                continue
+
+            if frame is None:
+                command = message.get("text") or ""
+                if not Config.EXECUTE_LEGACY_TEXT:
+                    await writer.send(JSON, None, "error", error="Plain text commands are disabled, send an execute frame")
+                    continue
+            else:
+                command = frame["command"]
 
             logger.info(f"Received Commmand :{command}")
-            await websocket.send_text("Received...")
-            await asyncio.sleep(1)
 
-            try:
-          
-                await websocket.send_text("Exectuting... ")
-
-                special_result  = handle_special_commands(command)
-
-                # Special Commands
-                """
-                If Any Specific command can be Executed in this way
-                """
-                if special_result is not None:
-                    response = special_result
-                
-                # Generic Command
-                else: 
-                    """
-                    AI Agent Will Perfrom the Further task
-                    """
-                    agent = AIAgent()
-                    response = agent.execute_command(command)
-
-
-            except Exception as e:
-                response = ApiResponse.error("Execution Failed")
-
-            # Sending response to Clent
-            for msg in response.get("messages",[]):
-                text = msg.get("text","")
-                
-                if text.strip():
-                    await websocket.send_text(text)
-                    await asyncio.sleep(0.2)
+            # Per connection limit, keeps one client from filling the pool
+            if not limiter.try_acquire():
+                metrics.record_error('busy')
+                if frame is None:
+                    await writer.send_text("Server busy: too many commands running on this connection")
+                else:
+                    await writer.send(encoding, frame.get("id"), "error", error="Too many commands running on this connection")
+                continue
+
+            if frame is None:
+                # Legacy text frames carry no id to tell commands apart, so they run one at a
+                # time in the order received, as they always have
+                try:
+                    await process_command(writer, command, timer)
+                finally:
+                    limiter.release()
+                continue
 
-            await websocket.send_text("Execution Finished !")
+            task = asyncio.create_task(process_frame(writer, frame, encoding, timer))
+            tasks.add(task)
+            task.add_done_callback(on_done)
 
     except WebSocketDisconnect:
         logger.info("UI Disconnected")
+        for task in list(tasks):
+            task.cancel()
         
 
 
 """
 Voice Assistance
 """
-@app.websocket('/listen')
-async def websocket_listen_endpoint(websocket:WebSocket):
+async def run_voice_command(transcribed_text: str) -> str:
     """
-    This new endpoint handles the audio stream from your wake word client.
+    Runs a transcribed command and returns the text spoken back to the user
     """
-    await websocket.accept()
+    logger.info(f"Transcribed from voice: '{transcribed_text}'")
 
+    # If transcription is empty, send a default message
+    if not transcribed_text:
+        return "Sorry, I didn't catch that."
+
+    # Process the command using your existing AIAgent
     try:
-        while True :
-            # 1. Receive raw audio bytes from the client
-            audio_bytes = await websocket.receive_bytes()
+        response_data = await execution_pool.execute_command(transcribed_text)
+        messages = response_data.get("messages", [])
+
+        chatbot_response = "I'm not sure how to respond." # Default
+        if messages and messages[0].get("text"):
+            chatbot_response = messages[0].get("text")
 
+    except ServerBusyError as e:
+        logger.warning(f"Rejected voice command, {e}")
+        metrics.record_error('busy')
+        chatbot_response = "I'm busy right now, please try again in a moment."
 
-            # 2. Convert audio bytes to a Numpy array that whisper can understand
-            # [-32768, 32767] -->  [-32768.0, 32767.0] --> [-1,0,1]
-            audio_np = np.frombuffer(audio_bytes, dtype=np.int16).astype(np.float32) / 32768.0
+    except Exception as e:
+        logger.error(f"Error executing voice command: {e}")
+        metrics.record_error('execution')
+        chatbot_response = "Sorry, an error occurred."
 
+    return chatbot_response
 
-            # 3. Use Whisper to transcribe the audio to text
-            result = whisper_model.transcribe(audio_np, fp16=False) #True when GPU
-            
-            transcribed_text = result.get("text", "").strip()
 
-            logger.info(f"Transcribed from voice: '{transcribed_text}'")
+async def send_partial(websocket:WebSocket, session:StreamingTranscriber):
+    text = await session.partial()
+    if text:
+        await websocket.send_json({"type": "partial", "text": text})
+
 
-            print("Transcribe Sucesfully Done")
+async def read_messages(websocket:WebSocket, inbox:asyncio.Queue):
+    """
+    Moves incoming frames into a queue, returns once the client disconnects
+    """
+    while True:
+        message = await websocket.receive()
+        await inbox.put(message)
+        if message["type"] == "websocket.disconnect":
+            return
 
 
+async def cancel_on_disconnect(reader:asyncio.Task, coro):
+    """
+    Awaits coro, cancelling it if the client disconnects first
+    """
+    task = asyncio.ensure_future(coro)
+    await asyncio.wait({task, reader}, return_when=asyncio.FIRST_COMPLETED)
 
-            # 4. If transcription is empty, send a default message
-            if not transcribed_text:
-                await websocket.send_text("Sorry, I didn't catch that.")
-                continue
+    if task.done():
+        return task.result()
 
+    task.cancel()
+    raise WebSocketDisconnect(1001)
 
 
-            # 5. Process the command using your existing AIAgent
-            try:
-                response_data = agent.execute_command(transcribed_text)
-                messages = response_data.get("messages", [])
-                
-                chatbot_response = "I'm not sure how to respond." # Default
-                if messages and messages[0].get("text"):
-                    chatbot_response = messages[0].get("text")
+@app.websocket('/listen')
+async def websocket_listen_endpoint(websocket:WebSocket):
+    """
+    This new endpoint handles the audio stream from your wake word client.
 
-            except Exception as e:
-                logger.error(f"Error executing voice command: {e}")
-                chatbot_response = "Sorry, an error occurred."
+    Legacy clients send a whole utterance as one binary frame and get a text reply.
+    Streaming clients send {"type": "start"}, audio frames while the user speaks
+    and {"type": "end"}, and get "partial", "final" and "response" JSON events.
 
+    Audio is 16-bit PCM unless the client picks another encoding with the
+    ?encoding= query parameter or {"type": "start", "encoding": ...}.
+    """
+    await websocket.accept()
 
-            # 6. Send the final text response back to the voice client
-            await websocket.send_text(chatbot_response)
+    if speech_service.state == SpeechService.DISABLED:
+        await websocket.send_json({"type": "error", "text": "Speech is disabled on this server"})
+        await websocket.close()
+        return
+
+    try:
+        connection_encoding = websocket.query_params.get("encoding", Config.AUDIO_ENCODING)
+        create_decoder(connection_encoding)
+    except ConfigurationError as e:
+        await websocket.send_json({"type": "error", "text": str(e)})
+        await websocket.close()
+        return
+
+    session = None
+    # Decoder of the current stream, whole-utterance frames each get their own
+    stream_decoder = None
+    partial_task = None
+    # Set once the client sends {"type": "start"}, from then on every reply is a JSON event
+    streaming = False
+    # A stream whose start failed, its audio frames are dropped until "end"
+    rejected = False
+
+    async def reply(text:str, event:str="response"):
+        if streaming:
+            await websocket.send_json({"type": event, "text": text})
+        else:
+            await websocket.send_text(text)
+
+    # Frames are read in the background so a disconnect cancels work in progress
+    inbox = asyncio.Queue()
+    reader = asyncio.create_task(read_messages(websocket, inbox))
+
+    try:
+        while True :
+            message = await inbox.get()
+
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+
+            # 1. Control frames of the streaming protocol
+            if message.get("text") is not None:
+                try:
+                    event = json.loads(message["text"])
+                except json.JSONDecodeError:
+                    await websocket.send_json({"type": "error", "text": "Invalid control frame"})
+                    continue
+
+                if event.get("type") == "start":
+                    streaming = True
+                    session = None
+                    # The error is the reply for this utterance, its frames and "end" are dropped
+                    rejected = True
+
+                    # A fresh decoder per utterance, stateful encodings restart with the stream
+                    try:
+                        stream_decoder = create_decoder(event.get("encoding", connection_encoding))
+                    except ConfigurationError as e:
+                        await websocket.send_json({"type": "error", "text": str(e)})
+                        continue
+                    try:
+                        scheduler = await cancel_on_disconnect(reader, speech_service.get_scheduler())
+                    except ConfigurationError as e:
+                        await websocket.send_json({"type": "error", "text": str(e)})
+                        continue
+                    session = StreamingTranscriber(scheduler, trimmer=silence_trimmer)
+                    rejected = False
+
+                elif event.get("type") == "end" and rejected:
+                    rejected = False
+
+                elif event.get("type") == "end" and session is not None:
+                    # Let the running partial finish, finalize can often reuse it
+                    if partial_task is not None:
+                        await asyncio.gather(partial_task, return_exceptions=True)
+                        partial_task = None
+
+                    # The audio already arrived while the user spoke, the request is timed from "end"
+                    with RequestTimer().activate() as timer:
+                        with timer.stage('transcribe'):
+                            transcribed_text = await cancel_on_disconnect(reader, session.finalize())
+                        logger.info(f"Streamed {session.duration:.2f}s of audio")
+                        session = None
+
+                        await websocket.send_json({"type": "final", "text": transcribed_text})
+                        chatbot_response = await cancel_on_disconnect(reader, run_voice_command(transcribed_text))
+                        with timer.stage('send'):
+                            await websocket.send_json({"type": "response", "text": chatbot_response})
+
+                continue
+
+
+            # 2. Streaming frame, decoded into the session buffer, transcribe the
+            #    sliding window while the user keeps talking
+            if rejected:
+                continue
+
+            if session is not None:
+                try:
+                    session.append_encoded(message["bytes"], stream_decoder)
+                except ValueError as e:
+                    # A stateful stream cannot recover from a corrupt frame, drop the rest of it
+                    metrics.record_error('receive')
+                    if partial_task is not None:
+                        partial_task.cancel()
+                        partial_task = None
+                    session = None
+                    rejected = True
+                    await websocket.send_json({"type": "error", "text": str(e)})
+                    continue
+                if session.needs_partial() and (partial_task is None or partial_task.done()):
+                    partial_task = asyncio.create_task(send_partial(websocket, session))
+                continue
+
+
+            # 3. Whole utterance in one frame, batched with other clients. Each one is its
+            #    own stream, stateful encodings start over for every utterance
+            with RequestTimer().activate() as timer:
+                with timer.stage('receive'):
+                    try:
+                        audio_np = create_decoder(connection_encoding).decode(message["bytes"])
+                    except ValueError as e:
+                        metrics.record_error('receive')
+                        await reply(str(e), "error")
+                        continue
+                    if silence_trimmer is not None:
+                        audio_np, leading, trailing = silence_trimmer.trim(audio_np)
+                        logger.info(f"Trimmed {leading:.2f}s leading and {trailing:.2f}s trailing silence")
+
+                # Silent clips never reach Whisper
+                if len(audio_np):
+                    try:
+                        scheduler = await cancel_on_disconnect(reader, speech_service.get_scheduler())
+                    except ConfigurationError as e:
+                        metrics.record_error('config')
+                        await reply(str(e), "error")
+                        continue
+                    with timer.stage('transcribe'):
+                        transcribed_text = await cancel_on_disconnect(reader, scheduler.transcribe(audio_np))
+                else:
+                    transcribed_text = ""
+
+                print("Transcribe Sucesfully Done")
+
+
+                # 4. Send the final text response back to the voice client
+                chatbot_response = await cancel_on_disconnect(reader, run_voice_command(transcribed_text))
+                with timer.stage('send'):
+                    await reply(chatbot_response)
 
         
     except WebSocketDisconnect:
         logger.info("Voice client disconnected.")
+        if partial_task is not None:
+            partial_task.cancel()
+
+    finally:
+        reader.cancel()
 
 
 
@@ -230,6 +556,30 @@ def get_health():
     return "Working Fine"
 
 
+@app.get('/health/live')
+def get_liveness():
+    # Answers as soon as the server is up, models may still be loading
+    return {"status": "alive"}
+
+
+@app.get('/health/ready')
+def get_readiness():
+    ready = agent_manager.state == AgentManager.READY and speech_service.ready
+    body = {"ready": ready, "agent": agent_manager.state, "speech": speech_service.health()}
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+
+@app.get('/health/agent')
+def get_agent_health():
+    return {**agent_manager.health(), "execution_pool": execution_pool.stats()}
+
+
+@app.get('/metrics')
+def get_metrics():
+    # Prometheus text format, stage latencies and token, spawn and error counters
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+
 
 
 """
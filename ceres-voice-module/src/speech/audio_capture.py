@@ -0,0 +1,188 @@
+"""
+Continuous microphone capture for the voice client.
+
+One PyAudio input stream stays open for the whole session. Its callback runs
+on PortAudio's thread and writes every buffer into a ring buffer, and asyncio
+code reads fixed-size frames back as NumPy views, so wake word detection,
+the "Yes?" prompt and command recording never drop audio between them and
+never block the event loop.
+"""
+import asyncio
+import logging
+import numpy as np
+import pyaudio
+from typing import AsyncIterator, Optional, Tuple
+
+from src.configs.configs import Config
+
+
+logger = logging.getLogger(__name__)
+
+
+class AudioRingBuffer:
+    """
+    Single producer, single consumer ring of int16 samples
+
+    Samples are stored twice, at i and i + capacity, so any window of up to
+    capacity samples is one contiguous slice. Positions count samples since
+    the start of capture and only ever grow. The producer publishes a write
+    by advancing its position after the copy, which is all the consumer
+    needs to read without a lock.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = np.zeros(capacity * 2, dtype=np.int16)
+        self._written = 0
+
+    @property
+    def written(self) -> int:
+        """Position just after the newest sample"""
+        return self._written
+
+    @property
+    def oldest(self) -> int:
+        """Position of the oldest sample still held"""
+        return max(0, self._written - self.capacity)
+
+    def write(self, samples: np.ndarray) -> None:
+        """
+        Append samples, overwriting the oldest ones. Producer thread only.
+
+        Args:
+            samples: Mono int16 samples
+        """
+        count = len(samples)
+        if count > self.capacity:
+            self._written += count - self.capacity
+            samples = samples[-self.capacity:]
+            count = self.capacity
+
+        start = self._written % self.capacity
+        first = min(count, self.capacity - start)
+        for offset, chunk in ((start, samples[:first]), (0, samples[first:])):
+            end = offset + len(chunk)
+            self._data[offset:end] = chunk
+            self._data[offset + self.capacity:end + self.capacity] = chunk
+
+        self._written += count
+
+    def view(self, position: int, count: int) -> Optional[np.ndarray]:
+        """
+        View samples without copying
+
+        The view is only valid until the producer wraps around to it, use it
+        straight away or copy it.
+
+        Args:
+            position: Position of the first sample
+            count: Number of samples, at most capacity
+
+        Returns:
+            int16 view, or None if the samples are not written yet or already overwritten
+        """
+        if position < self.oldest or position + count > self._written:
+            return None
+        start = position % self.capacity
+        return self._data[start:start + count]
+
+
+class AudioCapture:
+    """Always-open callback-driven microphone stream feeding an AudioRingBuffer"""
+
+    def __init__(self, pyaudio_instance, frames_per_buffer: int = 512,
+                 sample_rate: Optional[int] = None, buffer_seconds: Optional[float] = None):
+        """
+        Configure the capture, the stream is opened by start()
+
+        Args:
+            pyaudio_instance: pyaudio.PyAudio object that owns the device
+            frames_per_buffer: Samples PortAudio delivers per callback
+            sample_rate: Capture rate, defaults to Config.AUDIO_SAMPLE_RATE
+            buffer_seconds: Audio kept for slow readers and pre-roll, defaults to Config.CAPTURE_BUFFER_SECONDS
+        """
+        self.pyaudio = pyaudio_instance
+        self.frames_per_buffer = frames_per_buffer
+        self.sample_rate = sample_rate or Config.AUDIO_SAMPLE_RATE
+        self.ring = AudioRingBuffer(int(self.sample_rate * (buffer_seconds or Config.CAPTURE_BUFFER_SECONDS)))
+        self.overruns = 0
+
+        self._stream = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._data_ready: Optional[asyncio.Event] = None
+
+    @property
+    def position(self) -> int:
+        """Position just after the newest captured sample"""
+        return self.ring.written
+
+    def start(self) -> None:
+        """Open the input stream, must be called from the event loop that reads frames"""
+        if self._stream is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._data_ready = asyncio.Event()
+        self._stream = self.pyaudio.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=self.sample_rate,
+            input=True,
+            frames_per_buffer=self.frames_per_buffer,
+            stream_callback=self._on_audio,
+        )
+        self._stream.start_stream()
+
+    def stop(self) -> None:
+        """Close the input stream"""
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+
+    async def frames(self, start: int, frame_length: int,
+                     end: Optional[int] = None) -> AsyncIterator[Tuple[int, np.ndarray]]:
+        """
+        Read consecutive frames from a position, waiting for audio as needed
+
+        A reader that falls more than the buffer behind skips ahead to the
+        oldest audio still held, and the skip is counted in overruns.
+
+        Args:
+            start: Position of the first sample, may be in the past for pre-roll
+            frame_length: Samples per frame
+            end: Stop before a frame would reach past this position, None reads on live
+
+        Yields:
+            (position just after the frame, int16 view of the frame)
+        """
+        position = start
+        while end is None or position + frame_length <= end:
+            while self.ring.written < position + frame_length:
+                self._data_ready.clear()
+                if self.ring.written >= position + frame_length:
+                    break
+                await self._data_ready.wait()
+
+            frame = self.ring.view(position, frame_length)
+            if frame is None and position < 0:
+                # Pre-roll from before capture started
+                position = 0
+                continue
+            if frame is None:
+                self.overruns += 1
+                logger.warning("Audio reader fell behind the capture buffer, skipping ahead")
+                position = self.ring.oldest
+                continue
+
+            position += frame_length
+            yield position, frame
+
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        """PortAudio callback, runs on the audio thread"""
+        self.ring.write(np.frombuffer(in_data, dtype=np.int16))
+        try:
+            self._loop.call_soon_threadsafe(self._data_ready.set)
+        except RuntimeError:
+            # The event loop closed while the stream was still running
+            pass
+        return None, pyaudio.paContinue
@@ -0,0 +1,247 @@
+"""
+Audio encodings between the voice client and /listen.
+
+    pcm16   raw little-endian 16-bit PCM, 2 bytes per sample
+    mulaw   G.711 8-bit mu-law, 1 byte per sample, lossy
+    zdelta  16-bit sample deltas, byte planes split and deflated with one
+            zlib stream per utterance, lossless
+
+Encoders and decoders keep state for one stream, a streamed utterance or a
+single whole-utterance frame. Decoders raise ValueError on a corrupt payload. Decoders convert straight
+into a caller provided float32 buffer so no intermediate float arrays are
+allocated.
+"""
+import zlib
+import numpy as np
+from typing import Dict, Type
+
+from src.exceptions.exceptions import ConfigurationError
+
+
+PCM16 = 'pcm16'
+MULAW = 'mulaw'
+ZDELTA = 'zdelta'
+
+PCM_DTYPE = np.dtype('<i2')
+PCM_SCALE = np.float32(1.0 / 32768.0)
+
+MULAW_BIAS = 0x84
+MULAW_CLIP = 8159
+MULAW_SEGMENT_ENDS = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF], dtype=np.int32)
+
+
+def _build_mulaw_tables():
+    """
+    Encode table indexed by the uint16 view of a sample, and decode table of float32 samples
+
+    Follows the reference G.711 conversion, so the codes match audioop.lin2ulaw
+    """
+    samples = np.arange(-32768, 32768, dtype=np.int32)
+    magnitude = samples >> 2
+    negative = magnitude < 0
+    magnitude = np.minimum(np.abs(magnitude), MULAW_CLIP) + (MULAW_BIAS >> 2)
+    mask = np.where(negative, 0x7F, 0xFF)
+
+    segment = np.searchsorted(MULAW_SEGMENT_ENDS, magnitude)
+    codes = (segment << 4) | ((magnitude >> (np.minimum(segment, 7) + 1)) & 0x0F)
+    codes = np.where(segment >= 8, 0x7F, codes) ^ mask
+
+    encode = np.empty(65536, dtype=np.uint8)
+    encode[samples.astype(np.int16).view(np.uint16)] = codes.astype(np.uint8)
+
+    inverted = ~np.arange(256, dtype=np.int32) & 0xFF
+    magnitude = (((inverted & 0x0F) << 3) + MULAW_BIAS) << ((inverted >> 4) & 0x07)
+    decoded = np.where(inverted & 0x80, MULAW_BIAS - magnitude, magnitude - MULAW_BIAS)
+    decode = (decoded * PCM_SCALE).astype(np.float32)
+    return encode, decode
+
+
+MULAW_ENCODE, MULAW_DECODE = _build_mulaw_tables()
+
+
+class AudioDecoder:
+    """Raw 16-bit PCM"""
+
+    encoding = PCM16
+
+    def samples(self, payload: bytes) -> np.ndarray:
+        """
+        View a payload as coded samples, without copying where the encoding allows it
+
+        Args:
+            payload: One binary frame from the client
+
+        Returns:
+            Coded samples, pass them to write()
+
+        Raises:
+            ValueError: If the payload is corrupt
+        """
+        usable = len(payload) - len(payload) % PCM_DTYPE.itemsize
+        return np.frombuffer(payload, dtype=PCM_DTYPE, count=usable // PCM_DTYPE.itemsize)
+
+    def write(self, samples: np.ndarray, out: np.ndarray) -> None:
+        """
+        Convert coded samples to float32 in [-1, 1]
+
+        Args:
+            samples: Result of samples()
+            out: float32 destination of the same length
+        """
+        np.multiply(samples, PCM_SCALE, out=out, casting='unsafe')
+
+    def decode(self, payload: bytes) -> np.ndarray:
+        """
+        Decode a payload into a new float32 array
+
+        Args:
+            payload: One binary frame from the client
+
+        Returns:
+            Mono float32 samples in [-1, 1]
+        """
+        samples = self.samples(payload)
+        out = np.empty(len(samples), dtype=np.float32)
+        self.write(samples, out)
+        return out
+
+
+class MulawDecoder(AudioDecoder):
+    """8-bit mu-law"""
+
+    encoding = MULAW
+
+    def samples(self, payload: bytes) -> np.ndarray:
+        return np.frombuffer(payload, dtype=np.uint8)
+
+    def write(self, samples: np.ndarray, out: np.ndarray) -> None:
+        np.take(MULAW_DECODE, samples, out=out)
+
+
+class ZDeltaDecoder(AudioDecoder):
+    """Deflated 16-bit sample deltas"""
+
+    encoding = ZDELTA
+
+    def __init__(self):
+        self._inflater = zlib.decompressobj()
+        self._previous = np.zeros(1, dtype=PCM_DTYPE)
+
+    def samples(self, payload: bytes) -> np.ndarray:
+        try:
+            planes = np.frombuffer(self._inflater.decompress(payload), dtype=np.uint8)
+        except zlib.error as e:
+            raise ValueError(f"Corrupt zdelta audio frame: {e}")
+        count = len(planes) // 2
+
+        # Low byte plane then high byte plane, back to interleaved samples
+        deltas = np.empty(count, dtype=PCM_DTYPE)
+        deltas.view(np.uint8).reshape(count, 2)[:] = planes[:count * 2].reshape(2, count).T
+
+        # Running sum wraps around exactly like the encoder's differences
+        np.cumsum(deltas, dtype=PCM_DTYPE, out=deltas)
+        deltas += self._previous
+        if count:
+            self._previous[0] = deltas[-1]
+        return deltas
+
+
+class AudioEncoder:
+    """Raw 16-bit PCM"""
+
+    encoding = PCM16
+
+    def encode(self, samples: np.ndarray) -> bytes:
+        """
+        Encode one frame of int16 samples
+
+        Args:
+            samples: Mono int16 samples
+
+        Returns:
+            Payload to send as one binary frame
+        """
+        return np.asarray(samples, dtype=PCM_DTYPE).tobytes()
+
+
+class MulawEncoder(AudioEncoder):
+    """8-bit mu-law"""
+
+    encoding = MULAW
+
+    def encode(self, samples: np.ndarray) -> bytes:
+        return MULAW_ENCODE[np.asarray(samples, dtype=np.int16).view(np.uint16)].tobytes()
+
+
+class ZDeltaEncoder(AudioEncoder):
+    """Deflated 16-bit sample deltas"""
+
+    encoding = ZDELTA
+
+    def __init__(self, level: int = 6):
+        self._deflater = zlib.compressobj(level)
+        self._previous = np.zeros(1, dtype=PCM_DTYPE)
+
+    def encode(self, samples: np.ndarray) -> bytes:
+        samples = np.asarray(samples, dtype=PCM_DTYPE)
+        count = len(samples)
+        if count == 0:
+            return b''
+
+        deltas = np.empty(count, dtype=PCM_DTYPE)
+        np.subtract(samples[:1], self._previous, out=deltas[:1])
+        np.subtract(samples[1:], samples[:-1], out=deltas[1:])
+        self._previous[0] = samples[-1]
+
+        # Split low and high bytes, the high plane of small deltas is nearly constant
+        planes = deltas.view(np.uint8).reshape(count, 2).T.tobytes()
+        return self._deflater.compress(planes) + self._deflater.flush(zlib.Z_SYNC_FLUSH)
+
+
+DECODERS: Dict[str, Type[AudioDecoder]] = {
+    PCM16: AudioDecoder,
+    MULAW: MulawDecoder,
+    ZDELTA: ZDeltaDecoder,
+}
+
+ENCODERS: Dict[str, Type[AudioEncoder]] = {
+    PCM16: AudioEncoder,
+    MULAW: MulawEncoder,
+    ZDELTA: ZDeltaEncoder,
+}
+
+
+def create_decoder(encoding: str) -> AudioDecoder:
+    """
+    Build a decoder for one audio stream
+
+    Args:
+        encoding: 'pcm16', 'mulaw' or 'zdelta'
+
+    Returns:
+        Fresh decoder
+
+    Raises:
+        ConfigurationError: If the encoding is unknown
+    """
+    if encoding not in DECODERS:
+        raise ConfigurationError(f"Unsupported audio encoding: {encoding}")
+    return DECODERS[encoding]()
+
+
+def create_encoder(encoding: str) -> AudioEncoder:
+    """
+    Build an encoder for one audio stream
+
+    Args:
+        encoding: 'pcm16', 'mulaw' or 'zdelta'
+
+    Returns:
+        Fresh encoder
+
+    Raises:
+        ConfigurationError: If the encoding is unknown
+    """
+    if encoding not in ENCODERS:
+        raise ConfigurationError(f"Unsupported audio encoding: {encoding}")
+    return ENCODERS[encoding]()
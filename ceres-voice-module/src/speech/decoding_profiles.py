@@ -0,0 +1,106 @@
+"""
+Whisper decoding profiles.
+
+Whisper's defaults target long-form audio: a temperature fallback cascade
+and conditioning on previously decoded text. Voice commands are a few
+seconds long, so the command profiles decode greedily or with a small beam,
+cap the output length and prime the decoder with the app names and verbs
+the agent understands.
+"""
+from typing import Dict, List, Optional
+
+from src.configs.configs import Config
+from src.exceptions.exceptions import ConfigurationError
+
+
+# App names whose usual spelling is not title case
+SPELLINGS = {
+    'imessage': 'iMessage',
+    'itunes': 'iTunes',
+    'ical': 'iCal',
+}
+
+DECODING_PROFILES: Dict[str, Dict] = {
+    # Greedy, one temperature, short output, vocabulary prompt. Default for voice commands
+    'command-fast': {
+        "beam_size": None,
+        "temperatures": (0.0,),
+        "sample_len": 64,
+        "condition_on_previous_text": False,
+        "vocabulary": True,
+    },
+    # Small beam with a short fallback, for noisy microphones
+    'command-accurate': {
+        "beam_size": 5,
+        "temperatures": (0.0, 0.2, 0.4),
+        "sample_len": 96,
+        "condition_on_previous_text": False,
+        "vocabulary": True,
+    },
+    # Whisper's own defaults, for dictation and long recordings
+    'long-form': {
+        "beam_size": None,
+        "temperatures": (0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+        "sample_len": None,
+        "condition_on_previous_text": True,
+        "vocabulary": False,
+    },
+}
+
+
+def get_decoding_profile(name: Optional[str] = None) -> Dict:
+    """
+    Look up a decoding profile
+
+    Args:
+        name: Profile name, defaults to Config.WHISPER_DECODING_PROFILE
+
+    Returns:
+        Copy of the profile settings with its name and initial prompt filled in
+
+    Raises:
+        ConfigurationError: If the profile is unknown
+    """
+    name = name or Config.WHISPER_DECODING_PROFILE
+    if name not in DECODING_PROFILES:
+        raise ConfigurationError(f"Unknown decoding profile '{name}', choose one of {', '.join(DECODING_PROFILES)}")
+
+    profile = {"name": name, **DECODING_PROFILES[name]}
+    profile["prompt"] = command_vocabulary_prompt() if profile["vocabulary"] and Config.WHISPER_VOCABULARY_PROMPT else None
+    return profile
+
+
+def command_vocabulary_prompt(max_words: Optional[int] = None) -> str:
+    """
+    Build an initial prompt listing command verbs and app names
+
+    Whisper continues the style and spelling of its prompt, so names like
+    "Safari" or "iMessage" come out spelled the way the agent expects.
+
+    Args:
+        max_words: Longest prompt in words, defaults to Config.WHISPER_VOCABULARY_MAX_WORDS
+
+    Returns:
+        Comma separated vocabulary, verbs first
+    """
+    max_words = max_words or Config.WHISPER_VOCABULARY_MAX_WORDS
+
+    terms: List[str] = []
+    for phrases in Config.COMMAND_VERBS.values():
+        terms.extend(phrases)
+    terms.extend(_display_name(app) for app in Config.APP_BUNDLE_IDS)
+    terms.extend(_display_name(alias) for alias in Config.APP_ALIASES)
+
+    words = 0
+    vocabulary: List[str] = []
+    for term in dict.fromkeys(terms):
+        words += len(term.split())
+        if words > max_words:
+            break
+        vocabulary.append(term)
+
+    return ", ".join(vocabulary) + "."
+
+
+def _display_name(name: str) -> str:
+    return SPELLINGS.get(name, name.title())
@@ -0,0 +1,89 @@
+"""
+Whisper model registry.
+
+Loads the configured English Whisper model, optionally with dynamic int8
+quantization of its linear layers for CPU inference, and applies the torch
+thread count.
+"""
+import time
+import logging
+from typing import Dict, Optional
+
+import torch
+import whisper
+
+from src.configs.configs import Config
+from src.exceptions.exceptions import ConfigurationError
+
+
+logger = logging.getLogger(__name__)
+
+
+# Models we ship support for, with their approximate size for logs and docs
+WHISPER_MODELS: Dict[str, Dict] = {
+    'tiny.en': {"parameters": "39M", "notes": "fastest, noticeably less accurate on short commands"},
+    'base.en': {"parameters": "74M", "notes": "default, good balance on CPU"},
+    'small.en': {"parameters": "244M", "notes": "most accurate, slow on CPU without quantization"},
+}
+
+
+def load_whisper_model(name: Optional[str] = None,
+                       quantize: Optional[bool] = None,
+                       threads: Optional[int] = None):
+    """
+    Load a Whisper model from the registry
+
+    Args:
+        name: Registry name, defaults to Config.WHISPER_MODEL
+        quantize: Apply dynamic int8 quantization to linear layers, defaults to Config.WHISPER_QUANTIZE
+        threads: Torch intra-op threads, defaults to Config.WHISPER_THREADS (0 keeps torch's default)
+
+    Returns:
+        Loaded Whisper model in eval mode
+
+    Raises:
+        ConfigurationError: If the model name is not in the registry
+    """
+    name = name or Config.WHISPER_MODEL
+    quantize = Config.WHISPER_QUANTIZE if quantize is None else quantize
+    threads = Config.WHISPER_THREADS if threads is None else threads
+
+    if name not in WHISPER_MODELS:
+        raise ConfigurationError(f"Unknown Whisper model '{name}', choose one of {', '.join(WHISPER_MODELS)}")
+
+    if threads:
+        torch.set_num_threads(threads)
+
+    started = time.perf_counter()
+    # Quantized kernels only run on the CPU
+    model = whisper.load_model(name, device='cpu' if quantize else None)
+    if quantize:
+        model = quantize_model(model)
+
+    logger.info(
+        f"Loaded Whisper {name}{' int8' if quantize else ''} on {model.device} "
+        f"with {torch.get_num_threads()} threads in {time.perf_counter() - started:.2f}s"
+    )
+    return model
+
+
+def quantize_model(model):
+    """
+    Dynamically quantize the linear layers of a Whisper model to int8
+
+    Whisper uses its own Linear subclass, which quantize_dynamic does not
+    recognize, so those layers are turned back into plain nn.Linear first.
+    Their only difference is casting weights to the input dtype, which does
+    not matter for fp32 inference on the CPU.
+
+    Args:
+        model: Whisper model on the CPU
+
+    Returns:
+        The quantized model
+    """
+    for module in model.modules():
+        if type(module) is whisper.model.Linear:
+            module.__class__ = torch.nn.Linear
+
+    return torch.ao.quantization.quantize_dynamic(model.eval(), {torch.nn.Linear}, dtype=torch.qint8)
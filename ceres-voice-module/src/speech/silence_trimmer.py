@@ -0,0 +1,84 @@
+"""
+Energy and zero-crossing voice activity detection for trimming silence.
+
+Utterances from the voice client carry leading silence after the wake word
+prompt and about two seconds of trailing silence from its end-of-speech
+rule. Trimming both, and skipping clips with no speech at all, keeps that
+audio out of the Whisper encoder.
+"""
+import numpy as np
+from typing import Optional, Tuple
+
+from src.configs.configs import Config
+
+
+class SilenceTrimmer:
+    """Finds the speech region of a clip with vectorized per-frame statistics"""
+
+    def __init__(self, energy_threshold: Optional[float] = None,
+                 zcr_threshold: Optional[float] = None,
+                 frame_ms: Optional[int] = None,
+                 padding_ms: Optional[int] = None,
+                 min_speech_ms: Optional[int] = None):
+        """
+        Configure the detector
+
+        Args:
+            energy_threshold: Frame RMS that counts as speech, defaults to Config.VAD_ENERGY_THRESHOLD
+            zcr_threshold: Zero-crossing rate marking quieter unvoiced speech, defaults to Config.VAD_ZCR_THRESHOLD
+            frame_ms: Analysis frame length, defaults to Config.VAD_FRAME_MS
+            padding_ms: Audio kept around the speech region, defaults to Config.VAD_PADDING_MS
+            min_speech_ms: Speech needed for a clip to count as non-silent, defaults to Config.VAD_MIN_SPEECH_MS
+        """
+        self.sample_rate = Config.AUDIO_SAMPLE_RATE
+        self.energy_threshold = energy_threshold or Config.VAD_ENERGY_THRESHOLD
+        self.zcr_threshold = zcr_threshold or Config.VAD_ZCR_THRESHOLD
+        self.frame = self.sample_rate * (frame_ms or Config.VAD_FRAME_MS) // 1000
+        padding_ms = Config.VAD_PADDING_MS if padding_ms is None else padding_ms
+        self.padding = padding_ms * self.sample_rate // 1000 // self.frame
+        self.min_frames = max(1, (min_speech_ms or Config.VAD_MIN_SPEECH_MS) * self.sample_rate // 1000 // self.frame)
+
+    def speech_frames(self, audio: np.ndarray) -> np.ndarray:
+        """
+        Classify each frame of a clip
+
+        Args:
+            audio: Mono float32 samples in [-1, 1]
+
+        Returns:
+            Boolean array with one entry per whole frame, True for speech
+        """
+        count = len(audio) // self.frame
+        frames = audio[:count * self.frame].reshape(count, self.frame)
+
+        rms = np.sqrt(np.einsum('ij,ij->i', frames, frames) / self.frame)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self.frame - 1)
+
+        # Voiced speech is loud, fricatives like "s" and "f" are quieter but cross zero often
+        return (rms >= self.energy_threshold) | ((rms >= self.energy_threshold / 2) & (zcr >= self.zcr_threshold))
+
+    def trim(self, audio: np.ndarray) -> Tuple[np.ndarray, float, float]:
+        """
+        Cut leading and trailing silence
+
+        Args:
+            audio: Mono float32 samples in [-1, 1]
+
+        Returns:
+            (speech region as a view of audio, seconds trimmed at the start, seconds trimmed at the end).
+            The region is empty when the clip holds no speech.
+        """
+        speech = self.speech_frames(audio)
+        if np.count_nonzero(speech) < self.min_frames:
+            return audio[:0], len(audio) / self.sample_rate, 0.0
+
+        indices = np.flatnonzero(speech)
+        start = max(0, int(indices[0]) - self.padding) * self.frame
+        end = min(len(audio), (int(indices[-1]) + 1 + self.padding) * self.frame)
+
+        # A partial frame after the last speech frame is kept when it is within the padding
+        if end == len(speech) * self.frame and self.padding:
+            end = len(audio)
+
+        return audio[start:end], start / self.sample_rate, (len(audio) - end) / self.sample_rate
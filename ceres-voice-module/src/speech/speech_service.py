@@ -0,0 +1,142 @@
+"""
+Speech model lifecycle.
+
+Loads Whisper in the background once the server is up instead of at import
+time, so the server answers health checks and text commands while the model
+loads. torch and whisper are only imported by the load itself, a text-only
+server (CERES_SPEECH=false) never imports them.
+"""
+import asyncio
+import time
+import logging
+from typing import TYPE_CHECKING, Dict, Optional
+
+from src.configs.configs import Config
+from src.exceptions.exceptions import ConfigurationError
+
+if TYPE_CHECKING:
+    from src.speech.transcription_scheduler import TranscriptionScheduler
+
+
+logger = logging.getLogger(__name__)
+
+
+class SpeechService:
+    """Owns the Whisper model and its transcription scheduler"""
+
+    DISABLED = "disabled"
+    IDLE = "idle"
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+
+    # A failed load is retried by the next caller after this many seconds
+    RELOAD_INTERVAL = 30
+
+    def __init__(self, enabled: Optional[bool] = None):
+        """
+        Create the service without loading anything
+
+        Args:
+            enabled: Serve speech at all, defaults to Config.SPEECH_ENABLED
+        """
+        enabled = Config.SPEECH_ENABLED if enabled is None else enabled
+        self._state = self.IDLE if enabled else self.DISABLED
+        self._error: Optional[str] = None
+        self._scheduler: Optional["TranscriptionScheduler"] = None
+        self._load_task: Optional[asyncio.Task] = None
+        self._last_attempt = 0.0
+        self._load_seconds = 0.0
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @property
+    def ready(self) -> bool:
+        """True once the model is loaded, or when nothing is waiting to load"""
+        if self._state == self.IDLE:
+            return not Config.SPEECH_PRELOAD
+        return self._state in (self.READY, self.DISABLED)
+
+    def start(self) -> None:
+        """
+        Begin loading the model in the background. Safe to call more than once.
+
+        Must be called from the event loop.
+        """
+        if self._state == self.DISABLED or self._state == self.READY:
+            return
+        if self._load_task is not None and (
+                not self._load_task.done() or time.monotonic() - self._last_attempt < self.RELOAD_INTERVAL):
+            return
+
+        self._last_attempt = time.monotonic()
+        self._state = self.LOADING
+        self._load_task = asyncio.create_task(asyncio.to_thread(self._load))
+
+    async def get_scheduler(self) -> "TranscriptionScheduler":
+        """
+        Return the transcription scheduler, waiting for a load in progress
+
+        Returns:
+            The running TranscriptionScheduler
+
+        Raises:
+            ConfigurationError: If speech is disabled or the model failed to load
+        """
+        if self._scheduler is not None:
+            return self._scheduler
+
+        if self._state == self.DISABLED:
+            raise ConfigurationError("Speech is disabled on this server (CERES_SPEECH=false)")
+
+        # Lazy load for servers started with CERES_SPEECH_PRELOAD=false
+        self.start()
+        await asyncio.shield(self._load_task)
+
+        if self._scheduler is None:
+            raise ConfigurationError(f"Speech model unavailable: {self._error}")
+        return self._scheduler
+
+    def stop(self) -> None:
+        """Stop the scheduler worker if the model was loaded"""
+        if self._scheduler is not None:
+            self._scheduler.stop()
+
+    def health(self) -> Dict:
+        """
+        Get the lifecycle state of the speech model
+
+        Returns:
+            Dictionary with state, last error, load time and batching counters
+        """
+        health = {
+            "state": self._state,
+            "error": self._error,
+            "model": Config.WHISPER_MODEL if self._state != self.DISABLED else None,
+            "load_seconds": round(self._load_seconds, 4),
+        }
+        if self._scheduler is not None:
+            health["transcription"] = self._scheduler.stats()
+        return health
+
+    def _load(self) -> None:
+        """Import torch and whisper, load the model and start the scheduler, runs on a worker thread"""
+        started = time.perf_counter()
+        try:
+            from src.speech.model_registry import load_whisper_model
+            from src.speech.transcription_scheduler import TranscriptionScheduler
+
+            scheduler = TranscriptionScheduler(load_whisper_model())
+            scheduler.start()
+        except Exception as e:
+            self._state = self.FAILED
+            self._error = str(e)
+            logger.error(f"Could not load Whisper model: {e}")
+            return
+
+        self._load_seconds = time.perf_counter() - started
+        self._scheduler = scheduler
+        self._state = self.READY
+        logger.info(f"Whisper model ready in {self._load_seconds:.2f}s")
@@ -0,0 +1,152 @@
+"""
+Incremental transcription of audio streamed while the user is speaking.
+"""
+import logging
+import numpy as np
+from typing import TYPE_CHECKING, Optional
+
+from src.configs.configs import Config
+from src.speech.audio_codec import AudioDecoder
+from src.speech.silence_trimmer import SilenceTrimmer
+
+if TYPE_CHECKING:
+    # Imports torch, the scheduler is only built once the Whisper model loads
+    from src.speech.transcription_scheduler import TranscriptionScheduler
+
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingTranscriber:
+    """Accumulates streamed audio and produces partial and final transcripts"""
+
+    def __init__(self, scheduler: "TranscriptionScheduler",
+                 window_seconds: Optional[float] = None,
+                 partial_interval: Optional[float] = None,
+                 trimmer: Optional[SilenceTrimmer] = None):
+        """
+        Start an empty streaming session
+
+        Args:
+            scheduler: Scheduler that runs the actual Whisper passes
+            window_seconds: Audio covered by a partial transcript, defaults to Config.STREAM_WINDOW_SECONDS
+            partial_interval: New audio needed before the next partial, defaults to Config.STREAM_PARTIAL_INTERVAL
+            trimmer: Silence trimmer applied before Whisper, None transcribes the audio as is
+        """
+        self.scheduler = scheduler
+        self.trimmer = trimmer
+        self.sample_rate = Config.AUDIO_SAMPLE_RATE
+        self.window_samples = int((window_seconds or Config.STREAM_WINDOW_SECONDS) * self.sample_rate)
+        self.partial_samples = int((partial_interval or Config.STREAM_PARTIAL_INTERVAL) * self.sample_rate)
+
+        self._buffer = np.zeros(self.sample_rate * 4, dtype=np.float32)
+        self._length = 0
+
+        # Samples covered by the last partial transcript and its text
+        self._covered = 0
+        self._last_text = ""
+        # (start, length) of the speech region the last partial transcribed
+        self._last_region = None
+
+    @property
+    def duration(self) -> float:
+        """Seconds of audio received so far"""
+        return self._length / self.sample_rate
+
+    def append(self, audio: np.ndarray) -> None:
+        """
+        Add a frame of float32 audio to the session
+
+        Args:
+            audio: Mono float32 samples in [-1, 1]
+        """
+        needed = self._reserve(len(audio))
+        self._buffer[self._length:needed] = audio
+        self._length = needed
+
+    def append_encoded(self, payload: bytes, decoder: AudioDecoder) -> None:
+        """
+        Decode a frame straight into the session buffer
+
+        Args:
+            payload: Binary audio frame from the client
+            decoder: Decoder for the stream's encoding
+        """
+        samples = decoder.samples(payload)
+        needed = self._reserve(len(samples))
+        decoder.write(samples, self._buffer[self._length:needed])
+        self._length = needed
+
+    def needs_partial(self) -> bool:
+        """True once enough new audio arrived since the last partial transcript"""
+        return self._length - self._covered >= self.partial_samples
+
+    async def partial(self) -> str:
+        """
+        Transcribe the most recent window of audio
+
+        Returns:
+            Partial transcript of the sliding window
+        """
+        end = self._length
+        start = max(0, end - self.window_samples)
+        audio = self._buffer[start:end]
+
+        if self.trimmer is not None:
+            audio, leading, _ = self.trimmer.trim(audio)
+            region = (start + round(leading * self.sample_rate), len(audio))
+
+            # Only silence arrived since the last partial, its text still holds
+            if region == self._last_region:
+                self._covered = end
+                return self._last_text
+            self._last_region = region
+
+        # Nothing said yet, no need to run Whisper
+        text = await self.scheduler.transcribe(audio.copy()) if len(audio) else ""
+
+        self._covered = end
+        self._last_text = text
+        return text
+
+    async def finalize(self) -> str:
+        """
+        Commit the final transcript at end of speech
+
+        The last partial is reused when it already covered the whole utterance
+        and everything received after it is silence, which is the usual case
+        because the client only ends the stream after a stretch of silence.
+
+        Returns:
+            Final transcript for the whole utterance
+        """
+        if self._length == 0:
+            return ""
+
+        if self._covered and self._length <= self.window_samples and self._tail_is_silent():
+            return self._last_text
+
+        audio = self._buffer[:self._length]
+        if self.trimmer is not None:
+            audio, leading, trailing = self.trimmer.trim(audio)
+            logger.info(f"Trimmed {leading:.2f}s leading and {trailing:.2f}s trailing silence")
+            if not len(audio):
+                return ""
+
+        return await self.scheduler.transcribe(audio.copy())
+
+    def _reserve(self, count: int) -> int:
+        """Grow the buffer to fit count more samples, returns the new length"""
+        needed = self._length + count
+        if needed > len(self._buffer):
+            grown = np.zeros(max(needed, len(self._buffer) * 2), dtype=np.float32)
+            grown[:self._length] = self._buffer[:self._length]
+            self._buffer = grown
+        return needed
+
+    def _tail_is_silent(self) -> bool:
+        tail = self._buffer[self._covered:self._length]
+        if len(tail) == 0:
+            return True
+        rms = float(np.sqrt(np.mean(np.square(tail, dtype=np.float32))))
+        return rms < Config.STREAM_SILENCE_RMS
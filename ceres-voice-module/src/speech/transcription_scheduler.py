@@ -0,0 +1,226 @@
+"""
+Whisper transcription scheduler with dynamic micro-batching.
+
+Utterances that arrive close together are gathered into one batch and
+decoded with a single batched encoder/decoder pass on a dedicated worker.
+"""
+import asyncio
+import queue
+import threading
+import time
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+import whisper
+
+from src.configs.configs import Config
+from src.speech.decoding_profiles import get_decoding_profile
+
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptionScheduler:
+    """Batches concurrent transcription requests onto one Whisper worker thread"""
+
+    # Whisper decodes fixed 30 second windows, longer clips use the regular transcribe path
+    MAX_BATCH_SECONDS = 30
+
+    # Same thresholds whisper.transcribe uses to decide a decode needs a fallback
+    COMPRESSION_RATIO_THRESHOLD = 2.4
+    LOGPROB_THRESHOLD = -1.0
+    NO_SPEECH_THRESHOLD = 0.6
+
+    def __init__(self, model, max_batch_size: Optional[int] = None, max_wait_ms: Optional[int] = None,
+                 profile: Optional[str] = None):
+        """
+        Configure the scheduler, the worker thread is created by start()
+
+        Args:
+            model: Loaded Whisper model
+            max_batch_size: Largest batch per pass, defaults to Config.WHISPER_BATCH_SIZE
+            max_wait_ms: How long the first request waits for others, defaults to Config.WHISPER_BATCH_WAIT_MS
+            profile: Decoding profile name, defaults to Config.WHISPER_DECODING_PROFILE
+        """
+        self.model = model
+        self.profile = get_decoding_profile(profile)
+        self.max_batch_size = max(1, max_batch_size or Config.WHISPER_BATCH_SIZE)
+        wait_ms = Config.WHISPER_BATCH_WAIT_MS if max_wait_ms is None else max_wait_ms
+        self.max_wait = wait_ms / 1000.0
+
+        self._queue: "queue.Queue[Optional[Tuple]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._batches = 0
+        self._items = 0
+
+    def start(self) -> None:
+        """Start the worker thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._worker_loop, name="ceres-whisper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Ask the worker thread to exit after the current batch"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    async def transcribe(self, audio: np.ndarray) -> str:
+        """
+        Queue audio for transcription and wait for the text
+
+        Args:
+            audio: Mono float32 audio at 16 kHz in [-1, 1]
+
+        Returns:
+            Transcribed text, stripped
+        """
+        if self._thread is None:
+            self.start()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((audio, loop, future))
+        return await future
+
+    def stats(self) -> Dict:
+        """
+        Get batching statistics
+
+        Returns:
+            Dictionary with batch count, item count and average batch size
+        """
+        return {
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+            "queued": self._queue.qsize(),
+        }
+
+    def _worker_loop(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+
+            # Collect more jobs until the batch is full or the wait window closes
+            batch = [job]
+            deadline = time.monotonic() + self.max_wait
+            stopping = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    job = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if job is None:
+                    stopping = True
+                    break
+                batch.append(job)
+
+            self._run_batch(batch)
+
+            if stopping:
+                return
+
+    def _run_batch(self, batch: List[Tuple]) -> None:
+        # Drop requests whose caller already went away
+        batch = [job for job in batch if not job[2].cancelled()]
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        try:
+            texts = self._transcribe_batch([job[0] for job in batch])
+        except Exception as e:
+            logger.error(f"Batched transcription failed: {e}")
+            for _, loop, future in batch:
+                loop.call_soon_threadsafe(self._set_exception, future, e)
+            return
+
+        self._batches += 1
+        self._items += len(batch)
+        logger.info(f"Transcribed batch of {len(batch)} in {time.perf_counter() - started:.3f}s")
+
+        for (_, loop, future), text in zip(batch, texts):
+            loop.call_soon_threadsafe(self._set_result, future, text)
+
+    def _transcribe_batch(self, clips: List[np.ndarray]) -> List[str]:
+        """
+        Decode short clips in one batched pass, long or low-confidence clips one by one
+
+        Args:
+            clips: Audio arrays to transcribe
+
+        Returns:
+            Transcribed text per clip, in order. Empty for clips Whisper judges to hold no speech
+        """
+        fp16 = self.model.device.type == 'cuda'
+        profile = self.profile
+        can_fall_back = len(profile["temperatures"]) > 1
+        texts: List[Optional[str]] = [None] * len(clips)
+
+        short = [i for i, clip in enumerate(clips) if len(clip) <= self.MAX_BATCH_SECONDS * whisper.audio.SAMPLE_RATE]
+        if short:
+            mels = torch.stack([
+                whisper.log_mel_spectrogram(whisper.pad_or_trim(clips[i]), n_mels=self.model.dims.n_mels)
+                for i in short
+            ]).to(self.model.device)
+
+            options = whisper.DecodingOptions(
+                language="en",
+                without_timestamps=True,
+                fp16=fp16,
+                temperature=profile["temperatures"][0],
+                beam_size=profile["beam_size"],
+                sample_len=profile["sample_len"],
+                prompt=profile["prompt"],
+            )
+            with torch.inference_mode():
+                if profile["beam_size"]:
+                    # Whisper's beam search does not handle batches, encode once and decode clip by clip
+                    features = self.model.embed_audio(mels)
+                    results = [whisper.decode(self.model, feature, options) for feature in features]
+                else:
+                    results = whisper.decode(self.model, mels, options)
+
+            for i, result in zip(short, results):
+                if result.no_speech_prob > self.NO_SPEECH_THRESHOLD and result.avg_logprob < self.LOGPROB_THRESHOLD:
+                    # Noise, an empty transcript never reaches the LLM
+                    texts[i] = ""
+                elif result.compression_ratio > self.COMPRESSION_RATIO_THRESHOLD:
+                    # A repetition loop, only worth decoding again when the profile has a fallback
+                    texts[i] = None if can_fall_back else ""
+                elif result.avg_logprob >= self.LOGPROB_THRESHOLD or not can_fall_back:
+                    texts[i] = result.text.strip()
+
+        for i, text in enumerate(texts):
+            if text is None:
+                texts[i] = self.model.transcribe(
+                    clips[i],
+                    fp16=fp16,
+                    language="en",
+                    temperature=profile["temperatures"],
+                    beam_size=profile["beam_size"],
+                    sample_len=profile["sample_len"],
+                    condition_on_previous_text=profile["condition_on_previous_text"],
+                    initial_prompt=profile["prompt"],
+                ).get("text", "").strip()
+
+        return texts
+
+    @staticmethod
+    def _set_result(future: asyncio.Future, text: str) -> None:
+        if not future.done():
+            future.set_result(text)
+
+    @staticmethod
+    def _set_exception(future: asyncio.Future, error: Exception) -> None:
+        if not future.done():
+            future.set_exception(error)
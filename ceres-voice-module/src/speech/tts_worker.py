@@ -0,0 +1,193 @@
+"""
+Text to speech worker for the voice client.
+
+Speech is synthesized and played on one dedicated thread that owns the
+pyttsx3 engine, fed by a queue, so the event loop keeps listening while the
+assistant talks. Text is rendered to PCM and played through PyAudio in small
+chunks, which lets a new wake word cut the assistant off mid sentence. Fixed
+phrases like "Yes?" are rendered once and kept on disk and in memory.
+
+Rendering goes through ffmpeg because pyttsx3 writes whatever container the
+platform voice produces. Without ffmpeg the worker falls back to speaking
+directly, which still runs off the event loop but cannot be interrupted.
+"""
+import os
+import time
+import queue
+import hashlib
+import logging
+import tempfile
+import threading
+import subprocess
+import numpy as np
+import pyaudio
+import pyttsx3
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+from src.configs.configs import Config
+
+
+logger = logging.getLogger(__name__)
+
+
+class TTSWorker:
+    """Speaks queued text on a background thread, interruptible between audio chunks"""
+
+    SAMPLE_RATE = 22050
+    CHUNK = 1024
+
+    def __init__(self, pyaudio_instance, phrases: Optional[List[str]] = None, cache_dir: Optional[str] = None):
+        """
+        Configure the worker, the thread is started by start()
+
+        Args:
+            pyaudio_instance: pyaudio.PyAudio object used for playback
+            phrases: Fixed phrases rendered ahead of time, defaults to Config.TTS_CACHED_PHRASES
+            cache_dir: Directory for rendered phrases, defaults to Config.TTS_CACHE_DIR
+        """
+        self.pyaudio = pyaudio_instance
+        self.phrases = Config.TTS_CACHED_PHRASES if phrases is None else phrases
+        self.cache_dir = os.path.expanduser(cache_dir or Config.TTS_CACHE_DIR)
+
+        self._queue: "queue.Queue[Optional[Tuple[int, str, Future]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._cache: Dict[str, np.ndarray] = {}
+        self._can_render = True
+        self._engine = None
+        self._output = None
+
+        # Bumped by interrupt(), queued and playing speech from an older generation is dropped
+        self._generation = 0
+        self.speaking = False
+
+    def start(self) -> None:
+        """Start the worker thread and render the fixed phrases on it"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="ceres-tts", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop speaking and let the worker thread exit"""
+        self.interrupt()
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def say(self, text: str) -> Future:
+        """
+        Queue text to be spoken, returns immediately
+
+        Args:
+            text: What to say
+
+        Returns:
+            Future resolved with True once played out, or False if it was interrupted
+        """
+        future: Future = Future()
+        self._queue.put((self._generation, text, future))
+        return future
+
+    def interrupt(self) -> None:
+        """Stop the current speech and drop everything queued, used for barge-in"""
+        self._generation += 1
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if job is None:
+                # Keep a pending shutdown request
+                self._queue.put(None)
+                return
+            job[2].set_result(False)
+
+    def _run(self) -> None:
+        self._engine = pyttsx3.init()
+        self._output = self.pyaudio.open(format=pyaudio.paInt16, channels=1, rate=self.SAMPLE_RATE, output=True)
+        try:
+            for phrase in self.phrases:
+                audio = self._load_cached(phrase)
+                if audio is not None:
+                    self._cache[phrase] = audio
+            logger.info(f"TTS ready with {len(self._cache)} cached phrases")
+
+            while True:
+                job = self._queue.get()
+                if job is None:
+                    return
+                generation, text, future = job
+                if generation != self._generation:
+                    future.set_result(False)
+                    continue
+
+                self.speaking = True
+                try:
+                    future.set_result(self._speak(text, generation))
+                except Exception as e:
+                    logger.error(f"TTS failed: {e}")
+                    future.set_result(False)
+                finally:
+                    self.speaking = False
+        finally:
+            self._output.close()
+
+    def _speak(self, text: str, generation: int) -> bool:
+        audio = self._cache.get(text)
+        if audio is None and self._can_render:
+            audio = self._render(text)
+
+        if audio is None:
+            # No ffmpeg, speak directly and give up on interrupting this utterance
+            self._engine.say(text)
+            self._engine.runAndWait()
+            return generation == self._generation
+
+        for start in range(0, len(audio), self.CHUNK):
+            if generation != self._generation:
+                return False
+            self._output.write(audio[start:start + self.CHUNK].tobytes())
+
+        # write() returns once the device has the audio, not once it has been heard
+        time.sleep(self._output.get_output_latency())
+        return True
+
+    def _load_cached(self, phrase: str) -> Optional[np.ndarray]:
+        """Rendered phrase from the disk cache, rendering and storing it on a miss"""
+        voice = self._engine.getProperty('voice')
+        rate = self._engine.getProperty('rate')
+        key = hashlib.sha1(f"{voice}|{rate}|{phrase}".encode()).hexdigest()
+        path = os.path.join(self.cache_dir, f"{key}.npy")
+
+        if os.path.exists(path):
+            return np.load(path)
+        if not self._can_render:
+            return None
+
+        audio = self._render(phrase)
+        if audio is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            np.save(path, audio)
+        return audio
+
+    def _render(self, text: str) -> Optional[np.ndarray]:
+        """Synthesize text to int16 samples at SAMPLE_RATE, None if ffmpeg is unavailable"""
+        handle, path = tempfile.mkstemp(suffix='.wav')
+        os.close(handle)
+        try:
+            self._engine.save_to_file(text, path)
+            self._engine.runAndWait()
+            output = subprocess.run(
+                ['ffmpeg', '-nostdin', '-loglevel', 'error', '-i', path,
+                 '-f', 's16le', '-ac', '1', '-ar', str(self.SAMPLE_RATE), '-'],
+                capture_output=True, check=True,
+            ).stdout
+            return np.frombuffer(output, dtype=np.int16)
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.warning(f"Could not render speech, speaking directly instead: {e}")
+            self._can_render = False
+            return None
+        finally:
+            os.remove(path)
@@ -0,0 +1,194 @@
+"""
+Voice activity detection engines for the voice client.
+
+    silero-torch  Silero VAD through PyTorch, under inference_mode with pinned threads
+    silero-onnx   the same model through onnxruntime, no torch import at all
+    energy        frame RMS and zero-crossing rate in NumPy, no model
+
+The neural engines sit behind a NumPy energy gate by default: frames too
+quiet to be speech are rejected without running the model, which is where
+an always-listening client spends nearly all of its time.
+"""
+import os
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Type
+
+from src.configs.configs import Config
+from src.exceptions.exceptions import ConfigurationError
+from src.speech.silence_trimmer import SilenceTrimmer
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+
+PCM_SCALE = np.float32(1.0 / 32768.0)
+
+
+class VoiceActivityDetector(ABC):
+    """Base class, engines score one frame of int16 samples at a time"""
+
+    engine = None
+
+    @abstractmethod
+    def speech_probability(self, frame: np.ndarray) -> float:
+        """
+        Score a frame
+
+        Args:
+            frame: Mono int16 samples, 512 per frame at 16 kHz for the Silero engines
+
+        Returns:
+            Probability the frame holds speech
+        """
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        return self.speech_probability(frame) >= Config.VAD_SPEECH_PROBABILITY
+
+    def reset(self) -> None:
+        """Forget recurrent state, call before each new utterance"""
+
+
+class SileroTorchVAD(VoiceActivityDetector):
+    """Silero VAD on PyTorch"""
+
+    engine = 'silero-torch'
+
+    def __init__(self, threads: Optional[int] = None):
+        import torch
+
+        self._torch = torch
+        torch.set_num_threads(threads or Config.VAD_THREADS)
+        self.model, _ = torch.hub.load(repo_or_dir='snakers4/silero-vad', model='silero_vad', force_reload=False)
+
+        # One float buffer shared with its tensor, frames are converted into it in place
+        self._buffer = np.zeros(Config.VAD_FRAME_SAMPLES, dtype=np.float32)
+        self._tensor = torch.from_numpy(self._buffer)
+
+    def speech_probability(self, frame: np.ndarray) -> float:
+        np.multiply(frame, PCM_SCALE, out=self._buffer, casting='unsafe')
+        with self._torch.inference_mode():
+            return self.model(self._tensor, Config.AUDIO_SAMPLE_RATE).item()
+
+    def reset(self) -> None:
+        self.model.reset_states()
+
+
+class SileroOnnxVAD(VoiceActivityDetector):
+    """Silero VAD on onnxruntime"""
+
+    engine = 'silero-onnx'
+
+    # Silero v5 sees the tail of the previous frame along with each new one
+    CONTEXT_SAMPLES = 64
+
+    def __init__(self, model_path: Optional[str] = None, threads: Optional[int] = None):
+        if onnxruntime is None:
+            raise ConfigurationError("The silero-onnx VAD engine needs the onnxruntime package")
+
+        model_path = os.path.expanduser(model_path or Config.VAD_ONNX_PATH)
+        if not os.path.exists(model_path):
+            raise ConfigurationError(f"Silero ONNX model not found at {model_path}, set CERES_VAD_ONNX_PATH")
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads or Config.VAD_THREADS
+        options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(model_path, sess_options=options, providers=['CPUExecutionProvider'])
+
+        self._input = np.zeros((1, self.CONTEXT_SAMPLES + Config.VAD_FRAME_SAMPLES), dtype=np.float32)
+        self._sample_rate = np.array(Config.AUDIO_SAMPLE_RATE, dtype=np.int64)
+        self.reset()
+
+    def speech_probability(self, frame: np.ndarray) -> float:
+        # Keep the previous frame's tail as context, then convert the new frame in after it
+        self._input[0, :self.CONTEXT_SAMPLES] = self._input[0, -self.CONTEXT_SAMPLES:]
+        np.multiply(frame, PCM_SCALE, out=self._input[0, self.CONTEXT_SAMPLES:], casting='unsafe')
+
+        output, self._state = self.session.run(
+            None, {'input': self._input, 'state': self._state, 'sr': self._sample_rate}
+        )
+        return float(output[0, 0])
+
+    def reset(self) -> None:
+        self._state = np.zeros((2, 1, 128), dtype=np.float32)
+        self._input[:] = 0.0
+
+
+class EnergyVAD(VoiceActivityDetector):
+    """Frame energy and zero-crossing rate, the same rule the server trims silence with"""
+
+    engine = 'energy'
+
+    def __init__(self):
+        frame_ms = Config.VAD_FRAME_SAMPLES * 1000 // Config.AUDIO_SAMPLE_RATE
+        self.trimmer = SilenceTrimmer(frame_ms=frame_ms)
+        self._buffer = np.zeros(Config.VAD_FRAME_SAMPLES, dtype=np.float32)
+
+    def speech_probability(self, frame: np.ndarray) -> float:
+        np.multiply(frame, PCM_SCALE, out=self._buffer, casting='unsafe')
+        return 1.0 if self.trimmer.speech_frames(self._buffer).any() else 0.0
+
+
+class EnergyGate(VoiceActivityDetector):
+    """Rejects frames quieter than speech before they reach a neural engine"""
+
+    def __init__(self, detector: VoiceActivityDetector, threshold: Optional[float] = None):
+        """
+        Wrap an engine
+
+        Args:
+            detector: Engine that scores the frames passing the gate
+            threshold: Frame RMS of float audio below which a frame is silence, defaults to Config.VAD_GATE_RMS
+        """
+        self.detector = detector
+        self.engine = detector.engine
+        # Compared against the int16 sum of squares, no float conversion for gated frames
+        threshold = Config.VAD_GATE_RMS if threshold is None else threshold
+        self._energy = (threshold * 32768.0) ** 2 * Config.VAD_FRAME_SAMPLES
+        self.gated = 0
+        self.scored = 0
+
+    def speech_probability(self, frame: np.ndarray) -> float:
+        samples = frame.astype(np.int64)
+        if np.dot(samples, samples) < self._energy:
+            self.gated += 1
+            return 0.0
+        self.scored += 1
+        return self.detector.speech_probability(frame)
+
+    def reset(self) -> None:
+        self.detector.reset()
+
+
+VAD_ENGINES: Dict[str, Type[VoiceActivityDetector]] = {
+    SileroTorchVAD.engine: SileroTorchVAD,
+    SileroOnnxVAD.engine: SileroOnnxVAD,
+    EnergyVAD.engine: EnergyVAD,
+}
+
+
+def create_vad(engine: Optional[str] = None, gate: Optional[bool] = None) -> VoiceActivityDetector:
+    """
+    Build a voice activity detector
+
+    Args:
+        engine: 'silero-torch', 'silero-onnx' or 'energy', defaults to Config.VAD_ENGINE
+        gate: Put the energy gate in front of a neural engine, defaults to Config.VAD_GATE
+
+    Returns:
+        Ready detector
+
+    Raises:
+        ConfigurationError: If the engine is unknown or cannot be loaded
+    """
+    engine = engine or Config.VAD_ENGINE
+    gate = Config.VAD_GATE if gate is None else gate
+    if engine not in VAD_ENGINES:
+        raise ConfigurationError(f"Unknown VAD engine '{engine}', choose one of {', '.join(VAD_ENGINES)}")
+
+    detector = VAD_ENGINES[engine]()
+    if gate and engine != EnergyVAD.engine:
+        detector = EnergyGate(detector)
+    return detector
@@ -0,0 +1,209 @@
+"""
+Request metrics in the Prometheus text format.
+
+Every request gets a RequestTimer that collects how long each stage took.
+The stages are observed into one histogram when the request finishes, so
+all of them carry the command type and cache outcome that are only known
+part way through. Code deeper in the pipeline records into the active
+timer with the stage() context manager, without the timer being passed down.
+
+    ceres_stage_duration_seconds{stage, command_type, cache}
+    ceres_llm_tokens_total{kind}
+    ceres_subprocess_spawns_total{kind}
+    ceres_errors_total{stage}
+
+Counters live in the server process, work done in 'process' mode execution
+workers is not counted.
+"""
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Cumulative bucket histogram with labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: count per bucket (last is +Inf), sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += count
+                    le = 'le="+Inf"' if bound == float('inf') else f'le="{bound:g}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total[0]:.6f}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds the metrics and renders them for /metrics"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format 0.0.4"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+STAGE_DURATION = registry.histogram(
+    'ceres_stage_duration_seconds', 'Time spent in each request stage', ('stage', 'command_type', 'cache')
+)
+LLM_TOKENS = registry.counter('ceres_llm_tokens_total', 'Gemini tokens by kind', ('kind',))
+SUBPROCESS_SPAWNS = registry.counter('ceres_subprocess_spawns_total', 'Processes started to run commands', ('kind',))
+ERRORS = registry.counter('ceres_errors_total', 'Failed requests by the stage that failed', ('stage',))
+
+
+class RequestTimer:
+    """Collects stage timings for one request and observes them when it finishes"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.command_type = 'none'
+        # 'router', 'exact', 'semantic' or 'miss', 'none' when the request never got that far
+        self.cache = 'none'
+        self._stages: List[Tuple[str, float]] = []
+        self._finished = False
+
+    def add(self, stage: str, seconds: float) -> None:
+        self._stages.append((stage, seconds))
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    @contextmanager
+    def activate(self) -> Iterator["RequestTimer"]:
+        """Make this the timer stage() records into, and finish it on exit"""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+            self.finish()
+
+    def finish(self) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        self.add('total', time.perf_counter() - self.started)
+        for stage_name, seconds in self._stages:
+            STAGE_DURATION.observe(seconds, stage=stage_name, command_type=self.command_type, cache=self.cache)
+
+
+_current: contextvars.ContextVar[Optional[RequestTimer]] = contextvars.ContextVar('ceres_request_timer', default=None)
+
+
+def current_timer() -> Optional[RequestTimer]:
+    """The timer of the request being handled, None outside a request"""
+    return _current.get()
+
+
+def label(command_type: Optional[str] = None, cache: Optional[str] = None) -> None:
+    """Set labels on the current request's timer, does nothing outside a request"""
+    timer = _current.get()
+    if timer is None:
+        return
+    if command_type is not None:
+        timer.command_type = command_type
+    if cache is not None:
+        timer.cache = cache
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block as a stage of the current request, does nothing outside a request"""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+def record_error(stage_name: str) -> None:
+    ERRORS.inc(stage=stage_name)
@@ -2,72 +2,169 @@
 Response cleaning and processing module.
 """
 import re
+from typing import List, Optional
 
-class ResponseCleaner:
-    @staticmethod
-    def sanitize_response(response_text: str) -> str:
+
+FENCE = '```'
+FENCE_TAG = re.compile(r'\w*')
+OSASCRIPT_PATTERN = re.compile(r"^\s*osascript\s+-e\s+['\"](.+)['\"]\s*$")
+LANGUAGE_IDENTIFIERS = frozenset(['bash', 'sh', 'zsh', 'applescript', 'python', 'shell', 'javascript', 'js'])
+APPLESCRIPT_COMMENT_KEYWORDS = ('tell', 'end', 'set', 'on', 'try', 'error')
+
+
+class StreamingCleaner:
+    """
+    Cleans an AI response chunk by chunk
+
+    Lines of the first code block are filtered as they arrive, and feed()
+    returns the command as soon as the block is closed, so execution does not
+    have to wait for the rest of the response. Without a complete code block
+    the whole response is cleaned by finish().
+    """
+
+    def __init__(self):
+        self._buffer = ''
+        self._fence = -1          # Index of the opening fence
+        self._content_start = -1  # Index where the fenced command starts
+        self._line_start = -1     # Start of the first line not processed yet
+        self._scan = 0            # No fence was found before this index
+        self._lines: List[str] = []
+        self._header: Optional[str] = None
+        self._seen_first = False
+        self.command: Optional[str] = None
+
+    @property
+    def complete(self) -> bool:
+        return self.command is not None
+
+    def feed(self, chunk: str) -> Optional[str]:
         """
-        Enhanced response cleaning with better parsing
-        
+        Add the next piece of the response
+
         Args:
-            response_text: Raw response from AI
-            
+            chunk: Text as received from the AI service
+
         Returns:
-            Cleaned command text
+            The cleaned command once the code block is closed, otherwise None
         """
-        text = response_text.strip()
+        if self.command is not None:
+            return self.command
 
-        if not text:
-            return ""
-        
+        self._buffer += chunk
+        buffer = self._buffer
+
+        if self._fence < 0:
+            fence = buffer.find(FENCE, self._scan)
+            if fence < 0:
+                self._scan = max(0, len(buffer) - 2)
+                return None
+            self._fence = fence
+
+        if self._content_start < 0:
+            tag_end = FENCE_TAG.match(buffer, self._fence + 3).end()
+            if tag_end == len(buffer):
+                # The language tag may continue in the next chunk
+                return None
+            self._content_start = tag_end + 1 if buffer[tag_end] == '\n' else self._fence + 3
+            self._line_start = self._scan = self._content_start
 
-        # Remove markdown code blocks
-        if '```' in text:
-            code_block_pattern = r'```(?:[\w]*\n)?(.*?)```'
-            match = re.search(code_block_pattern, text, re.DOTALL)
-            if match:
-                text = match.group(1).strip()
+        close = buffer.find(FENCE, self._scan)
+        if close < 0:
+            last_newline = buffer.rfind('\n', self._line_start)
+            if last_newline >= 0:
+                self._take_lines(buffer[self._line_start:last_newline])
+                self._line_start = last_newline + 1
+            self._scan = max(self._line_start, len(buffer) - 2)
+            return None
+
+        self._take_lines(buffer[self._line_start:close])
+        self.command = self._finish(buffer[self._content_start:close])
+        return self.command
+
+    def finish(self) -> str:
+        """
+        Mark the response as complete
+
+        Returns:
+            The cleaned command, empty if nothing usable was received
+        """
+        if self.command is None:
+            # No complete code block, the whole response is the command
+            self._reset_lines()
+            self._take_lines(self._buffer.strip())
+            self.command = self._finish(self._buffer)
+        return self.command
 
+    def _finish(self, text: str) -> str:
         # Normalize AI outputs like: osascript -e 'tell application "Calculator" to activate'
-        osascript_match = re.match(r"^\s*osascript\s+-e\s+['\"](.+)['\"]\s*$", text)
+        osascript_match = OSASCRIPT_PATTERN.match(text.strip())
         if osascript_match:
-            text = osascript_match.group(1).strip()
+            self._reset_lines()
+            self._take_lines(osascript_match.group(1).strip())
 
-        # Remove language identifiers at start
-        first_line = text.split('\n', 1)[0].lower().strip()
-        language_identifiers = ['bash', 'sh', 'zsh', 'applescript', 'python', 'shell', 'javascript', 'js']
-       
+        # A language identifier on its own is the command, not a tag
+        if self._header is not None:
+            self._take_line(self._header, self._header.strip())
 
-        if first_line in language_identifiers:
-                lines = text.split('\n', 1)
-                if len(lines) > 1:
-                    text = lines[1]
+        return '\n'.join(self._lines).strip()
 
-        # Clean up comments but preserve important AppleScript comments
-        lines = text.splitlines()
-        cleaned_lines = []
-            
-        for line in lines:
-            stripped = line.strip()
-            
-            # Skip empty lines
-            if not stripped:
-                continue
-                
-            # Skip basic shell comments, but keep AppleScript structure
-            if stripped.startswith('#') and 'applescript' not in stripped.lower():
+    def _reset_lines(self) -> None:
+        self._lines = []
+        self._header = None
+        self._seen_first = False
+
+    def _take_lines(self, text: str) -> None:
+        # Text arrives split on '\n' only, the other str.splitlines() breaks
+        # (\r, \x0b, \x1c, \u2028, ...) end a line but not the identifier line
+        for raw in text.split('\n'):
+            if not raw.strip():
                 continue
-                
-            # Keep AppleScript comments that contain structural keywords
-            if stripped.startswith('--'):
-                applescript_keywords = ['tell', 'end', 'set', 'on', 'try', 'error']
-                if not any(keyword in stripped.lower() for keyword in applescript_keywords):
+
+            # Hold back a leading language identifier until we know more lines follow
+            if not self._seen_first:
+                self._seen_first = True
+                if raw.strip().lower() in LANGUAGE_IDENTIFIERS:
+                    self._header = raw
                     continue
-            
-            cleaned_lines.append(line)
+            else:
+                self._header = None
+
+            for line in raw.splitlines():
+                stripped = line.strip()
+
+                # Skip empty lines
+                if stripped:
+                    self._take_line(line, stripped)
+
+    def _take_line(self, line: str, stripped: str) -> None:
+        # Skip basic shell comments, but keep AppleScript structure
+        if stripped.startswith('#') and 'applescript' not in stripped.lower():
+            return
+
+        # Keep AppleScript comments that contain structural keywords
+        if stripped.startswith('--'):
+            if not any(keyword in stripped.lower() for keyword in APPLESCRIPT_COMMENT_KEYWORDS):
+                return
+
+        self._lines.append(line)
+
+
+class ResponseCleaner:
+    @staticmethod
+    def sanitize_response(response_text: str) -> str:
+        """
+        Enhanced response cleaning with better parsing
         
-        return '\n'.join(cleaned_lines).strip()
-   
+        Args:
+            response_text: Raw response from AI
+            
+        Returns:
+            Cleaned command text
+        """
+        cleaner = StreamingCleaner()
+        cleaner.feed(response_text)
+        return cleaner.finish()
+
     @staticmethod
     def enhance_applescript_command(command: str, user_request: str) -> str:
         """
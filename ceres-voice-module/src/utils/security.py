@@ -1,10 +1,9 @@
 """
 Security validation module for command execution.
 """
-import re
 import shlex
-from src.configs.configs import Config
 from src.exceptions.exceptions import SecurityError
+from src.utils.security_policy import SecurityPolicy
 
 
 class SecurityValidator:
@@ -14,7 +13,8 @@ class SecurityValidator:
         """Initialize security validator with patterns"""
         print("Passed till  Security Constructer")
 
-        self.danger_regex = re.compile('|'.join(Config.DANGEROUS_PATTERN), re.IGNORECASE)
+        self.policy = SecurityPolicy()
+        self.danger_regex = self.policy.danger_regex
 
         print("Passed Security Constructer")
     
@@ -28,13 +28,10 @@ class SecurityValidator:
         Raises:
             SecurityError: If dangerous patterns are detected
         """
-        if self.danger_regex.search(command):
-            raise SecurityError(f"Potentially dangerous command detected: {command}")
-        
-        # Additional checks for file operations on system directories
-        if any(pattern in command.lower() for pattern in ['/system/', '/usr/bin/', '/etc/']):
-            if any(op in command.lower() for op in ['rm', 'del', 'delete', 'format']):
-                raise SecurityError(f"Attempt to modify system files detected: {command}")
+        # Dangerous patterns and system path rules are evaluated in one pass, verdicts are cached
+        reason = self.policy.check(command)
+        if reason is not None:
+            raise SecurityError(reason)
     
     @staticmethod
     def escape_applescript_string(text: str) -> str:
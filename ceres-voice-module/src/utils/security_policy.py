@@ -0,0 +1,426 @@
+"""
+Single-pass security policy for shell commands.
+
+The command is tokenized once with a shell-aware tokenizer and split into
+pipeline segments. Every Config.DANGEROUS_PATTERN rule is evaluated by one
+precompiled matcher, and the path rules look at the actual command words,
+arguments and redirection targets of each segment instead of substrings of
+the whole line. Paths are normalized against the working directory the
+command will run in, and words the shell expands at run time ($VAR, $'...',
+command substitution, globs that could reach a protected path) count as
+protected. Verdicts are kept in an LRU keyed by the command hash.
+"""
+import re
+import posixpath
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from src.configs.configs import Config
+
+
+# Operators that end one command and start the next
+SEGMENT_OPERATORS = {'|', '||', '&&', ';', '&', ';;', '|&', '\n'}
+REDIRECT_OPERATORS = {'>', '>>', '>|', '&>', '&>>', '<>', '>&'}
+
+# Words that run the command after them
+COMMAND_WRAPPERS = {'sudo', 'env', 'nohup', 'time', 'nice', 'xargs', 'command', 'exec', 'builtin'}
+# find/xargs style flags whose next word is a command
+EXEC_FLAGS = {'-exec', '-execdir', '-ok', '-okdir'}
+# Shells whose -c argument, or stdin, is a command line of its own
+SHELLS = {'sh', 'bash', 'zsh', 'dash', 'ksh'}
+# Shell options that take a value, e.g. "bash -o pipefail -c ..."
+SHELL_VALUE_OPTIONS = {'-o', '+o', '-O', '+O'}
+# Levels of sh -c / eval followed, deeper nesting is blocked outright
+MAX_NESTING = 4
+# Returned by _nested_commands for a shell that reads its script from stdin
+FROM_STDIN = None
+
+# Subshells and groups are flattened into segments so their commands get checked too.
+# Braces only group as separate words, inside a word they are brace expansion
+NESTING = re.compile(r'\$\(|[`()]|(?<![^\s;&|])[{}](?![^\s;&|])')
+ENV_ASSIGNMENT = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*=')
+
+# Operators, words with their quoting, and anything else that is not a blank,
+# which is an unclosed quote or a trailing backslash. Quoted strings are matched
+# whole, so operators inside them stay part of the word
+TOKENS = re.compile(r"""
+    ([;&|<>]+|\n)
+  | ((?:[^\s'"\\;&|<>]+|\\.|'[^']*'|"(?:[^"\\]|\\.)*")+)
+  | (\S)
+""", re.VERBOSE | re.DOTALL)
+QUOTING = re.compile(r'\\(.)|\'([^\']*)\'|"((?:[^"\\]|\\.)*)"', re.DOTALL)
+ESCAPE = re.compile(r'\\(.)', re.DOTALL)
+
+# Expanded by the shell at run time, what they stand for cannot be known here
+UNRESOLVED = re.compile(r'[$`]')
+GLOB = re.compile(r'[*?\[{]')
+
+# Anything that can make a command destructive or hide what it touches. Commands
+# without any of these are allowed without tokenizing
+PATH_RULE_TRIGGERS = ['-delete', '>', '$', '`']
+# Quotes and escapes are dropped before looking for triggers, so r''m still reads rm
+UNQUOTE = str.maketrans('', '', '\'"\\')
+
+# Placeholder find -exec replaces with the found paths, find's own roots are checked instead
+FIND_PLACEHOLDER = '{}'
+
+
+class SecurityPolicy:
+    """Evaluates all security rules for a command in one pass"""
+
+    def __init__(self, cache_size: Optional[int] = None):
+        """
+        Precompile the rules
+
+        Args:
+            cache_size: Verdicts kept in the LRU, defaults to Config.SECURITY_VERDICT_CACHE_SIZE
+        """
+        self.cache_size = cache_size or Config.SECURITY_VERDICT_CACHE_SIZE
+        self.max_length = Config.SECURITY_MAX_COMMAND_LENGTH
+        self.protected_paths = tuple(path.lower().rstrip('/') for path in Config.PROTECTED_PATHS)
+        self.destructive_commands = frozenset(Config.DESTRUCTIVE_COMMANDS)
+        # Commands run in the home directory, relative paths are resolved against it
+        self.home = Config.get_home_directory().lower().rstrip('/') or '/'
+        triggers = [command.lower() for command in Config.DESTRUCTIVE_COMMANDS] + PATH_RULE_TRIGGERS
+        self.path_rule_trigger = re.compile('|'.join(re.escape(trigger) for trigger in triggers))
+
+        # One alternation over every rule. Rules starting with a word must start at
+        # a word boundary, so "format" in "reformat" does not match
+        anchored = [self._anchor(pattern) for pattern in Config.DANGEROUS_PATTERN]
+        self.danger_regex = re.compile('|'.join(anchored), re.IGNORECASE)
+        # Individual rules, only used to name the rule once the alternation matched
+        self._rules = [
+            (pattern, re.compile(rule, re.IGNORECASE)) for pattern, rule in zip(Config.DANGEROUS_PATTERN, anchored)
+        ]
+        # Word rules that are also plain flags or file names ("--format", "disk.format"). Call
+        # rules like system\s*\( must match after '.', that is how os.system( is written
+        self._flag_like_rules = frozenset(
+            pattern for pattern in Config.DANGEROUS_PATTERN if re.match(r'\w', pattern) and r'\(' not in pattern
+        )
+
+        self._verdicts: "OrderedDict[bytes, Optional[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def check(self, command: str) -> Optional[str]:
+        """
+        Evaluate a command
+
+        Args:
+            command: Shell command to check
+
+        Returns:
+            Reason the command is blocked, or None if it is allowed
+        """
+        key = hashlib.blake2b(command.encode('utf-8', errors='surrogatepass'), digest_size=16).digest()
+        with self._lock:
+            if key in self._verdicts:
+                self._verdicts.move_to_end(key)
+                self._stats["hits"] += 1
+                return self._verdicts[key]
+            self._stats["misses"] += 1
+
+        verdict = self._evaluate(command)
+
+        with self._lock:
+            self._verdicts[key] = verdict
+            if len(self._verdicts) > self.cache_size:
+                self._verdicts.popitem(last=False)
+        return verdict
+
+    def segments(self, command: str) -> Tuple[List[List[str]], List[str]]:
+        """
+        Split a command into pipeline segments
+
+        Args:
+            command: Shell command
+
+        Returns:
+            (segments as word lists, redirection targets)
+
+        Raises:
+            ValueError: If the command cannot be tokenized, e.g. an unclosed quote
+        """
+        segments: List[List[str]] = [[]]
+        redirects: List[str] = []
+        redirect_next = False
+
+        for operator, word, invalid in TOKENS.findall(self._flatten(command)):
+            if invalid:
+                raise ValueError(f"Cannot tokenize command, unmatched {invalid!r}")
+
+            if operator:
+                if operator in SEGMENT_OPERATORS:
+                    segments.append([])
+                elif operator in REDIRECT_OPERATORS or operator == '<':
+                    redirect_next = operator != '<'
+                else:
+                    segments[-1].append(operator)
+                continue
+
+            # Quoted or escaped operators like \; are plain words
+            if "'" in word or '"' in word or '\\' in word:
+                word = QUOTING.sub(self._unquote, word)
+
+            if redirect_next:
+                redirects.append(word)
+                redirect_next = False
+            else:
+                segments[-1].append(word)
+
+        return [segment for segment in segments if segment], redirects
+
+    def stats(self) -> Dict:
+        return {**self._stats, "entries": len(self._verdicts)}
+
+    def clear(self) -> None:
+        """Forget every cached verdict"""
+        with self._lock:
+            self._verdicts.clear()
+
+    def _evaluate(self, command: str, depth: int = 0) -> Optional[str]:
+        # Bounds the regex work on runaway model output
+        if len(command) > self.max_length:
+            return f"Command longer than {self.max_length} characters"
+        if depth > MAX_NESTING:
+            return f"Command nests shells more than {MAX_NESTING} levels deep: {command}"
+
+        rule = self._match_rule(command)
+        if rule is not None:
+            return f"Potentially dangerous command detected (rule {rule!r}): {command}"
+
+        # Path rules need a destructive command, a redirection or something the shell
+        # expands, skip tokenizing otherwise
+        if not self.path_rule_trigger.search(command.lower().translate(UNQUOTE)):
+            return None
+
+        try:
+            segments, redirects = self.segments(command)
+        except ValueError:
+            # Unbalanced quotes, fall back to a conservative word scan
+            segments, redirects = [command.split()], []
+
+        # Follow cd through the segments, None once the directory cannot be known
+        cwd: Optional[str] = self.home
+        changes_directory = False
+        nested_commands = set()
+        for words in segments:
+            if words[0] in ('cd', 'pushd'):
+                cwd = self._change_directory(words[1:], cwd)
+                changes_directory = True
+                continue
+
+            # sh -c '...' and eval '...' run a command line this tokenizer only sees as one word
+            nested = self._nested_command(words)
+            if nested is FROM_STDIN:
+                # e.g. "echo 'rm /etc/hosts' | sh", whatever the other segments print could be the script
+                for other in segments:
+                    if other is not words:
+                        nested_commands.add(' '.join(other[1:]))
+                        nested_commands.update(word for word in other if ' ' in word or '\n' in word)
+            elif nested:
+                nested_commands.add(nested)
+
+            if self._modifies_protected_path(words, cwd):
+                return f"Attempt to modify system files detected: {command}"
+
+        for nested in nested_commands:
+            reason = self._evaluate(nested, depth + 1)
+            if reason is not None:
+                return reason
+
+        # Redirections are not tied to their segment, after a cd relative targets are unknown
+        redirect_cwd = None if changes_directory else self.home
+        for target in redirects:
+            if self._is_protected(target, redirect_cwd):
+                return f"Attempt to modify system files detected: {command}"
+
+        return None
+
+    def _match_rule(self, command: str) -> Optional[str]:
+        """Return the first dangerous pattern in the command, ignoring matches inside flags or file names"""
+        position = 0
+        while True:
+            match = self.danger_regex.search(command, position)
+            if match is None:
+                return None
+
+            start = match.start()
+            text = match.group()
+            rule = next((pattern for pattern, compiled in self._rules if compiled.match(text)), text)
+            # \b also matches after '-' and '.', e.g. "--format" or "file.format"
+            if start == 0 or command[start - 1] not in '-.' or rule not in self._flag_like_rules:
+                return rule
+            position = start + 1
+
+    def _nested_command(self, words: List[str]) -> Optional[str]:
+        """
+        Command line a segment hands to a shell
+
+        Args:
+            words: Words of the segment
+
+        Returns:
+            The -c script of sh/bash/zsh or the arguments of eval, empty if nothing is
+            handed on, FROM_STDIN for a shell that reads its script from stdin
+        """
+        for index, word in enumerate(words):
+            name = word.rsplit('/', 1)[-1].lower()
+            if name == 'eval':
+                return ' '.join(words[index + 1:])
+            if name not in SHELLS:
+                continue
+
+            options = iter(words[index + 1:])
+            for option in options:
+                if option in SHELL_VALUE_OPTIONS:
+                    next(options, None)
+                elif option.startswith('-') and not option.startswith('--') and 'c' in option:
+                    return next(options, '')
+                elif not option.startswith(('-', '+')):
+                    # A script file, its content cannot be checked here
+                    return ''
+            return FROM_STDIN
+        return ''
+
+    def _modifies_protected_path(self, words: List[str], cwd: Optional[str]) -> bool:
+        """True if a destructive command in this segment touches a protected path"""
+        destructive = False
+        expect_command = True
+        wrapped = False
+        # xargs passes the command operands read from stdin, which cannot be checked
+        from_stdin = False
+        operands = []
+
+        for word in words:
+            if expect_command:
+                if ENV_ASSIGNMENT.match(word):
+                    continue
+                name = word.rsplit('/', 1)[-1].lower()
+                if name in COMMAND_WRAPPERS:
+                    wrapped = True
+                    from_stdin = from_stdin or name == 'xargs'
+                    continue
+                # A command word like $CMD could be anything
+                destructive = destructive or name in self.destructive_commands or bool(UNRESOLVED.search(name))
+                expect_command = False
+                continue
+
+            if word in EXEC_FLAGS:
+                expect_command = True
+            elif word == '-delete':
+                destructive = True
+            elif wrapped and word.rsplit('/', 1)[-1].lower() in self.destructive_commands:
+                # Wrapper options like "sudo -u root rm" hide the command word
+                destructive = True
+            operands.append(word)
+
+        if not destructive:
+            return False
+        if from_stdin:
+            return True
+        return any(
+            self._is_protected(word.split('=', 1)[-1], cwd) for word in operands if word != FIND_PLACEHOLDER
+        )
+
+    def _is_protected(self, word: str, cwd: Optional[str]) -> bool:
+        """True if the word is, contains or may expand to a protected path"""
+        if UNRESOLVED.search(word):
+            return True
+
+        # For a glob only the part before the first wildcard is known
+        glob = GLOB.search(word)
+        if glob is not None:
+            word = word[:glob.start()]
+
+        path = self._normalize(word, cwd)
+        if path is None:
+            return True
+
+        if glob is not None and word and not word.endswith('/'):
+            # Ends inside a name, "/e*" reaches "/etc"
+            prefix = path
+        else:
+            prefix = path.rstrip('/') + '/'
+
+        for protected in self.protected_paths:
+            # The path itself, inside it, or a directory holding it ("rm -r /usr", "find / -delete")
+            if path == protected or path.startswith(protected + '/') or protected.startswith(prefix):
+                return True
+        return False
+
+    def _normalize(self, path: str, cwd: Optional[str]) -> Optional[str]:
+        """Absolute, normalized, lower-case path, None if it depends on an unknown directory"""
+        path = path.lower()
+        if path == '~' or path.startswith('~/'):
+            path = self.home + path[1:]
+        elif path.startswith('~'):
+            # ~user
+            return None
+        elif not path.startswith('/'):
+            if cwd is None:
+                return None
+            path = f"{cwd}/{path}"
+
+        path = posixpath.normpath(path)
+        # normpath keeps a leading "//", the kernel treats it as "/"
+        if path.startswith('//'):
+            path = '/' + path.lstrip('/')
+        return path
+
+    def _change_directory(self, arguments: List[str], cwd: Optional[str]) -> Optional[str]:
+        targets = [argument for argument in arguments if not argument.startswith('-')]
+        if not targets:
+            return None if arguments else self.home
+        if UNRESOLVED.search(targets[0]) or GLOB.search(targets[0]):
+            return None
+        return self._normalize(targets[0], cwd)
+
+    @staticmethod
+    def _unquote(match) -> str:
+        escaped, single, double = match.groups()
+        if escaped is not None:
+            return escaped
+        if single is not None:
+            return single
+        return ESCAPE.sub(r'\1', double)
+
+    @staticmethod
+    def _flatten(command: str) -> str:
+        """
+        Turn subshells, groups and command substitutions into segment breaks
+
+        A substitution leaves a '$' word where its output would go, so
+        "rm $(echo /etc/hosts)" still has an operand that cannot be resolved.
+        """
+        if NESTING.search(command) is None:
+            return command
+
+        closers: List[str] = []
+        in_backticks = False
+
+        def replace(match) -> str:
+            nonlocal in_backticks
+            token = match.group()
+            if token == '$(':
+                closers.append(' ; $ ')
+                return ' $ ; '
+            if token == '(':
+                closers.append(' ; ')
+                return ' ; '
+            if token == ')':
+                return closers.pop() if closers else ' ; '
+            if token == '`':
+                in_backticks = not in_backticks
+                return ' $ ; ' if in_backticks else ' ; $ '
+            return ' ; '
+
+        return NESTING.sub(replace, command)
+
+    @staticmethod
+    def _anchor(pattern: str) -> str:
+        if re.match(r'\w', pattern):
+            return rf'\b{pattern}'
+        return pattern
@@ -0,0 +1,160 @@
+"""
+Frame protocol for the /ws/execute socket.
+
+Clients send one frame per command, as JSON text or msgpack binary:
+
+    {"v": 1, "id": "42", "type": "execute", "command": "open safari"}
+
+and receive frames tagged with the same id, in the same encoding:
+
+    {"v": 1, "id": "42", "type": "status", "status": "received" | "executing"}
+    {"v": 1, "id": "42", "type": "progress", "text": "..."}
+    {"v": 1, "id": "42", "type": "output", "lines": [["stdout", "..."], ...]}
+    {"v": 1, "id": "42", "type": "result", "ok": true, "messages": [...]}
+    {"v": 1, "id": "42", "type": "error", "error": "..."}
+
+Several commands may be in flight on one socket, their frames interleave and
+results arrive in completion order.
+"""
+import json
+import time
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import WebSocket
+
+from src.configs.configs import Config
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+PROTOCOL_VERSION = 1
+
+JSON = 'json'
+MSGPACK = 'msgpack'
+
+
+class ProtocolError(ValueError):
+    """A frame that is not a valid protocol message"""
+
+
+def decode_frame(message: Dict) -> Tuple[Optional[Dict], str]:
+    """
+    Decode a raw websocket message
+
+    Args:
+        message: Message from WebSocket.receive()
+
+    Returns:
+        (frame or None for a legacy plain text command, encoding)
+
+    Raises:
+        ProtocolError: If the frame cannot be decoded
+    """
+    if message.get('bytes') is not None:
+        if msgpack is None:
+            raise ProtocolError("msgpack frames need the msgpack package on the server")
+        try:
+            frame = msgpack.unpackb(message['bytes'], raw=False)
+        except Exception as e:
+            raise ProtocolError(f"Invalid msgpack frame: {e}")
+        return _check(frame), MSGPACK
+
+    text = message.get('text') or ''
+    if not text.lstrip().startswith('{'):
+        return None, JSON
+
+    try:
+        frame = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ProtocolError(f"Invalid JSON frame: {e}")
+    return _check(frame), JSON
+
+
+def _check(frame: Any) -> Dict:
+    if not isinstance(frame, dict):
+        raise ProtocolError("Frame must be an object")
+    if frame.get('v', PROTOCOL_VERSION) != PROTOCOL_VERSION:
+        raise ProtocolError(f"Unsupported protocol version {frame.get('v')}, server speaks {PROTOCOL_VERSION}")
+    if frame.get('type') != 'execute' or not isinstance(frame.get('command'), str):
+        raise ProtocolError("Expected an execute frame with a command")
+    return frame
+
+
+class FrameWriter:
+    """Serializes frames for one connection so concurrent commands never interleave a send"""
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self._lock = asyncio.Lock()
+
+    async def send(self, encoding: str, request_id: Any, frame_type: str, **fields) -> None:
+        frame = {"v": PROTOCOL_VERSION, "id": request_id, "type": frame_type, **fields}
+        async with self._lock:
+            if encoding == MSGPACK:
+                await self.websocket.send_bytes(msgpack.packb(frame, use_bin_type=True))
+            else:
+                await self.websocket.send_text(json.dumps(frame))
+
+    async def send_text(self, text: str) -> None:
+        """Send a bare text frame for the legacy protocol"""
+        async with self._lock:
+            await self.websocket.send_text(text)
+
+
+class OutputBatcher:
+    """Groups shell output lines into output frames instead of one frame per line"""
+
+    def __init__(self, writer: FrameWriter, encoding: str, request_id: Any,
+                 max_lines: Optional[int] = None, interval: Optional[float] = None):
+        self.writer = writer
+        self.encoding = encoding
+        self.request_id = request_id
+        self.max_lines = max_lines or Config.EXECUTE_OUTPUT_BATCH_LINES
+        self.interval = Config.EXECUTE_OUTPUT_BATCH_INTERVAL if interval is None else interval
+
+        self._lines: List[Tuple[str, str]] = []
+        self._oldest = 0.0
+        self._timer: Optional[asyncio.Task] = None
+
+    async def add(self, line: str, stream: str) -> None:
+        if not self._lines:
+            self._oldest = time.monotonic()
+        self._lines.append((stream, line))
+
+        if len(self._lines) >= self.max_lines or time.monotonic() - self._oldest >= self.interval:
+            await self.flush()
+        elif self._timer is None:
+            # Lines followed by a quiet period still go out after one interval
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def flush(self) -> None:
+        if not self._lines:
+            return
+        lines, self._lines = self._lines, []
+        await self.writer.send(self.encoding, self.request_id, "output", lines=lines)
+
+    async def close(self) -> None:
+        """Send whatever is still buffered"""
+        self.cancel()
+        await self.flush()
+
+    def cancel(self) -> None:
+        """Stop the pending flush without sending"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    async def _flush_later(self) -> None:
+        try:
+            await asyncio.sleep(self.interval)
+            self._timer = None
+            await self.flush()
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            # The socket went away, the command task reports that itself
+            pass
@@ -7,15 +7,18 @@ import asyncio
 from asyncio import streams
 import websockets
 import pvporcupine
-import torch
-import pyttsx3
 import pyaudio
-import struct
-import time
+import json
 import numpy as np
 from dotenv import load_dotenv
 import os 
 
+from src.configs.configs import Config
+from src.speech.audio_codec import create_encoder
+from src.speech.audio_capture import AudioCapture
+from src.speech.vad import create_vad
+from src.speech.tts_worker import TTSWorker
+
 
 """
 Wake word and Picovoice Acces Key
@@ -37,8 +40,8 @@ except Exception as e:
 VAD Model
 """
 print("Loading VAD model...")
-vad_model, _ = torch.hub.load(repo_or_dir='snakers4/silero-vad', model='silero_vad', force_reload=False)
-print("VAD model loaded.")
+vad = create_vad()
+print(f"VAD model loaded ({vad.engine}).")
 
 
 
@@ -46,67 +49,89 @@ print("VAD model loaded.")
 """
 TTS Engine 
 """
-tts_engine = pyttsx3.init()
 p = pyaudio.PyAudio()
+tts = TTSWorker(p)
+tts.start()
 
 
 
 async def main_loop():
     uri = "ws://localhost:8000/listen"
 
+    # One microphone stream for the whole session, frames are read from its ring buffer
+    capture = AudioCapture(p, frames_per_buffer=porcupine.frame_length)
+    capture.start()
+    preroll = Config.CAPTURE_PREROLL_MS * capture.sample_rate // 1000
+    end_silence = int(Config.CAPTURE_END_SILENCE * capture.sample_rate)
+
     while True:
         try:
             async with websockets.connect(uri) as websocket:
                 print("Successfully connected to the server.")
                 
                 while True:
-                    # 1. Open a fresh stream just for wake word detection
-                    stream = p.open(format=pyaudio.paInt16, channels=1, rate=16000, input=True, frames_per_buffer=porcupine.frame_length)
+                    # 1. Wake word detection on the live end of the buffer
                     print(f"\n--- Ready and listening for Hey CERES word ---")
 
-                    # Loop until wake word is detected
-                    while True:
-                        pcm = stream.read(porcupine.frame_length, exception_on_overflow=False)
-                        pcm = struct.unpack_from("h" * porcupine.frame_length, pcm)
-                        keyword_index = porcupine.process(pcm)
-
-                        if keyword_index >= 0:
+                    async for position, pcm in capture.frames(capture.position, porcupine.frame_length):
+                        if porcupine.process(pcm) >= 0:
                             break
-                    
-                    # 2. IMPORTANT: Close the wake-word stream completely
-                    stream.close()
+
                     print("Wake word detected!")
 
-                    # Acknowledge and wait for command
-                    tts_engine.say("Yes?")
-                    tts_engine.runAndWait()
-                    
-                    # 3. Open a NEW stream just for command recording
-                    stream = p.open(format=pyaudio.paInt16, channels=1, rate=16000, input=True, frames_per_buffer=512)
+                    # 2. Barge in on anything still being said, then acknowledge from the phrase cache.
+                    #    The microphone hears the acknowledgement, so recording resumes once it has played
+                    tts.interrupt()
+                    await asyncio.wrap_future(tts.say("Yes?"))
+                    resume = capture.position
+
+                    # 3. Stream the pre-roll from just before the wake word ended, then what was said after "Yes?"
                     print("Listening for command...")
-                    
-                    audio_buffer = []
-                    last_speech_time = time.time()
-                    while time.time() - last_speech_time < 2.0:
-                        audio_chunk_bytes = stream.read(512, exception_on_overflow=False)
-                        audio_buffer.append(audio_chunk_bytes)
-                        
-                        audio_tensor = torch.from_numpy(np.frombuffer(audio_chunk_bytes, dtype=np.int16).astype(np.float32) / 32768.0)
-                        if vad_model(audio_tensor, 16000).item() > 0.5:
-                            last_speech_time = time.time()
+                    encoder = create_encoder(Config.AUDIO_ENCODING)
+                    await websocket.send(json.dumps({"type": "start", "encoding": encoder.encoding}))
+
+                    preroll_start = position - preroll // Config.VAD_FRAME_SAMPLES * Config.VAD_FRAME_SAMPLES
+                    async for _, audio_chunk in capture.frames(preroll_start, Config.VAD_FRAME_SAMPLES, end=position):
+                        await websocket.send(encoder.encode(audio_chunk))
+
+                    # Silence is measured in captured samples, buffered audio is caught up without waiting
+                    last_speech = resume
+                    vad.reset()
+                    async for position, audio_chunk in capture.frames(resume, Config.VAD_FRAME_SAMPLES):
+
+                        # Stream every frame, the server transcribes while we are still talking
+                        await websocket.send(encoder.encode(audio_chunk))
+
+                        if vad.is_speech(audio_chunk):
+                            last_speech = position
+
+                        if position - last_speech >= end_silence:
+                            break
 
                     print("...Finished listening.")
-                    
-                    # 4. IMPORTANT: Close the command-recording stream
-                    stream.close()
 
-                    # Process command, get response, and speak
-                    await websocket.send(b''.join(audio_buffer))
-                    response = await websocket.recv()
+                    # End of speech, partial transcripts arrive first and the reply comes last
+                    await websocket.send(json.dumps({"type": "end"}))
+                    while True:
+                        message = await websocket.recv()
+                        try:
+                            event = json.loads(message)
+                        except (json.JSONDecodeError, TypeError):
+                            # Plain text is an older server's whole-utterance reply
+                            response = message if isinstance(message, str) else "Sorry, I didn't understand the server."
+                            break
+
+                        if event["type"] == "partial":
+                            print(f"... {event['text']}")
+                        elif event["type"] == "final":
+                            print(f"You said: {event['text']}")
+                        elif event["type"] in ("response", "error"):
+                            response = event["text"]
+                            break
+
+                    # Spoken in the background, the next wake word interrupts it
                     print(f"Ceres says: {response}")
-                    tts_engine.say(response)
-                    tts_engine.runAndWait()
-                    tts_engine.stop() 
+                    tts.say(response)
 
         except OSError:
             print("Server not available. Retrying in 3 seconds...")
@@ -125,5 +150,6 @@ except KeyboardInterrupt:
     print("Client Stopped!")
 finally:
     # This final cleanup is still a good safeguard
+    if 'tts' in locals(): tts.stop()
     if 'p' in locals(): p.terminate()
     if 'porcupine' in locals(): porcupine.delete()
\ No newline at end of file